@@ -0,0 +1,43 @@
+"""KB chunk content hash
+
+Revision ID: kb_chunk_content_hash
+Revises: kb_chunk_spans
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'kb_chunk_content_hash'
+down_revision: Union[str, None] = 'kb_chunk_spans'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('kb_chunks', sa.Column('content_hash', sa.String(64)))
+
+    # Backfill: SHA-256 hex of the stored text, or of the span for span-only rows
+    op.execute(
+        """
+        UPDATE kb_chunks
+        SET content_hash = encode(sha256(convert_to(
+                COALESCE(kb_chunks.text,
+                         substr(kb_documents.content, kb_chunks.start_offset + 1,
+                                kb_chunks.end_offset - kb_chunks.start_offset)),
+                'UTF8')), 'hex')
+        FROM kb_documents
+        WHERE kb_chunks.document_id = kb_documents.id
+          AND kb_chunks.content_hash IS NULL
+        """
+    )
+
+    op.create_index('idx_kb_chunks_content_hash', 'kb_chunks', ['content_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_kb_chunks_content_hash', table_name='kb_chunks')
+    op.drop_column('kb_chunks', 'content_hash')
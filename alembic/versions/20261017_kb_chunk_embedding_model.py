@@ -0,0 +1,29 @@
+"""KB chunk embedding model
+
+Revision ID: kb_chunk_embedding_model
+Revises: kb_vector_index
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'kb_chunk_embedding_model'
+down_revision: Union[str, None] = 'kb_vector_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Provider model_id that computed each chunk's embedding; stored
+    # embeddings are only reused for the same model. Existing rows stay
+    # NULL (their model is unknown), so their content is embedded again
+    # the next time it is ingested.
+    op.add_column('kb_chunks', sa.Column('embedding_model', sa.String(255)))
+
+
+def downgrade() -> None:
+    op.drop_column('kb_chunks', 'embedding_model')
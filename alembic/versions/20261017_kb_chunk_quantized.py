@@ -0,0 +1,72 @@
+"""KB chunk quantized embeddings
+
+Revision ID: kb_chunk_quantized
+Revises: kb_chunk_content_hash
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'kb_chunk_quantized'
+down_revision: Union[str, None] = 'kb_chunk_content_hash'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# halfvec and binary_quantize
+MIN_PGVECTOR_VERSION = (0, 7, 0)
+
+
+def _pgvector_version() -> tuple:
+    version = op.get_bind().execute(
+        sa.text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    ).scalar()
+    return tuple(int(part) for part in version.split('.')[:3])
+
+
+def upgrade() -> None:
+    # Opt-in: the generated columns rewrite kb_chunks and roughly add half
+    # of its embedding storage again, so they are only created for
+    # deployments setting KB_QUANTIZED_STORAGE
+    if not settings.KB_QUANTIZED_STORAGE:
+        return
+
+    version = _pgvector_version()
+    if version < MIN_PGVECTOR_VERSION:
+        raise RuntimeError(
+            f"KB_QUANTIZED_STORAGE needs pgvector >= {'.'.join(map(str, MIN_PGVECTOR_VERSION))}, "
+            f"the database has {'.'.join(map(str, version))}; run ALTER EXTENSION vector UPDATE "
+            f"(after installing a newer pgvector) or unset KB_QUANTIZED_STORAGE"
+        )
+
+    # Compact copies derived from the full-precision embedding. Stored
+    # generated columns are filled for existing rows when added (the table
+    # is rewritten once) and kept in sync on every insert and update.
+    op.execute(
+        """
+        ALTER TABLE kb_chunks
+            ADD COLUMN embedding_half halfvec(384)
+                GENERATED ALWAYS AS (CAST(embedding AS halfvec(384))) STORED,
+            ADD COLUMN embedding_bit bit(384)
+                GENERATED ALWAYS AS (CAST(binary_quantize(embedding) AS bit(384))) STORED
+        """
+    )
+
+    op.execute(
+        "CREATE INDEX idx_kb_chunks_embedding_half ON kb_chunks USING ivfflat (embedding_half halfvec_cosine_ops) WITH (lists = 100)"
+    )
+    op.execute(
+        "CREATE INDEX idx_kb_chunks_embedding_bit ON kb_chunks USING ivfflat (embedding_bit bit_hamming_ops) WITH (lists = 100)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_kb_chunks_embedding_bit")
+    op.execute("DROP INDEX IF EXISTS idx_kb_chunks_embedding_half")
+    op.execute("ALTER TABLE kb_chunks DROP COLUMN IF EXISTS embedding_bit")
+    op.execute("ALTER TABLE kb_chunks DROP COLUMN IF EXISTS embedding_half")
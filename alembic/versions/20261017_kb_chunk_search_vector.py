@@ -0,0 +1,106 @@
+"""KB chunk full-text search vector
+
+Revision ID: kb_chunk_search_vector
+Revises: kb_ingest_jobs
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'kb_chunk_search_vector'
+down_revision: Union[str, None] = 'kb_ingest_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _config_literal(name: str) -> str:
+    """
+    A text search configuration name as a quoted SQL literal.
+
+    Only names of configurations that exist in the database are accepted,
+    so the setting cannot inject SQL into the trigger function body (which
+    takes no bind parameters).
+    """
+    bind = op.get_bind()
+    exists = bind.execute(
+        sa.text("SELECT 1 FROM pg_ts_config WHERE cfgname = :name"),
+        {"name": name}
+    ).first()
+    if exists is None:
+        raise ValueError(f"KB_TEXT_SEARCH_CONFIG {name!r} is not a text search configuration in this database")
+    return bind.execute(sa.text("SELECT quote_literal(:name)"), {"name": name}).scalar()
+
+
+def upgrade() -> None:
+    config = settings.KB_TEXT_SEARCH_CONFIG
+    config_literal = _config_literal(config)
+
+    # Keep new document content uncompressed: substr() on an uncompressed
+    # out-of-line value reads only the TOAST chunks it needs, so resolving
+    # one chunk's text does not decompress the whole document
+    op.execute("ALTER TABLE kb_documents ALTER COLUMN content SET STORAGE EXTERNAL")
+
+    op.execute("ALTER TABLE kb_chunks ADD COLUMN search_vector tsvector")
+    op.execute(
+        sa.text(
+            """
+            UPDATE kb_chunks
+            SET search_vector = to_tsvector(
+                CAST(:config AS regconfig),
+                COALESCE(
+                    kb_chunks.text,
+                    substr(kb_documents.content, kb_chunks.start_offset + 1,
+                           kb_chunks.end_offset - kb_chunks.start_offset),
+                    ''
+                )
+            )
+            FROM kb_documents
+            WHERE kb_documents.id = kb_chunks.document_id
+            """
+        ).bindparams(config=config)
+    )
+
+    # Chunks store spans into their document rather than text, so the
+    # vector cannot be a generated column; the trigger also covers COPY.
+    # content_hash changes whenever a rewritten chunk's text does, even if
+    # its offsets happen to stay the same.
+    op.execute(
+        f"""
+        CREATE FUNCTION kb_chunks_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector(
+                CAST({config_literal} AS regconfig),
+                COALESCE(
+                    NEW.text,
+                    (SELECT substr(content, NEW.start_offset + 1, NEW.end_offset - NEW.start_offset)
+                     FROM kb_documents WHERE id = NEW.document_id),
+                    ''
+                )
+            );
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER kb_chunks_search_vector
+            BEFORE INSERT OR UPDATE OF text, start_offset, end_offset, content_hash, document_id ON kb_chunks
+            FOR EACH ROW EXECUTE FUNCTION kb_chunks_search_vector()
+        """
+    )
+
+    op.execute("CREATE INDEX idx_kb_chunks_search_vector ON kb_chunks USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_kb_chunks_search_vector")
+    op.execute("DROP TRIGGER IF EXISTS kb_chunks_search_vector ON kb_chunks")
+    op.execute("DROP FUNCTION IF EXISTS kb_chunks_search_vector()")
+    op.drop_column('kb_chunks', 'search_vector')
+    op.execute("ALTER TABLE kb_documents ALTER COLUMN content SET STORAGE EXTENDED")
@@ -0,0 +1,41 @@
+"""KB chunk spans
+
+Revision ID: kb_chunk_spans
+Revises: phase1_core
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'kb_chunk_spans'
+down_revision: Union[str, None] = 'phase1_core'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Chunks now reference a span of kb_documents.content instead of a copy
+    op.add_column('kb_chunks', sa.Column('start_offset', sa.Integer()))
+    op.add_column('kb_chunks', sa.Column('end_offset', sa.Integer()))
+    op.alter_column('kb_chunks', 'text', existing_type=sa.String(), nullable=True)
+
+
+def downgrade() -> None:
+    # Materialize span-only chunks before restoring NOT NULL on text
+    op.execute(
+        """
+        UPDATE kb_chunks
+        SET text = substr(kb_documents.content, kb_chunks.start_offset + 1,
+                          kb_chunks.end_offset - kb_chunks.start_offset)
+        FROM kb_documents
+        WHERE kb_chunks.document_id = kb_documents.id
+          AND kb_chunks.text IS NULL
+        """
+    )
+    op.alter_column('kb_chunks', 'text', existing_type=sa.String(), nullable=False)
+    op.drop_column('kb_chunks', 'end_offset')
+    op.drop_column('kb_chunks', 'start_offset')
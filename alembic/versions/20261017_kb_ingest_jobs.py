@@ -0,0 +1,50 @@
+"""KB background ingestion jobs
+
+Revision ID: kb_ingest_jobs
+Revises: kb_projections
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'kb_ingest_jobs'
+down_revision: Union[str, None] = 'kb_projections'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'kb_ingest_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id'), nullable=False),
+        sa.Column('document_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('kb_documents.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', sa.String(), nullable=False, server_default='QUEUED'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('chunks_total', sa.Integer()),
+        sa.Column('chunks_processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('chunks_embedded', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.String()),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime()),
+        sa.Column('heartbeat_at', sa.DateTime()),
+        sa.Column('finished_at', sa.DateTime()),
+    )
+    op.create_index(
+        'idx_kb_ingest_jobs_queue', 'kb_ingest_jobs', ['run_after'],
+        postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')")
+    )
+    op.create_index('idx_kb_ingest_jobs_document', 'kb_ingest_jobs', ['document_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_kb_ingest_jobs_document', table_name='kb_ingest_jobs')
+    op.drop_index('idx_kb_ingest_jobs_queue', table_name='kb_ingest_jobs')
+    op.drop_table('kb_ingest_jobs')
@@ -0,0 +1,45 @@
+"""KB PCA projections
+
+Revision ID: kb_projections
+Revises: kb_chunk_quantized
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision: str = 'kb_projections'
+down_revision: Union[str, None] = 'kb_chunk_quantized'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'kb_projections',
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id'), primary_key=True),
+        sa.Column('source_dimension', sa.Integer(), nullable=False),
+        sa.Column('dimension', sa.Integer(), nullable=False),
+        sa.Column('mean', sa.LargeBinary(), nullable=False),
+        sa.Column('components', sa.LargeBinary(), nullable=False),
+        sa.Column('explained_variance', sa.Float(), nullable=False),
+        sa.Column('sample_size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+
+    # Filled per tenant when a projection is fitted (no backfill here)
+    op.add_column('kb_chunks', sa.Column('embedding_reduced', Vector(128)))
+    op.execute(
+        "CREATE INDEX idx_kb_chunks_embedding_reduced ON kb_chunks USING ivfflat (embedding_reduced vector_cosine_ops) WITH (lists = 100)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_kb_chunks_embedding_reduced")
+    op.drop_column('kb_chunks', 'embedding_reduced')
+    op.drop_table('kb_projections')
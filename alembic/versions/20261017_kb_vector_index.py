@@ -0,0 +1,99 @@
+"""KB vector index type (ivfflat or HNSW)
+
+Revision ID: kb_vector_index
+Revises: kb_chunk_search_vector
+Create Date: 2026-10-17
+
+"""
+import math
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'kb_vector_index'
+down_revision: Union[str, None] = 'kb_chunk_search_vector'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table, column, operator class)
+VECTOR_INDEXES = (
+    ('idx_kb_chunks_embedding', 'kb_chunks', 'embedding', 'vector_cosine_ops'),
+    ('idx_kb_chunks_embedding_half', 'kb_chunks', 'embedding_half', 'halfvec_cosine_ops'),
+    ('idx_kb_chunks_embedding_bit', 'kb_chunks', 'embedding_bit', 'bit_hamming_ops'),
+    ('idx_kb_chunks_embedding_reduced', 'kb_chunks', 'embedding_reduced', 'vector_cosine_ops'),
+    ('idx_embeddings_vector', 'embeddings', 'embedding', 'vector_cosine_ops'),
+)
+
+
+# Fewest lists sized from the row count, so a near-empty table still gets
+# a partitioned index; as it grows, recall is held by probes (see
+# KB_IVFFLAT_PROBES and the ANN tuner) until the index is rebuilt
+IVFFLAT_MIN_LISTS = 10
+
+
+def _ivfflat_lists(table: str, column: str) -> int:
+    """Lists for the rows indexed now: rows / 1000 up to 1M rows, sqrt(rows) beyond."""
+    if settings.KB_IVFFLAT_LISTS is not None:
+        return settings.KB_IVFFLAT_LISTS
+    rows = op.get_bind().execute(sa.text(f"SELECT count({column}) FROM {table}")).scalar()
+    if rows <= 1_000_000:
+        return max(IVFFLAT_MIN_LISTS, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def _rebuild(name: str, table: str, definition: str) -> None:
+    """
+    Replace an index without blocking writes.
+
+    The new index is built CONCURRENTLY under a temporary name and swapped
+    in, so searches keep the old one until it is ready. Must run outside a
+    transaction (see autocommit_block).
+    """
+    building = f"{name}_rebuild"
+    # Left invalid by an interrupted earlier run
+    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {building}")
+    op.execute(f"CREATE INDEX CONCURRENTLY {building} ON {table} {definition}")
+    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute(f"ALTER INDEX {building} RENAME TO {name}")
+
+
+def _has_column(table: str, column: str) -> bool:
+    """Whether the column exists (the quantized ones are opt-in)."""
+    return op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = :table AND column_name = :column"
+        ),
+        {"table": table, "column": column}
+    ).first() is not None
+
+
+def upgrade() -> None:
+    index_type = settings.KB_VECTOR_INDEX
+    if index_type not in ('ivfflat', 'hnsw'):
+        raise ValueError(f"KB_VECTOR_INDEX must be 'ivfflat' or 'hnsw', not {index_type!r}")
+
+    # The phase 1 indexes were built with lists = 100 whatever the table
+    # size. HNSW needs no training data, so its recall holds as tenants
+    # keep ingesting; ivfflat lists are at least sized for today's rows.
+    # Indexes are rebuilt concurrently, so ingestion and search keep
+    # running on a live database.
+    with op.get_context().autocommit_block():
+        for name, table, column, opclass in VECTOR_INDEXES:
+            if not _has_column(table, column):
+                continue
+            if index_type == 'hnsw':
+                options = f"m = {settings.KB_HNSW_M}, ef_construction = {settings.KB_HNSW_EF_CONSTRUCTION}"
+            else:
+                options = f"lists = {_ivfflat_lists(table, column)}"
+            _rebuild(name, table, f"USING {index_type} ({column} {opclass}) WITH ({options})")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column, opclass in VECTOR_INDEXES:
+            if not _has_column(table, column):
+                continue
+            _rebuild(name, table, f"USING ivfflat ({column} {opclass}) WITH (lists = 100)")
@@ -3,6 +3,7 @@ from fastapi import APIRouter
 from datetime import datetime
 from app.schemas.common import Envelope, Meta
 from app.core.logging import request_id_var
+from app.providers.embeddings.factory import get_embeddings_provider
 
 router = APIRouter()
 
@@ -45,3 +46,17 @@ async def version():
         )
     ).model_dump()
 
+
+@router.get("/metrics/embeddings", tags=["health"])
+async def embeddings_metrics():
+    """GET /metrics/embeddings endpoint (provider and cache counters)."""
+    request_id = request_id_var.get() or "unknown"
+    
+    return Envelope(
+        ok=True,
+        data=get_embeddings_provider().metrics(),
+        meta=Meta(
+            request_id=request_id,
+            timestamp=datetime.utcnow().isoformat() + "Z"
+        )
+    ).model_dump()
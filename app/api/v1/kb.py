@@ -1,16 +1,23 @@
 """KB endpoints per API_CONTRACTS.md."""
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Depends, Path, Query, Request
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from datetime import datetime
 from uuid import UUID
-from typing import Optional
+from typing import AsyncIterator, Optional
 from app.db.session import get_db
 from app.schemas.kb import (
-    KBDocumentCreate, KBDocumentResponse, KBDocumentListItem,
-    KBSearchRequest, KBSearchResponse, KBSearchHit
+    KBDocumentCreate, KBDocumentResponse, KBDocumentListItem, KBIngestJobResponse,
+    KBBulkDocumentResult, KBBulkIngestResponse,
+    KBDocumentUpdate, KBDocumentUpdateResponse, KBDocumentDeleteResponse,
+    KBSearchRequest, KBSearchResponse, KBSearchHit,
+    KBSearchBatchRequest, KBSearchBatchResponse, KBSearchBatchResult,
+    KBProjectionFitRequest, KBProjectionResponse
 )
 from app.schemas.common import Envelope, PaginatedEnvelope, Meta, PaginationMeta
-from app.services.kb_service import KBService
+from app.services.kb_service import BulkItem, KBService
+from app.core.config import settings
+from app.core.ndjson import aiter_ndjson
 from app.core.logging import request_id_var
 from app.core.errors import APIError
 
@@ -20,13 +27,41 @@ router = APIRouter(prefix="/tenants/{tenant_id}/kb", tags=["kb"])
 async def create_document(
     request: KBDocumentCreate,
     tenant_id: UUID = Path(...),
+    background: bool = Query(False),
     db: Session = Depends(get_db)
 ):
-    """POST /tenants/{tenant_id}/kb/documents - Ingest document."""
+    """
+    POST /tenants/{tenant_id}/kb/documents - Ingest document.
+    
+    With background=true the document is stored as PENDING and ingested by
+    the background workers; poll GET /kb/jobs/{job_id} for progress.
+    """
     request_id = request_id_var.get() or "unknown"
     
     service = KBService(db)
-    document = service.ingest_document(
+    if background:
+        document, job = service.queue_document(
+            tenant_id=tenant_id,
+            source_type=request.source_type,
+            title=request.title,
+            content=request.content or "",
+            tags=request.tags or []
+        )
+        return Envelope(
+            ok=True,
+            data=KBDocumentResponse(
+                document_id=str(document.id),
+                status=document.status,
+                chunks_created=0,
+                job_id=str(job.id)
+            ).model_dump(),
+            meta=Meta(
+                request_id=request_id,
+                timestamp=datetime.utcnow().isoformat() + "Z"
+            )
+        ).model_dump()
+    
+    document = await service.aingest_document(
         tenant_id=tenant_id,
         source_type=request.source_type,
         title=request.title,
@@ -34,9 +69,8 @@ async def create_document(
         tags=request.tags or []
     )
     
-    # Count chunks - reload document to get chunks relationship
-    db.refresh(document)
-    chunks_count = len(document.chunks) if document.chunks else 0
+    # Count chunks without loading them
+    chunks_count = service.kb_repo.count_chunks(document.id)
     
     return Envelope(
         ok=True,
@@ -51,6 +85,89 @@ async def create_document(
         )
     ).model_dump()
 
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    """Serialize an optional naive UTC timestamp."""
+    return value.isoformat() + "Z" if value else None
+
+@router.get("/jobs/{job_id}")
+async def get_ingest_job(
+    tenant_id: UUID = Path(...),
+    job_id: UUID = Path(...),
+    db: Session = Depends(get_db)
+):
+    """GET /tenants/{tenant_id}/kb/jobs/{job_id} - Background ingestion status."""
+    request_id = request_id_var.get() or "unknown"
+    
+    service = KBService(db)
+    job = service.get_ingest_job(tenant_id, job_id)
+    
+    return Envelope(
+        ok=True,
+        data=KBIngestJobResponse(
+            job_id=str(job.id),
+            document_id=str(job.document_id),
+            status=job.status,
+            attempts=job.attempts,
+            chunks_total=job.chunks_total,
+            chunks_processed=job.chunks_processed,
+            chunks_embedded=job.chunks_embedded,
+            error=job.error,
+            created_at=_isoformat(job.created_at),
+            started_at=_isoformat(job.started_at),
+            finished_at=_isoformat(job.finished_at)
+        ).model_dump(),
+        meta=Meta(
+            request_id=request_id,
+            timestamp=datetime.utcnow().isoformat() + "Z"
+        )
+    ).model_dump()
+
+async def _bulk_documents(request: Request) -> AsyncIterator[BulkItem]:
+    """Validate NDJSON documents as the request body streams in."""
+    async for line, value, error in aiter_ndjson(request.stream(), settings.KB_BULK_MAX_LINE_BYTES):
+        document = None
+        if error is None:
+            try:
+                document = KBDocumentCreate.model_validate(value)
+            except ValidationError as e:
+                error = f"Invalid document: {str(e)}"
+        yield line, document, error
+
+@router.post("/documents:bulk")
+async def bulk_create_documents(
+    request: Request,
+    tenant_id: UUID = Path(...),
+    db: Session = Depends(get_db)
+):
+    """
+    POST /tenants/{tenant_id}/kb/documents:bulk - Ingest NDJSON documents.
+    
+    The body holds one KBDocumentCreate object per line and is read as it
+    streams in; invalid lines are reported per document.
+    """
+    request_id = request_id_var.get() or "unknown"
+    
+    service = KBService(db)
+    result = await service.aingest_documents_bulk(
+        tenant_id=tenant_id,
+        items=_bulk_documents(request)
+    )
+    
+    return Envelope(
+        ok=True,
+        data=KBBulkIngestResponse(
+            documents=[KBBulkDocumentResult(**document) for document in result["documents"]],
+            documents_ingested=result["documents_ingested"],
+            documents_failed=result["documents_failed"],
+            chunks_created=result["chunks_created"],
+            chunks_embedded=result["chunks_embedded"]
+        ).model_dump(),
+        meta=Meta(
+            request_id=request_id,
+            timestamp=datetime.utcnow().isoformat() + "Z"
+        )
+    ).model_dump()
+
 @router.get("/documents")
 async def list_documents(
     tenant_id: UUID = Path(...),
@@ -92,37 +209,85 @@ async def list_documents(
         )
     ).model_dump()
 
+@router.patch("/documents/{document_id}")
+async def update_document(
+    request: KBDocumentUpdate,
+    tenant_id: UUID = Path(...),
+    document_id: UUID = Path(...),
+    db: Session = Depends(get_db)
+):
+    """PATCH /tenants/{tenant_id}/kb/documents/{document_id} - Update document."""
+    request_id = request_id_var.get() or "unknown"
+    
+    service = KBService(db)
+    result = await service.aupdate_document(
+        tenant_id=tenant_id,
+        document_id=document_id,
+        title=request.title,
+        tags=request.tags,
+        source_type=request.source_type,
+        content=request.content
+    )
+    
+    return Envelope(
+        ok=True,
+        data=KBDocumentUpdateResponse(
+            document_id=str(document_id),
+            **result
+        ).model_dump(),
+        meta=Meta(
+            request_id=request_id,
+            timestamp=datetime.utcnow().isoformat() + "Z"
+        )
+    ).model_dump()
+
+@router.delete("/documents/{document_id}")
+async def delete_document(
+    tenant_id: UUID = Path(...),
+    document_id: UUID = Path(...),
+    db: Session = Depends(get_db)
+):
+    """DELETE /tenants/{tenant_id}/kb/documents/{document_id} - Delete document."""
+    request_id = request_id_var.get() or "unknown"
+    
+    service = KBService(db)
+    chunks_deleted = service.delete_document(tenant_id=tenant_id, document_id=document_id)
+    
+    return Envelope(
+        ok=True,
+        data=KBDocumentDeleteResponse(
+            document_id=str(document_id),
+            deleted=True,
+            chunks_deleted=chunks_deleted
+        ).model_dump(),
+        meta=Meta(
+            request_id=request_id,
+            timestamp=datetime.utcnow().isoformat() + "Z"
+        )
+    ).model_dump()
+
 @router.post("/search")
 async def search(
     request: KBSearchRequest,
     tenant_id: UUID = Path(...),
     db: Session = Depends(get_db)
 ):
-    """POST /tenants/{tenant_id}/kb/search - Semantic search."""
+    """POST /tenants/{tenant_id}/kb/search - Semantic, full-text or hybrid search."""
     request_id = request_id_var.get() or "unknown"
     
     service = KBService(db)
-    results = service.search(
+    results = await service.asearch(
         tenant_id=tenant_id,
         query=request.query,
         top_k=request.top_k,
-        filters=request.filters
+        filters=request.filters,
+        mode=request.mode,
+        probes=request.probes,
+        ef_search=request.ef_search
     )
     
     # Build response
-    hits = []
-    for chunk, score in results:
-        hits.append(
-            KBSearchHit(
-                chunk_id=str(chunk.id),
-                score=round(score, 2),  # Round to 2 decimal places
-                text=chunk.text,
-                document={
-                    "document_id": str(chunk.document.id),
-                    "title": chunk.document.title
-                }
-            ).model_dump()
-        )
+    hits = [_search_hit(hit) for hit in results]
     
     return Envelope(
         ok=True,
@@ -133,3 +298,91 @@ async def search(
         )
     ).model_dump()
 
+@router.post("/search:batch")
+async def search_batch(
+    request: KBSearchBatchRequest,
+    tenant_id: UUID = Path(...),
+    db: Session = Depends(get_db)
+):
+    """POST /tenants/{tenant_id}/kb/search:batch - Several searches in one round trip."""
+    request_id = request_id_var.get() or "unknown"
+    
+    service = KBService(db)
+    results = await service.asearch_batch(
+        tenant_id=tenant_id,
+        queries=request.queries,
+        top_k=request.top_k,
+        filters=request.filters,
+        mode=request.mode,
+        probes=request.probes,
+        ef_search=request.ef_search
+    )
+    
+    return Envelope(
+        ok=True,
+        data=KBSearchBatchResponse(
+            results=[
+                KBSearchBatchResult(query=query, hits=[_search_hit(hit) for hit in hits])
+                for query, hits in zip(request.queries, results)
+            ]
+        ).model_dump(),
+        meta=Meta(
+            request_id=request_id,
+            timestamp=datetime.utcnow().isoformat() + "Z"
+        )
+    ).model_dump()
+
+def _search_hit(hit) -> dict:
+    """Serialize a search hit row."""
+    return KBSearchHit(
+        chunk_id=str(hit.chunk_id),
+        chunk_index=hit.chunk_index,
+        score=round(hit.score, 2),  # Round to 2 decimal places
+        text=hit.text,
+        document={
+            "document_id": str(hit.document_id),
+            "title": hit.title
+        }
+    ).model_dump()
+
+
+@router.post("/projection")
+async def fit_projection(
+    request: KBProjectionFitRequest,
+    tenant_id: UUID = Path(...),
+    db: Session = Depends(get_db)
+):
+    """POST /tenants/{tenant_id}/kb/projection - Fit PCA projection and reduce chunks."""
+    request_id = request_id_var.get() or "unknown"
+    
+    service = KBService(db)
+    result = service.fit_projection(tenant_id=tenant_id, sample_size=request.sample_size)
+    
+    return Envelope(
+        ok=True,
+        data=KBProjectionResponse(**result).model_dump(),
+        meta=Meta(
+            request_id=request_id,
+            timestamp=datetime.utcnow().isoformat() + "Z"
+        )
+    ).model_dump()
+
+@router.get("/projection")
+async def get_projection(
+    tenant_id: UUID = Path(...),
+    db: Session = Depends(get_db)
+):
+    """GET /tenants/{tenant_id}/kb/projection - Describe fitted PCA projection."""
+    request_id = request_id_var.get() or "unknown"
+    
+    service = KBService(db)
+    result = service.get_projection(tenant_id=tenant_id)
+    
+    return Envelope(
+        ok=True,
+        data=KBProjectionResponse(**result).model_dump(),
+        meta=Meta(
+            request_id=request_id,
+            timestamp=datetime.utcnow().isoformat() + "Z"
+        )
+    ).model_dump()
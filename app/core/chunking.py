@@ -1,50 +1,365 @@
 """Text chunking utility for KB documents."""
-from typing import List
+import hashlib
+import multiprocessing
+import os
+import re
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+from app.core.tokenization import RegexTokenizer, Tokenizer
 
-def chunk_text(
+# (start, end) character offsets of a chunk within its document
+Span = Tuple[int, int]
+
+# Chunking modes: character windows (legacy) or token-budget windows
+CHUNK_MODE_CHARS = "chars"
+CHUNK_MODE_TOKENS = "tokens"
+CHUNK_MODES = (CHUNK_MODE_CHARS, CHUNK_MODE_TOKENS)
+
+DEFAULT_CHUNK_SIZE = 500  # characters
+DEFAULT_CHUNK_OVERLAP = 50  # characters
+DEFAULT_TOKEN_CHUNK_SIZE = 256  # tokens
+DEFAULT_TOKEN_CHUNK_OVERLAP = 32  # tokens
+
+# Below this many characters per batch, process startup and pickling cost
+# more than chunking the documents inline
+PARALLEL_CHUNKING_MIN_CHARS = 1_000_000
+
+# Sentence endings tried in priority order when picking a break point
+SENTENCE_ENDINGS = ('. ', '.\n', '! ', '!\n', '? ', '?\n')
+
+_SENTENCE_END_RE = re.compile(r'[.!?][ \n]')
+
+# Single-character tokens that end a sentence (including the Devanagari danda)
+_SENTENCE_END_TOKENS = frozenset('.!?\u0964')
+
+_default_tokenizer = RegexTokenizer()
+
+def hash_chunk_text(text: str) -> str:
+    """Return the SHA-256 hex digest identifying a chunk's content."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _sentence_boundaries(text: str) -> Dict[str, List[int]]:
+    """
+    Collect sentence-ending offsets in a single pass over the text.
+
+    Returns:
+        Mapping of each sentence ending to its sorted start offsets
+    """
+    boundaries: Dict[str, List[int]] = {punct: [] for punct in SENTENCE_ENDINGS}
+    for match in _SENTENCE_END_RE.finditer(text):
+        boundaries[match.group()].append(match.start())
+    return boundaries
+
+def _strip_span(text: str, start: int, end: int) -> Span:
+    """Narrow a span so that text[start:end] == text[start:end].strip()."""
+    end = min(end, len(text))
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+def iter_chunk_spans(
     text: str,
-    chunk_size: int = 500,
-    chunk_overlap: int = 50
-) -> List[str]:
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
+) -> Iterator[Span]:
     """
-    Split text into chunks with overlap.
-    
+    Lazily split text into overlapping chunk spans.
+
+    Sentence boundaries are located once up front instead of being
+    searched for again in every window. Spans are already stripped of
+    surrounding whitespace, so text[start:end] is the chunk text.
+
     Args:
         text: Text to chunk
         chunk_size: Target chunk size in characters
         chunk_overlap: Overlap size in characters between chunks
-    
-    Returns:
-        List of text chunks
+
+    Yields:
+        (start, end) character offsets in document order
     """
-    if not text or len(text) <= chunk_size:
-        return [text] if text else []
-    
-    chunks = []
+    if not text:
+        return
+    if len(text) <= chunk_size:
+        yield 0, len(text)
+        return
+
+    boundaries = list(_sentence_boundaries(text).values())
+    text_len = len(text)
+    min_break = chunk_size // 2  # Don't break too early
     start = 0
-    
-    while start < len(text):
-        # Calculate end position
+
+    while start < text_len:
         end = start + chunk_size
-        
-        # If not the last chunk, try to break at sentence boundary
-        if end < len(text):
-            # Look for sentence endings near the end
-            for punct in ['. ', '.\n', '! ', '!\n', '? ', '?\n']:
-                last_punct = text.rfind(punct, start, end)
-                if last_punct > start + chunk_size // 2:  # Don't break too early
-                    end = last_punct + 1
+
+        # If not the last chunk, break at the last sentence ending that
+        # fits entirely inside the window
+        if end < text_len:
+            for offsets in boundaries:
+                idx = bisect_right(offsets, end - 2) - 1
+                if idx >= 0 and offsets[idx] > start + min_break:
+                    end = offsets[idx] + 1
                     break
-        
-        # Extract chunk
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
-        
+
+        chunk_start, chunk_end = _strip_span(text, start, end)
+        if chunk_start < chunk_end:
+            yield chunk_start, chunk_end
+
         # Move start position (with overlap)
         start = end - chunk_overlap
-        if start >= len(text):
+        if start >= text_len:
+            break
+
+def iter_chunks(
+    text: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
+) -> Iterator[str]:
+    """
+    Lazily split text into chunks with overlap.
+
+    Produces exactly the same chunks as chunk_text.
+
+    Args:
+        text: Text to chunk
+        chunk_size: Target chunk size in characters
+        chunk_overlap: Overlap size in characters between chunks
+
+    Returns:
+        Iterator over text chunks in document order
+    """
+    return (text[start:end] for start, end in iter_chunk_spans(text, chunk_size, chunk_overlap))
+
+def chunk_text(
+    text: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
+) -> List[str]:
+    """
+    Split text into chunks with overlap.
+
+    Args:
+        text: Text to chunk
+        chunk_size: Target chunk size in characters
+        chunk_overlap: Overlap size in characters between chunks
+
+    Returns:
+        List of text chunks
+    """
+    return list(iter_chunks(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap))
+
+def iter_token_spans(
+    text: str,
+    max_tokens: int = DEFAULT_TOKEN_CHUNK_SIZE,
+    overlap_tokens: int = DEFAULT_TOKEN_CHUNK_OVERLAP,
+    tokenizer: Optional[Tokenizer] = None
+) -> Iterator[Span]:
+    """
+    Split text lazily into spans of at most max_tokens tokens.
+
+    The document is tokenized once into offset arrays; windows are then cut
+    by token index and mapped back to character offsets, preferring to end
+    on a sentence-ending token past the middle of the window.
+
+    Args:
+        text: Text to chunk
+        max_tokens: Maximum tokens per chunk
+        overlap_tokens: Tokens shared between consecutive chunks
+        tokenizer: Tokenizer to use (defaults to RegexTokenizer)
+
+    Returns:
+        Iterator over (start, end) character offsets in document order
+    """
+    if max_tokens < 1 or not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be in [0, max_tokens) and max_tokens >= 1")
+    return _iter_token_windows(text or "", max_tokens, overlap_tokens, tokenizer or _default_tokenizer)
+
+def _iter_token_windows(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int,
+    tokenizer: Tokenizer
+) -> Iterator[Span]:
+    """Yield token-budget spans; see iter_token_spans."""
+    starts, ends = tokenizer.token_offsets(text)
+    num_tokens = len(starts)
+    if num_tokens == 0:
+        return
+
+    terminals = [
+        idx for idx in range(num_tokens)
+        if ends[idx] - starts[idx] == 1 and text[starts[idx]] in _SENTENCE_END_TOKENS
+    ]
+    min_break = max_tokens // 2  # Don't break too early
+    start_tok = 0
+
+    while True:
+        end_tok = min(start_tok + max_tokens, num_tokens)
+
+        # If not the last chunk, end after the last sentence terminator
+        if end_tok < num_tokens:
+            idx = bisect_left(terminals, end_tok) - 1
+            if idx >= 0 and terminals[idx] > start_tok + min_break:
+                end_tok = terminals[idx] + 1
+
+        yield starts[start_tok], ends[end_tok - 1]
+
+        if end_tok >= num_tokens:
             break
-    
-    return chunks
+        start_tok = max(end_tok - overlap_tokens, start_tok + 1)
+
+def iter_token_chunks(
+    text: str,
+    max_tokens: int = DEFAULT_TOKEN_CHUNK_SIZE,
+    overlap_tokens: int = DEFAULT_TOKEN_CHUNK_OVERLAP,
+    tokenizer: Optional[Tokenizer] = None
+) -> Iterator[str]:
+    """
+    Split text lazily into chunks of at most max_tokens tokens.
+
+    Args:
+        text: Text to chunk
+        max_tokens: Maximum tokens per chunk
+        overlap_tokens: Tokens shared between consecutive chunks
+        tokenizer: Tokenizer to use (defaults to RegexTokenizer)
+
+    Returns:
+        Iterator over text chunks in document order
+    """
+    spans = iter_token_spans(text, max_tokens, overlap_tokens, tokenizer)
+    return (text[start:end] for start, end in spans)
+
+def iter_document_spans(
+    text: str,
+    mode: str = CHUNK_MODE_CHARS,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    tokenizer: Optional[Tokenizer] = None
+) -> Iterator[Span]:
+    """
+    Chunk a document into spans using the given chunking mode.
+
+    Args:
+        text: Text to chunk
+        mode: "chars" (character windows) or "tokens" (token budget)
+        chunk_size: Chunk size in the mode's unit (defaults per mode)
+        chunk_overlap: Overlap in the mode's unit (defaults per mode)
+        tokenizer: Tokenizer for "tokens" mode
+
+    Returns:
+        Iterator over (start, end) character offsets
+    """
+    if mode == CHUNK_MODE_CHARS:
+        chunk_size = DEFAULT_CHUNK_SIZE if chunk_size is None else chunk_size
+        chunk_overlap = DEFAULT_CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        # Larger overlaps can stop the window from advancing past a sentence break
+        if not 0 <= chunk_overlap <= chunk_size // 2:
+            raise ValueError("chunk_overlap must be in [0, chunk_size // 2] for 'chars' mode")
+        return iter_chunk_spans(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if mode == CHUNK_MODE_TOKENS:
+        return iter_token_spans(
+            text,
+            max_tokens=DEFAULT_TOKEN_CHUNK_SIZE if chunk_size is None else chunk_size,
+            overlap_tokens=DEFAULT_TOKEN_CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap,
+            tokenizer=tokenizer
+        )
+    raise ValueError(f"Unknown chunking mode '{mode}', expected one of {CHUNK_MODES}")
+
+def iter_document_chunks(
+    text: str,
+    mode: str = CHUNK_MODE_CHARS,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    tokenizer: Optional[Tokenizer] = None
+) -> Iterator[str]:
+    """
+    Chunk a document using the given chunking mode.
+
+    Args:
+        text: Text to chunk
+        mode: "chars" (character windows) or "tokens" (token budget)
+        chunk_size: Chunk size in the mode's unit (defaults per mode)
+        chunk_overlap: Overlap in the mode's unit (defaults per mode)
+        tokenizer: Tokenizer for "tokens" mode
+
+    Returns:
+        Iterator over text chunks
+    """
+    spans = iter_document_spans(text, mode, chunk_size, chunk_overlap, tokenizer)
+    return (text[start:end] for start, end in spans)
+
+def _document_spans_list(text: str, **options) -> List[Span]:
+    """Chunk one document into a span list (process pool worker entry point)."""
+    return list(iter_document_spans(text or "", **options))
+
+@lru_cache(maxsize=1)
+def get_chunking_pool() -> ProcessPoolExecutor:
+    """Return the process pool shared by chunk_documents calls (KB_CHUNKING_WORKERS processes)."""
+    # Started lazily from worker threads; forking a threaded process can deadlock
+    return ProcessPoolExecutor(
+        max_workers=settings.KB_CHUNKING_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+def shutdown_chunking_pool() -> None:
+    """Stop the shared chunking processes if they were started."""
+    if get_chunking_pool.cache_info().currsize:
+        get_chunking_pool().shutdown()
+        get_chunking_pool.cache_clear()
+
+def chunk_documents(
+    texts: List[str],
+    mode: str = CHUNK_MODE_CHARS,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    tokenizer: Optional[Tokenizer] = None,
+    executor: Optional[Executor] = None,
+    min_parallel_chars: int = PARALLEL_CHUNKING_MIN_CHARS
+) -> List[List[Span]]:
+    """
+    Chunk many documents, spreading the work across processes.
+
+    Work goes to executor, else to the shared pool (get_chunking_pool)
+    when KB_CHUNKING_WORKERS is set. Small batches (a single document, or
+    fewer than min_parallel_chars characters in total) are chunked inline
+    because process overhead would dominate.
+
+    Args:
+        texts: Documents to chunk
+        mode: Chunking mode (see iter_document_spans)
+        chunk_size: Chunk size in the mode's unit
+        chunk_overlap: Overlap in the mode's unit
+        tokenizer: Tokenizer for "tokens" mode (must be picklable)
+        executor: Executor to submit to instead of the shared pool
+        min_parallel_chars: Minimum total characters before going parallel
+
+    Returns:
+        One span list per input document, in input order
+    """
+    worker = partial(
+        _document_spans_list,
+        mode=mode,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        tokenizer=tokenizer
+    )
+    # Validate options up front rather than inside a worker process
+    worker("")
+
+    if executor is None and settings.KB_CHUNKING_WORKERS > 0:
+        executor = get_chunking_pool()
+    total_chars = sum(len(text or "") for text in texts)
+    if executor is None or len(texts) < 2 or total_chars < min_parallel_chars:
+        return [worker(text) for text in texts]
 
+    workers = settings.KB_CHUNKING_WORKERS or os.cpu_count() or 1
+    # Several documents per task keeps IPC round trips low for FAQ-sized docs
+    # (thread pools ignore chunksize)
+    tasks_per_worker = max(1, len(texts) // (workers * 4))
+    return list(executor.map(worker, texts, chunksize=tasks_per_worker))
@@ -2,6 +2,13 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
 
+# Vector sizes of the schema (embedding columns of kb_chunks and embeddings,
+# and kb_chunks.embedding_reduced). They are fixed by the migrations rather
+# than configured: another embedding model needs a migration resizing the
+# columns and a re-ingest.
+EMBEDDING_DIMENSION = 384
+KB_PCA_DIMENSION = 128
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
@@ -15,6 +22,114 @@ class Settings(BaseSettings):
     LLM_PROVIDER: str = "mock"
     OPENAI_API_KEY: Optional[str] = None
     
+    # Embeddings provider: "deterministic" (SHA-256, no similarity), "hashing"
+    # (n-gram feature hashing) or "fake" (deterministic with simulated latency)
+    EMBEDDINGS_PROVIDER: str = "deterministic"
+    EMBEDDINGS_FAKE_LATENCY_SECONDS: float = 0.05
+    
+    # Worker processes running the provider (0 = run in the API process)
+    EMBEDDINGS_PROCESS_WORKERS: int = 0
+    
+    # Worker processes shared by large multi-document chunking batches, e.g.
+    # bulk ingestion (0 = chunk in the calling process)
+    KB_CHUNKING_WORKERS: int = 0
+    
+    # Async embedding calls: concurrent batches, texts per call, per-call timeout
+    EMBEDDINGS_MAX_CONCURRENCY: int = 4
+    EMBEDDINGS_MAX_BATCH_SIZE: int = 256
+    EMBEDDINGS_TIMEOUT_SECONDS: float = 30.0
+    
+    # Coalesce concurrent async embedding calls (window 0 disables; worth
+    # enabling in front of remote providers)
+    EMBEDDINGS_BATCH_WINDOW_MS: float = 0.0
+    EMBEDDINGS_BATCH_MAX_SIZE: int = 32
+    
+    # Embeddings cache (0 disables; TTL None keeps entries until evicted)
+    EMBEDDINGS_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    EMBEDDINGS_CACHE_TTL_SECONDS: Optional[float] = None
+    
+    # Persistent embeddings cache shared by workers (None disables)
+    EMBEDDINGS_DISK_CACHE_DIR: Optional[str] = None
+    EMBEDDINGS_DISK_CACHE_MAX_ROWS: Optional[int] = None
+    
+    # KB search candidate index: "full" (float32), "halfvec", "bit" or
+    # "reduced" (tenant PCA projection, see KB_PCA_*); the compact modes
+    # over-fetch top_k * overfetch candidates (None = per-mode default) and
+    # rescore them at full precision. Tenants can override via
+    # features["kb_search"].
+    KB_VECTOR_STORAGE: str = "full"
+    KB_RESCORE_OVERFETCH: Optional[int] = None
+    
+    # Whether kb_chunks has the halfvec / bit columns behind the "halfvec" and
+    # "bit" storage modes (needs pgvector >= 0.7). Read by the
+    # kb_chunk_quantized migration, so set it before migrating; without it
+    # those modes are rejected.
+    KB_QUANTIZED_STORAGE: bool = False
+    
+    # Default KB search mode: "vector", "lexical" (full-text) or "hybrid"
+    # (both, fused by reciprocal rank); requests and features["kb_search"]
+    # can override it. The text search configuration is fixed per
+    # deployment (the chunk search_vector trigger is built with it).
+    KB_SEARCH_MODE: str = "vector"
+    KB_TEXT_SEARCH_CONFIG: str = "english"
+    
+    # Longest NDJSON line (one document) accepted by POST /kb/documents:bulk
+    KB_BULK_MAX_LINE_BYTES: int = 16 * 1024 * 1024
+    
+    # Queries accepted by one POST /kb/search:batch request
+    KB_SEARCH_BATCH_MAX_QUERIES: int = 16
+    
+    # ANN index built on the embedding columns of kb_chunks and embeddings
+    # by the kb_vector_index migration: "ivfflat" or "hnsw" (changing it
+    # means re-running that migration). ivfflat lists are sized from the
+    # row count at build time (rows / 1000, at least 10) unless
+    # KB_IVFFLAT_LISTS is set; HNSW takes its graph degree and build
+    # candidate list.
+    KB_VECTOR_INDEX: str = "ivfflat"
+    KB_IVFFLAT_LISTS: Optional[int] = None
+    KB_HNSW_M: int = 16
+    KB_HNSW_EF_CONSTRUCTION: int = 64
+    
+    # Default search effort per query (ivfflat.probes / hnsw.ef_search; None
+    # = pgvector's defaults, 1 / 40). Higher finds more of the
+    # true neighbours but reads more of the index; requests and
+    # features["kb_search"] can override. ef_search is always raised to the
+    # number of candidates a query needs.
+    KB_IVFFLAT_PROBES: Optional[int] = None
+    KB_HNSW_EF_SEARCH: Optional[int] = None
+    
+    # ANN search effort tuning, every interval (0 = off, the default): each
+    # tenant's recent vector search queries (up to the sample size, kept in
+    # the API process) are replayed against exact results of the same
+    # storage mode and the cheapest probes / ef_search reaching the recall
+    # target is stored in features["kb_search"]; nothing is stored when no
+    # candidate reaches it (tenants setting their own can opt out with
+    # "autotune": false)
+    KB_ANN_TUNE_INTERVAL_SECONDS: float = 0.0
+    KB_ANN_TUNE_RECALL_TARGET: float = 0.95
+    KB_ANN_TUNE_SAMPLE_SIZE: int = 100
+    KB_ANN_TUNE_MIN_QUERIES: int = 20
+    
+    # Embeddings sampled when fitting a per-tenant PCA projection ("reduced"
+    # storage, KB_PCA_DIMENSION components)
+    KB_PCA_SAMPLE_SIZE: int = 20000
+    
+    # Batches queued between the chunk, embed and write stages of async
+    # ingestion (bounds the vectors held in memory per document)
+    KB_INGEST_PIPELINE_DEPTH: int = 2
+    
+    # Background ingestion workers started with the API (0 = none, the
+    # default: run `python -m app.services.kb_ingest_worker` separately,
+    # which starts max(1, KB_INGEST_WORKERS)), idle queue poll interval,
+    # attempts before a job is FAILED, retry backoff (doubled per attempt)
+    # and heartbeat age after which a RUNNING job is treated as abandoned
+    # and reclaimed
+    KB_INGEST_WORKERS: int = 0
+    KB_INGEST_POLL_SECONDS: float = 1.0
+    KB_INGEST_MAX_ATTEMPTS: int = 3
+    KB_INGEST_RETRY_BACKOFF_SECONDS: float = 5.0
+    KB_INGEST_STALE_AFTER_SECONDS: float = 300.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
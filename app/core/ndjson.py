@@ -0,0 +1,83 @@
+"""Incremental NDJSON (newline-delimited JSON) parsing."""
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Optional, Tuple
+
+# (1-based line number, parsed value or None, error message or None)
+NDJSONLine = Tuple[int, Any, Optional[str]]
+
+# Longest line buffered by default; longer lines are reported and skipped
+DEFAULT_MAX_LINE_BYTES = 16 * 1024 * 1024
+
+def parse_ndjson_line(line_number: int, line: bytes) -> Optional[NDJSONLine]:
+    """
+    Parse one NDJSON line.
+
+    Returns:
+        (line_number, value, None), (line_number, None, error), or None
+        for blank lines
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return line_number, json.loads(line), None
+    except ValueError as e:  # JSONDecodeError and invalid UTF-8
+        return line_number, None, f"Invalid JSON: {str(e)}"
+
+async def aiter_ndjson(
+    chunks: AsyncIterable[bytes],
+    max_line_bytes: int = DEFAULT_MAX_LINE_BYTES
+) -> AsyncIterator[NDJSONLine]:
+    """
+    Parse NDJSON from a stream of byte chunks as the lines arrive.
+
+    Chunks may split lines anywhere; only the current partial line is
+    buffered, up to max_line_bytes. Blank lines are skipped (but counted),
+    and lines that are not valid JSON or are too long are reported with an
+    error instead of ending the stream (a too-long line is discarded as it
+    streams in, never buffered whole).
+
+    Args:
+        chunks: Body chunks, e.g. Starlette's request.stream()
+        max_line_bytes: Longest line accepted
+
+    Yields:
+        (line number, parsed value, error message) per non-blank line
+    """
+    too_long = f"Line exceeds {max_line_bytes} bytes"
+    pending = bytearray()
+    line_number = 0
+    # The current line was already reported as too long; drop it up to its newline
+    skipping = False
+    async for chunk in chunks:
+        # Only the new bytes can contain the next newline
+        scan_from = len(pending)
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find(b"\n", scan_from)
+            if end < 0:
+                break
+            line_number += 1
+            if skipping:
+                skipping = False
+            elif end - start > max_line_bytes:
+                yield line_number, None, too_long
+            else:
+                parsed = parse_ndjson_line(line_number, bytes(pending[start:end]))
+                if parsed is not None:
+                    yield parsed
+            start = scan_from = end + 1
+        del pending[:start]
+        if len(pending) > max_line_bytes:
+            if not skipping:
+                yield line_number + 1, None, too_long
+                skipping = True
+            pending.clear()
+
+    if skipping:
+        return
+    if pending.strip():
+        parsed = parse_ndjson_line(line_number + 1, bytes(pending))
+        if parsed is not None:
+            yield parsed
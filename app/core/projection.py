@@ -0,0 +1,138 @@
+"""PCA dimension reduction for stored embeddings."""
+from typing import Optional, Tuple
+import numpy as np
+
+class PCAProjection:
+    """
+    Linear projection of embeddings onto their top principal components.
+
+    Reduced vectors are (x - mean) @ components.T, L2-normalized so cosine
+    distance in the reduced space stays comparable across rows. The
+    projection is plain float32 data (mean and component matrix) and
+    round-trips through bytes for storage.
+    """
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, explained_variance: float = 0.0):
+        """
+        Initialize projection.
+
+        Args:
+            mean: Source-space mean, shape (source_dimension,)
+            components: Orthonormal rows, shape (dimension, source_dimension)
+            explained_variance: Fraction of sample variance the components keep
+        """
+        mean = np.ascontiguousarray(mean, dtype=np.float32)
+        components = np.ascontiguousarray(components, dtype=np.float32)
+        if components.ndim != 2 or mean.shape != (components.shape[1],):
+            raise ValueError(
+                f"Mean of shape {mean.shape} does not match components of shape {components.shape}"
+            )
+        self.mean = mean
+        self.components = components
+        self.explained_variance = float(explained_variance)
+
+    @property
+    def source_dimension(self) -> int:
+        """Dimension of the vectors the projection accepts."""
+        return self.components.shape[1]
+
+    @property
+    def dimension(self) -> int:
+        """Dimension of the reduced vectors."""
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, matrix: np.ndarray, dimension: int) -> "PCAProjection":
+        """
+        Fit a projection to a sample of embeddings.
+
+        Components are the top eigenvectors of the sample covariance (a
+        source_dimension-sized eigenproblem, so cost is dominated by one
+        pass over the sample), with signs fixed so refits on the same data
+        give the same vectors.
+
+        Args:
+            matrix: Sample embeddings, shape (n, source_dimension)
+            dimension: Number of components to keep
+
+        Returns:
+            Fitted projection
+
+        Raises:
+            ValueError: If dimension is out of range or the sample has no
+                more rows than components
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.ndim != 2:
+            raise ValueError("Sample must be a 2-D matrix")
+        n_samples, source_dimension = matrix.shape
+        if not 0 < dimension <= source_dimension:
+            raise ValueError(f"dimension must be between 1 and {source_dimension}")
+        if n_samples <= dimension:
+            raise ValueError(
+                f"Need more than {dimension} sample embeddings to fit {dimension} components, got {n_samples}"
+            )
+
+        mean = matrix.mean(axis=0)
+        centered = matrix - mean
+        covariance = centered.T @ centered / (n_samples - 1)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+
+        # eigh returns ascending eigenvalues; keep the largest
+        order = np.argsort(eigenvalues)[::-1][:dimension]
+        components = eigenvectors[:, order].T
+        peaks = np.abs(components).argmax(axis=1)
+        components *= np.sign(components[np.arange(dimension), peaks])[:, None]
+
+        total = eigenvalues.clip(min=0).sum()
+        kept = eigenvalues[order].clip(min=0).sum()
+        return cls(mean, components, kept / total if total > 0 else 0.0)
+
+    def transform(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Project embeddings into the reduced space.
+
+        Args:
+            matrix: Embeddings, shape (n, source_dimension)
+
+        Returns:
+            C-contiguous float32 array of shape (n, dimension) with unit
+            rows (rows projecting onto the origin stay zero)
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.source_dimension:
+            raise ValueError(
+                f"Expected embeddings of dimension {self.source_dimension}, got shape {matrix.shape}"
+            )
+        reduced = (matrix - self.mean) @ self.components.T
+        norms = np.sqrt(np.einsum("ij,ij->i", reduced, reduced))
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(reduced / norms[:, None], dtype=np.float32)
+
+    def to_bytes(self) -> Tuple[bytes, bytes]:
+        """Return (mean bytes, components bytes) as little-endian float32."""
+        return (
+            self.mean.astype("<f4", copy=False).tobytes(),
+            self.components.astype("<f4", copy=False).tobytes()
+        )
+
+    @classmethod
+    def from_bytes(
+        cls,
+        mean: bytes,
+        components: bytes,
+        dimension: int,
+        explained_variance: Optional[float] = None
+    ) -> "PCAProjection":
+        """
+        Rebuild a projection from to_bytes() output.
+
+        Args:
+            mean: Mean bytes
+            components: Component matrix bytes (row-major)
+            dimension: Number of components
+            explained_variance: Stored explained variance fraction
+        """
+        mean_array = np.frombuffer(mean, dtype="<f4")
+        component_array = np.frombuffer(components, dtype="<f4").reshape(dimension, len(mean_array))
+        return cls(mean_array, component_array, explained_variance or 0.0)
@@ -0,0 +1,56 @@
+"""Local tokenizers used for token-budget chunking."""
+import re
+from abc import ABC, abstractmethod
+from array import array
+from typing import Tuple
+
+# Words (including Devanagari vowel signs, so hi-IN words are not split at
+# every matra) or single punctuation characters such as '.' and the danda
+DEFAULT_TOKEN_PATTERN = r"[\w\u0900-\u0963\u0966-\u097F]+|[^\w\s]"
+
+class Tokenizer(ABC):
+    """Abstract tokenizer interface."""
+
+    @abstractmethod
+    def token_offsets(self, text: str) -> Tuple[array, array]:
+        """
+        Tokenize text into character offsets.
+
+        Args:
+            text: Text to tokenize
+
+        Returns:
+            (starts, ends) compact arrays of token offsets, one entry per token
+        """
+        pass
+
+    def count_tokens(self, text: str) -> int:
+        """Return the number of tokens in text."""
+        starts, _ = self.token_offsets(text)
+        return len(starts)
+
+class RegexTokenizer(Tokenizer):
+    """
+    Tokenizer driven by a single regular expression.
+
+    Each regex match is one token. Runs locally with no model files,
+    which keeps chunking deterministic and dependency-free.
+    """
+
+    def __init__(self, pattern: str = DEFAULT_TOKEN_PATTERN):
+        """
+        Initialize tokenizer.
+
+        Args:
+            pattern: Regular expression matching a single token
+        """
+        self._pattern = re.compile(pattern)
+
+    def token_offsets(self, text: str) -> Tuple[array, array]:
+        """Tokenize text in one pass into unsigned 32-bit offset arrays."""
+        starts = array('I')
+        ends = array('I')
+        for match in self._pattern.finditer(text):
+            starts.append(match.start())
+            ends.append(match.end())
+        return starts, ends
@@ -7,6 +7,8 @@ from app.db.models.turn import Turn
 from app.db.models.event import Event
 from app.db.models.kb_document import KBDocument
 from app.db.models.kb_chunk import KBChunk
+from app.db.models.kb_projection import KBProjection
+from app.db.models.kb_ingest_job import KBIngestJob
 from app.db.models.embedding import Embedding
 
 __all__ = [
@@ -18,6 +20,8 @@ __all__ = [
     "Event",
     "KBDocument",
     "KBChunk",
+    "KBProjection",
+    "KBIngestJob",
     "Embedding",
 ]
 
@@ -3,8 +3,9 @@ import uuid
 from datetime import datetime
 from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
-from pgvector.sqlalchemy import Vector
 from app.db.base import Base
+from app.db.types import Float32Vector
+from app.core.config import EMBEDDING_DIMENSION
 
 class Embedding(Base):
     """Generic embedding storage for segments/summaries."""
@@ -13,7 +14,7 @@ class Embedding(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     entity_type = Column(String, nullable=False)  # "segment", "summary", "turn"
     entity_id = Column(UUID(as_uuid=True), nullable=False)  # Reference to entity (no FK for flexibility)
-    embedding = Column(Vector(384))  # 384-dim vector
+    embedding = Column(Float32Vector(EMBEDDING_DIMENSION))
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     __table_args__ = (
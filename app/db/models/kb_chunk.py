@@ -1,11 +1,14 @@
 """Knowledge Base Chunk model."""
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index
-from sqlalchemy.dialects.postgresql import UUID
-from pgvector.sqlalchemy import Vector
-from sqlalchemy.orm import relationship
+from typing import Optional
+from sqlalchemy import Column, Computed, String, DateTime, ForeignKey, Integer, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
+from pgvector.sqlalchemy import BIT, HALFVEC
 from app.db.base import Base
+from app.db.types import Float32Vector
+from app.core.config import EMBEDDING_DIMENSION, KB_PCA_DIMENSION
 
 class KBChunk(Base):
     """Knowledge Base chunk model with embedding."""
@@ -14,14 +17,51 @@ class KBChunk(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     document_id = Column(UUID(as_uuid=True), ForeignKey("kb_documents.id"), nullable=False)
     chunk_index = Column(Integer, nullable=False)  # Order within document
-    text = Column(String, nullable=False)
-    embedding = Column(Vector(384))  # Using 384-dim vectors (sentence-transformers default)
+    text = Column(String, nullable=True)  # Legacy copy; new chunks are resolved from spans
+    start_offset = Column(Integer, nullable=True)  # Span start within document content
+    end_offset = Column(Integer, nullable=True)  # Span end (exclusive) within document content
+    content_hash = Column(String(64), nullable=True)  # SHA-256 hex of chunk text
+    embedding = Column(Float32Vector(EMBEDDING_DIMENSION))  # Using 384-dim vectors (sentence-transformers default)
+    embedding_model = Column(String(255), nullable=True)  # Provider model_id that computed embedding
+    # Quantized copies maintained by Postgres for compact-index search; never
+    # loaded by default. The kb_chunk_quantized migration only adds them with
+    # KB_QUANTIZED_STORAGE, so searches check they exist before using them.
+    embedding_half = deferred(Column(
+        HALFVEC(EMBEDDING_DIMENSION),
+        Computed(f"CAST(embedding AS halfvec({EMBEDDING_DIMENSION}))", persisted=True)
+    ))
+    embedding_bit = deferred(Column(
+        BIT(EMBEDDING_DIMENSION),
+        Computed(f"CAST(binary_quantize(embedding) AS bit({EMBEDDING_DIMENSION}))", persisted=True)
+    ))
+    # Full-text index of the chunk text, maintained by a trigger (the text
+    # lives in the parent document); never loaded by default
+    search_vector = deferred(Column(TSVECTOR))
+    # Tenant PCA projection of embedding (NULL until the tenant fits one)
+    embedding_reduced = deferred(Column(Float32Vector(KB_PCA_DIMENSION)))
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     document = relationship("KBDocument", backref="chunks")
     
     __table_args__ = (
         Index("idx_kb_chunks_doc", "document_id", "chunk_index"),
+        Index("idx_kb_chunks_content_hash", "content_hash"),
         # Note: Vector index created in migration, not here (Alembic handles it)
     )
-
+    
+    def resolve_text(self, content: Optional[str] = None) -> str:
+        """
+        Return the chunk text.
+        
+        Chunks store (start_offset, end_offset) spans into the parent
+        document's content rather than a copy of the text; rows written
+        before spans existed still carry their own text.
+        
+        Args:
+            content: Parent document content, if already loaded
+        """
+        if self.text is not None:
+            return self.text
+        if content is None:
+            content = self.document.content or ""
+        return content[self.start_offset:self.end_offset]
@@ -0,0 +1,34 @@
+"""Knowledge Base background ingestion job model."""
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+class KBIngestJob(Base):
+    """Queued ingestion of a PENDING KB document, processed by background workers."""
+    __tablename__ = "kb_ingest_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("kb_documents.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String, default="QUEUED", nullable=False)  # QUEUED, RUNNING, SUCCEEDED, FAILED
+    attempts = Column(Integer, default=0, nullable=False)
+    chunks_total = Column(Integer, nullable=True)  # Known once the worker has chunked the document
+    chunks_processed = Column(Integer, default=0, nullable=False)  # Chunks embedded and stored so far
+    chunks_embedded = Column(Integer, default=0, nullable=False)  # Chunks sent to the embeddings provider
+    error = Column(String, nullable=True)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # Earliest (re)try time
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # Last progress from the running worker
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        # Queue scan: only unfinished jobs are indexed
+        Index(
+            "idx_kb_ingest_jobs_queue", "run_after",
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')")
+        ),
+        Index("idx_kb_ingest_jobs_document", "document_id"),
+    )
@@ -0,0 +1,30 @@
+"""Knowledge Base embedding projection model."""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, LargeBinary
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import deferred
+from app.db.base import Base
+from app.core.projection import PCAProjection
+
+class KBProjection(Base):
+    """Per-tenant PCA projection used for reduced-dimension KB search."""
+    __tablename__ = "kb_projections"
+    
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), primary_key=True)
+    source_dimension = Column(Integer, nullable=False)
+    dimension = Column(Integer, nullable=False)
+    # Projection data (float32 bytes), loaded only when the projection is rebuilt
+    mean = deferred(Column(LargeBinary, nullable=False))  # source_dimension values
+    components = deferred(Column(LargeBinary, nullable=False))  # dimension x source_dimension, row-major
+    explained_variance = Column(Float, nullable=False)  # Fraction of sample variance kept
+    sample_size = Column(Integer, nullable=False)  # Embeddings the projection was fitted on
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_projection(self) -> PCAProjection:
+        """Rebuild the stored projection."""
+        return PCAProjection.from_bytes(
+            self.mean,
+            self.components,
+            self.dimension,
+            self.explained_variance
+        )
@@ -1,7 +1,10 @@
 """Database session management."""
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
 
 engine = create_engine(
     settings.DATABASE_URL,
@@ -10,6 +13,19 @@ engine = create_engine(
     connect_args={"connect_timeout": 10},
 )
 
+@event.listens_for(engine, "connect")
+def _register_vector_types(dbapi_connection, connection_record):
+    """Register pgvector binary adapters on psycopg 3 connections."""
+    if engine.dialect.driver != "psycopg":
+        return
+    from pgvector.psycopg import register_vector
+    try:
+        register_vector(dbapi_connection)
+    except Exception as e:
+        # The vector extension may not exist yet (e.g. before migrations)
+        logger.warning(f"pgvector types not registered: {e}")
+    dbapi_connection.rollback()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
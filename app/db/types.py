@@ -0,0 +1,45 @@
+"""Custom SQLAlchemy column types."""
+import numpy as np
+from pgvector.sqlalchemy import Vector
+
+class Float32Vector(Vector):
+    """
+    pgvector column that exchanges float32 NumPy arrays.
+
+    On psycopg 3 connections the pgvector adapters registered in
+    app.db.session send and receive arrays in pgvector's binary format,
+    so vectors never pass through per-element Python floats. Other
+    drivers fall back to pgvector's text format.
+    """
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        if dialect.driver != "psycopg":
+            return super().bind_processor(dialect)
+
+        def process(value):
+            if value is None:
+                return None
+            return np.ascontiguousarray(value, dtype=np.float32)
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None:
+                return None
+            if isinstance(value, str):
+                # Text format: "[0.1,0.2,...]"
+                return np.array(value[1:-1].split(","), dtype=np.float32)
+            if isinstance(value, np.ndarray):
+                return value.astype(np.float32, copy=False)
+            # pgvector.Vector from the binary loader
+            return value.to_numpy()
+        return process
+
+    def compare_values(self, x, y):
+        # Arrays compare elementwise; the ORM needs a single bool
+        if isinstance(x, np.ndarray) or isinstance(y, np.ndarray):
+            if x is None or y is None:
+                return x is y
+            return np.array_equal(x, y)
+        return x == y
@@ -1,6 +1,7 @@
 """
 Main FastAPI application entry point.
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -9,17 +10,53 @@ from app.core.middleware import RequestIDMiddleware
 from app.core.errors import (
     APIError, handle_api_error, handle_http_exception, handle_value_error
 )
-from app.core.logging import setup_logging
+from app.core.logging import get_logger, setup_logging
+from app.db.session import SessionLocal
+from app.core.chunking import shutdown_chunking_pool
+from app.providers.embeddings.factory import shutdown_embeddings_provider
+from app.services.kb_service import KBService
+from app.services.kb_ingest_worker import start_kb_ingest_workers, stop_kb_ingest_workers
+from app.services.kb_ann_tuner import start_kb_ann_tuner, stop_kb_ann_tuner
+from sqlalchemy.exc import SQLAlchemyError
 import sys
 
 # Setup logging
 setup_logging()
+logger = get_logger(__name__)
+
+def check_embedding_dimension():
+    """Refuse to start when the embeddings provider does not fit the vector columns."""
+    db = SessionLocal()
+    try:
+        KBService(db).check_embedding_dimension()
+    except SQLAlchemyError as e:
+        # Database not reachable yet; requests will report it
+        logger.warning(f"Could not check embedding dimensions: {e}")
+    finally:
+        db.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start KB background work on startup and stop it on shutdown."""
+    check_embedding_dimension()
+    start_kb_ingest_workers()
+    start_kb_ann_tuner()
+    try:
+        yield
+    finally:
+        # Ingest workers stop before the embeddings provider and chunking
+        # processes they use
+        await stop_kb_ingest_workers()
+        await stop_kb_ann_tuner()
+        shutdown_embeddings_provider()
+        shutdown_chunking_pool()
 
 # Create FastAPI app
 app = FastAPI(
     title="Voice Intelligence Platform",
     version="0.1.0",
-    description="Real-Time Voice Intelligence for E-commerce Support"
+    description="Real-Time Voice Intelligence for E-commerce Support",
+    lifespan=lifespan
 )
 
 # CORS middleware (for Streamlit local dev and deployed UI)
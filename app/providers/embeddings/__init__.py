@@ -1,2 +1,24 @@
 """Embeddings providers package."""
+from app.providers.embeddings.base import EmbeddingsProvider
+from app.providers.embeddings.batching import BatchingEmbeddingsProvider
+from app.providers.embeddings.cached import CachedEmbeddingsProvider
+from app.providers.embeddings.deterministic import DeterministicEmbeddingsProvider
+from app.providers.embeddings.disk_cache import DiskCachedEmbeddingsProvider, DiskEmbeddingStore
+from app.providers.embeddings.fake import FakeEmbeddingsProvider
+from app.providers.embeddings.hashing import HashingEmbeddingsProvider
+from app.providers.embeddings.process_pool import ProcessPoolEmbeddingsProvider
+from app.providers.embeddings.factory import get_embeddings_provider, shutdown_embeddings_provider
 
+__all__ = [
+    "EmbeddingsProvider",
+    "BatchingEmbeddingsProvider",
+    "CachedEmbeddingsProvider",
+    "DeterministicEmbeddingsProvider",
+    "DiskCachedEmbeddingsProvider",
+    "DiskEmbeddingStore",
+    "FakeEmbeddingsProvider",
+    "HashingEmbeddingsProvider",
+    "ProcessPoolEmbeddingsProvider",
+    "get_embeddings_provider",
+    "shutdown_embeddings_provider",
+]
@@ -1,9 +1,39 @@
 """Embeddings provider interface."""
+import asyncio
+import weakref
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+# Defaults for the async interface (overridable per instance)
+DEFAULT_ASYNC_MAX_CONCURRENCY = 4
+DEFAULT_ASYNC_MAX_BATCH_SIZE = 256
+DEFAULT_ASYNC_TIMEOUT_SECONDS = 30.0
 
 class EmbeddingsProvider(ABC):
-    """Abstract embeddings provider interface."""
+    """
+    Abstract embeddings provider interface.
+    
+    Async callers use aembed_texts / aembed_query, which run the sync
+    methods in worker threads. Calls are split into batches of at most
+    async_max_batch_size texts, at most async_max_concurrency batches run
+    at once per event loop, and each call fails with TimeoutError after
+    async_timeout_seconds (None = no limit).
+    """
+    
+    async_max_concurrency: int = DEFAULT_ASYNC_MAX_CONCURRENCY
+    async_max_batch_size: int = DEFAULT_ASYNC_MAX_BATCH_SIZE
+    async_timeout_seconds: Optional[float] = DEFAULT_ASYNC_TIMEOUT_SECONDS
+    
+    @property
+    def name(self) -> str:
+        """Return provider name (used in cache keys and metrics)."""
+        return type(self).__name__
+    
+    @property
+    def model_id(self) -> str:
+        """Return the identity of this provider's vectors (stored with chunk embeddings)."""
+        return f"{self.name}-{self.dimension}"
     
     @property
     @abstractmethod
@@ -36,4 +66,160 @@ class EmbeddingsProvider(ABC):
             Embedding vector (list of floats)
         """
         pass
-
+    
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed multiple texts into a contiguous float32 matrix.
+        
+        The default adapts embed_texts; providers that compute vectors
+        with NumPy should override this to skip Python float lists.
+        
+        Args:
+            texts: List of text strings to embed
+            
+        Returns:
+            C-contiguous float32 array of shape (len(texts), dimension)
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.ascontiguousarray(self.embed_texts(texts), dtype=np.float32)
+    
+    def embed_query_array(self, text: str) -> np.ndarray:
+        """
+        Embed a single query text into a float32 vector.
+        
+        Args:
+            text: Query text to embed
+            
+        Returns:
+            Contiguous float32 array of shape (dimension,)
+        """
+        return self.embed_texts_array([text])[0]
+    
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts being ingested (document chunks, not queries).
+        
+        Returns the same vectors as embed_texts_array. Wrappers that cache
+        queries pass these calls straight through, so ingestion does not
+        evict the queries they keep.
+        
+        Args:
+            texts: List of text strings to embed
+            
+        Returns:
+            C-contiguous float32 array of shape (len(texts), dimension)
+        """
+        return self.embed_texts_array(texts)
+    
+    def configure_async(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        timeout_seconds: Optional[float] = None
+    ) -> "EmbeddingsProvider":
+        """
+        Override async limits for this instance.
+        
+        Args:
+            max_concurrency: Batches embedded at once per event loop
+            max_batch_size: Texts per provider call
+            timeout_seconds: Per-call timeout (<= 0 disables it)
+        
+        Returns:
+            self, for chaining
+        """
+        if max_concurrency is not None:
+            if max_concurrency <= 0:
+                raise ValueError("max_concurrency must be positive")
+            self.async_max_concurrency = max_concurrency
+            # Limits are rebuilt on next use
+            self.__dict__.pop("_async_limits", None)
+        if max_batch_size is not None:
+            if max_batch_size <= 0:
+                raise ValueError("max_batch_size must be positive")
+            self.async_max_batch_size = max_batch_size
+        if timeout_seconds is not None:
+            self.async_timeout_seconds = timeout_seconds if timeout_seconds > 0 else None
+        return self
+    
+    def _async_limit(self) -> asyncio.Semaphore:
+        """Return this provider's concurrency limit for the running loop."""
+        limits = self.__dict__.get("_async_limits")
+        if limits is None:
+            limits = self.__dict__["_async_limits"] = weakref.WeakKeyDictionary()
+        loop = asyncio.get_running_loop()
+        limit = limits.get(loop)
+        if limit is None:
+            limit = limits[loop] = asyncio.Semaphore(self.async_max_concurrency)
+        return limit
+    
+    async def _aembed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch in a worker thread under the concurrency limit."""
+        limit = self._async_limit()
+        await limit.acquire()
+        task = asyncio.ensure_future(asyncio.to_thread(self.embed_texts_array, texts))
+        # The slot is held until the thread finishes, even if the caller
+        # times out, so abandoned calls still count against the limit
+        task.add_done_callback(lambda _: limit.release())
+        return await asyncio.shield(task)
+    
+    async def _aembed_batches(self, texts: List[str]) -> np.ndarray:
+        size = self.async_max_batch_size
+        if len(texts) <= size:
+            return await self._aembed_batch(texts)
+        parts = await asyncio.gather(*[
+            self._aembed_batch(texts[start:start + size])
+            for start in range(0, len(texts), size)
+        ])
+        return np.concatenate(parts)
+    
+    async def aembed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed multiple texts without blocking the event loop.
+        
+        Args:
+            texts: List of text strings to embed
+            
+        Returns:
+            C-contiguous float32 array of shape (len(texts), dimension)
+        
+        Raises:
+            TimeoutError: If the call exceeds async_timeout_seconds
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        timeout = self.async_timeout_seconds
+        try:
+            return await asyncio.wait_for(self._aembed_batches(texts), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Embedding {len(texts)} texts timed out after {timeout}s")
+    
+    async def aembed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of embed_texts (values carry float32 precision)."""
+        return (await self.aembed_texts_array(texts)).tolist()
+    
+    async def aembed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """Async variant of embed_documents_array."""
+        return await self.aembed_texts_array(texts)
+    
+    async def aembed_query_array(self, text: str) -> np.ndarray:
+        """Async variant of embed_query_array."""
+        return (await self.aembed_texts_array([text]))[0]
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async variant of embed_query."""
+        return (await self.aembed_query_array(text)).tolist()
+    
+    def close(self) -> None:
+        """Release provider resources (worker processes, connections)."""
+        pass
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Return provider metrics for scraping.
+        
+        Wrapper providers (caches, batchers) report their own counters
+        alongside those of the provider they wrap.
+        """
+        return {"provider": self.name, "dimension": self.dimension}
@@ -0,0 +1,230 @@
+"""Micro-batching wrapper that coalesces concurrent async embedding calls."""
+import asyncio
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+from app.providers.embeddings.base import EmbeddingsProvider
+
+DEFAULT_MAX_WAIT_MS = 2.0
+DEFAULT_MAX_BATCH_SIZE = 32
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+# Recent queue delays kept for percentiles
+DELAY_SAMPLE_SIZE = 1024
+
+class _PendingBatch:
+    """Calls waiting for the next dispatch on one event loop."""
+
+    def __init__(self):
+        self.items: List[Tuple[List[str], asyncio.Future, float]] = []
+        self.size = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class BatchingEmbeddingsProvider(EmbeddingsProvider):
+    """
+    Embeddings provider that merges concurrent async calls into one batch.
+
+    Async calls are queued until max_wait_ms has passed since the first
+    queued call or max_batch_size texts are waiting, then sent to the
+    wrapped provider as one aembed_texts_array call (identical texts are
+    embedded once) and each caller's future is resolved with its rows.
+    Calls already at max_batch_size skip the queue. Sync methods pass
+    straight through.
+
+    stats() reports the batch-size distribution and the queueing delay
+    added in front of the provider.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingsProvider,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        clock: Callable[[], float] = time.perf_counter
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            provider: Provider to wrap
+            max_wait_ms: Longest a call waits for others to join its batch
+            max_batch_size: Texts that trigger an immediate dispatch
+            clock: Time source for delay measurements
+        """
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be non-negative")
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive")
+        self.provider = provider
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+        self._clock = clock
+        self._pending: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _PendingBatch]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._tasks: Set[asyncio.Task] = set()
+
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.batches = 0
+        self.texts = 0
+        self._histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self._delays: deque = deque(maxlen=DELAY_SAMPLE_SIZE)
+        self._delay_total = 0.0
+        self._delay_max = 0.0
+
+    @property
+    def name(self) -> str:
+        """Return wrapped provider name (vectors are the provider's)."""
+        return self.provider.name
+
+    @property
+    def dimension(self) -> int:
+        """Return embedding dimension."""
+        return self.provider.dimension
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple texts (not batched)."""
+        return self.provider.embed_texts(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query (not batched)."""
+        return self.provider.embed_query(text)
+
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """Embed multiple texts into a float32 matrix (not batched)."""
+        return self.provider.embed_texts_array(texts)
+
+    async def aembed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts as part of the next coalesced batch.
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            C-contiguous float32 array of shape (len(texts), dimension)
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        if len(texts) >= self.max_batch_size:
+            self._record_batch(len(texts), calls=1, delays=[0.0])
+            return await self.provider.aembed_texts_array(texts)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.get(loop)
+        if pending is None:
+            pending = self._pending[loop] = _PendingBatch()
+        pending.items.append((texts, future, self._clock()))
+        pending.size += len(texts)
+
+        if pending.size >= self.max_batch_size:
+            self._flush(loop)
+        elif pending.timer is None:
+            pending.timer = loop.call_later(self.max_wait_ms / 1000.0, self._flush, loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Dispatch the loop's pending calls as one batch."""
+        pending = self._pending.pop(loop, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+        task = loop.create_task(self._dispatch(pending.items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, items: List[Tuple[List[str], asyncio.Future, float]]) -> None:
+        """Embed a coalesced batch and resolve each caller's future."""
+        # Callers that were cancelled while queued no longer need vectors
+        items = [item for item in items if not item[1].done()]
+        if not items:
+            return
+
+        rows: Dict[str, int] = {}
+        for texts, _, _ in items:
+            for text in texts:
+                rows.setdefault(text, len(rows))
+
+        started = self._clock()
+        self._record_batch(
+            len(rows),
+            calls=len(items),
+            delays=[started - enqueued_at for _, _, enqueued_at in items]
+        )
+
+        try:
+            matrix = await self.provider.aembed_texts_array(list(rows))
+        except Exception as e:
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for texts, future, _ in items:
+            if not future.done():
+                future.set_result(matrix[[rows[text] for text in texts]])
+
+    def close(self) -> None:
+        """Close the wrapped provider."""
+        self.provider.close()
+
+    def _record_batch(self, size: int, calls: int, delays: List[float]) -> None:
+        """Update batch-size and queue-delay statistics."""
+        bucket = next(
+            (i for i, bound in enumerate(BATCH_SIZE_BUCKETS) if size <= bound),
+            len(BATCH_SIZE_BUCKETS)
+        )
+        with self._stats_lock:
+            self.calls += calls
+            self.batches += 1
+            self.texts += size
+            self._histogram[bucket] += 1
+            self._delays.extend(delays)
+            self._delay_total += sum(delays)
+            self._delay_max = max(self._delay_max, max(delays))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return batching counters.
+
+        batch_size_histogram maps each bucket's upper bound ("+Inf" for the
+        last) to the number of batches whose size fell in it. Queue delays
+        are in milliseconds; percentiles cover the most recent calls.
+        """
+        with self._stats_lock:
+            labels = [str(bound) for bound in BATCH_SIZE_BUCKETS] + ["+Inf"]
+            recent = np.fromiter(self._delays, dtype=np.float64) * 1000.0
+            if recent.size:
+                p50, p95, p99 = np.percentile(recent, [50, 95, 99]).tolist()
+            else:
+                p50 = p95 = p99 = 0.0
+            return {
+                "max_wait_ms": self.max_wait_ms,
+                "max_batch_size": self.max_batch_size,
+                "calls": self.calls,
+                "batches": self.batches,
+                "texts": self.texts,
+                "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+                "batch_size_histogram": dict(zip(labels, self._histogram)),
+                "queue_delay_ms": {
+                    "mean": self._delay_total * 1000.0 / self.calls if self.calls else 0.0,
+                    "max": self._delay_max * 1000.0,
+                    "p50": p50,
+                    "p95": p95,
+                    "p99": p99
+                }
+            }
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return wrapped provider metrics plus batching counters."""
+        metrics = dict(self.provider.metrics())
+        metrics["batching"] = self.stats()
+        return metrics
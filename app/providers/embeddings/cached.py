@@ -0,0 +1,222 @@
+"""In-memory LRU cache wrapper for embeddings providers."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.providers.embeddings.base import EmbeddingsProvider
+
+# Approximate per-entry bookkeeping cost (key tuple, digest, array header, dict slot)
+ENTRY_OVERHEAD_BYTES = 256
+
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+CacheKey = Tuple[str, int, bytes]
+
+class CachedEmbeddingsProvider(EmbeddingsProvider):
+    """
+    Embeddings provider that caches another provider's vectors in memory.
+
+    Entries are keyed by (provider name, dimension, SHA-256 of the text) and
+    stored as read-only float32 rows. The cache is bounded by an approximate
+    byte budget and evicts least recently used entries first; an optional
+    TTL expires entries on lookup. Safe to share between threads.
+
+    List-returning methods are served from the float32 cache, so their
+    values carry float32 precision. Document embeddings (ingestion) bypass
+    the cache, so the budget holds queries only.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingsProvider,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            provider: Provider to wrap
+            max_bytes: Approximate memory budget for cached vectors
+            ttl_seconds: Entry lifetime (None = no expiry)
+            clock: Monotonic time source (injectable for tests)
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        self.provider = provider
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entry_bytes = provider.dimension * 4 + ENTRY_OVERHEAD_BYTES
+        self._entries: "OrderedDict[CacheKey, Tuple[np.ndarray, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def name(self) -> str:
+        """Return wrapped provider name (cached vectors are the provider's)."""
+        return self.provider.name
+
+    @property
+    def dimension(self) -> int:
+        """Return embedding dimension."""
+        return self.provider.dimension
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate bytes held by cached entries."""
+        return len(self._entries) * self._entry_bytes
+
+    def _key(self, text: str) -> CacheKey:
+        return (
+            self.provider.name,
+            self.provider.dimension,
+            hashlib.sha256(text.encode("utf-8")).digest()
+        )
+
+    def _get(self, key: CacheKey, now: float) -> Optional[np.ndarray]:
+        """Look up a key, dropping it if expired. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        vector, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return vector
+
+    def _put(self, key: CacheKey, vector: np.ndarray, now: float) -> None:
+        """Insert a vector and evict LRU entries over budget. Caller holds the lock."""
+        expires_at = now + self.ttl_seconds if self.ttl_seconds is not None else None
+        self._entries[key] = (vector, expires_at)
+        self._entries.move_to_end(key)
+        while self._entries and len(self._entries) * self._entry_bytes > self.max_bytes:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _lookup(self, texts: List[str]) -> Tuple[np.ndarray, Dict[CacheKey, List[int]]]:
+        """
+        Fill cached rows of the result matrix.
+
+        Returns:
+            (result matrix, missing key -> result rows); repeated texts
+            within the batch map to one missing key
+        """
+        result = np.empty((len(texts), self.dimension), dtype=np.float32)
+        keys = [self._key(text) for text in texts]
+        missing: Dict[CacheKey, List[int]] = {}
+
+        with self._lock:
+            now = self._clock()
+            for row, key in enumerate(keys):
+                if key in missing:
+                    missing[key].append(row)
+                    self.hits += 1
+                    continue
+                vector = self._get(key, now)
+                if vector is None:
+                    missing[key] = [row]
+                    self.misses += 1
+                else:
+                    result[row] = vector
+                    self.hits += 1
+        return result, missing
+
+    def _store(self, result: np.ndarray, missing: Dict[CacheKey, List[int]], vectors: np.ndarray) -> None:
+        """Cache freshly embedded vectors and copy them into the result."""
+        with self._lock:
+            now = self._clock()
+            for (key, rows), vector in zip(missing.items(), vectors):
+                stored = vector.copy()
+                stored.flags.writeable = False
+                self._put(key, stored, now)
+                result[rows] = stored
+
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, calling the wrapped provider only for cache misses.
+
+        Misses are embedded in one batch, and repeated texts within the batch
+        are embedded once.
+        """
+        result, missing = self._lookup(texts)
+        if missing:
+            # Embed outside the lock so slow providers do not serialize callers
+            texts_to_embed = [texts[rows[0]] for rows in missing.values()]
+            self._store(result, missing, self.provider.embed_texts_array(texts_to_embed))
+        return result
+
+    async def aembed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Async variant of embed_texts_array.
+
+        Hits are served on the event loop; misses go through the wrapped
+        provider's async interface and its limits.
+        """
+        result, missing = self._lookup(texts)
+        if missing:
+            texts_to_embed = [texts[rows[0]] for rows in missing.values()]
+            self._store(result, missing, await self.provider.aembed_texts_array(texts_to_embed))
+        return result
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed ingested texts with the wrapped provider, bypassing the cache.
+
+        Chunks are seldom embedded twice (stored vectors are reused by
+        content hash), so caching them would only evict repeated queries.
+        """
+        return self.provider.embed_documents_array(texts)
+
+    async def aembed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """Async variant of embed_documents_array (bypasses the cache)."""
+        return await self.provider.aembed_documents_array(texts)
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple texts through the cache."""
+        return self.embed_texts_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query through the cache."""
+        return self.embed_texts_array([text])[0].tolist()
+
+    def close(self) -> None:
+        """Close the wrapped provider."""
+        self.provider.close()
+
+    def clear(self) -> None:
+        """Drop all cached entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return wrapped provider metrics plus cache counters."""
+        metrics = dict(self.provider.metrics())
+        metrics["cache"] = self.stats()
+        return metrics
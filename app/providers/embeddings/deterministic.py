@@ -4,56 +4,84 @@ import numpy as np
 from typing import List
 from app.providers.embeddings.base import EmbeddingsProvider
 
+# SHA-256 digest size; vectors repeat the digest bytes cyclically
+_DIGEST_SIZE = 32
+
+# Byte value -> vector component in [-1, 1]
+_BYTE_VALUES = np.arange(256, dtype=np.float64) / 127.5 - 1.0
+
 class DeterministicEmbeddingsProvider(EmbeddingsProvider):
     """
     Deterministic embeddings provider for Phase 1.
-    
+
     Generates stable embeddings from text hash.
     Normalizes to unit vectors for cosine similarity.
     """
-    
+
     def __init__(self, dimension: int = 384):
         """
         Initialize provider.
-        
+
         Args:
-            dimension: Embedding dimension (default 384 to match KBChunk model)
+            dimension: Embedding dimension (EMBEDDING_DIMENSION in the app)
         """
         self._dimension = dimension
-    
+        self._repeats = -(-dimension // _DIGEST_SIZE)  # ceil division
+
     @property
     def dimension(self) -> int:
         """Return embedding dimension."""
         return self._dimension
-    
+
+    def _normalized_digests(self, texts: List[str]) -> np.ndarray:
+        """
+        Hash texts and return each digest's components scaled to a unit vector.
+
+        Every vector is its digest tiled to the full dimension, so only the
+        (n, 32) matrix of distinct components is returned. Norms are taken
+        per row with a dot product over the C-contiguous tiled matrix, which
+        matches the original per-text np.linalg.norm bit for bit.
+        """
+        digests = b''.join([hashlib.sha256(text.encode('utf-8')).digest() for text in texts])
+        byte_matrix = np.frombuffer(digests, dtype=np.uint8).reshape(len(texts), _DIGEST_SIZE)
+        components = _BYTE_VALUES[byte_matrix]
+
+        vectors = np.tile(components, (1, self._repeats))[:, :self._dimension]
+        norms = np.sqrt((vectors[:, None, :] @ vectors[:, :, None]).ravel())
+        norms[norms == 0] = 1.0
+
+        components /= norms[:, None]
+        return components
+
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Embed multiple texts."""
-        return [self.embed_query(text) for text in texts]
-    
+        """
+        Embed multiple texts in one vectorized pass.
+
+        Uses SHA256 hash to create stable vectors.
+        Normalizes to unit vectors for cosine similarity.
+        """
+        if not texts:
+            return []
+        rows = self._normalized_digests(texts).tolist()
+        if self._dimension % _DIGEST_SIZE == 0:
+            return [row * self._repeats for row in rows]
+        return [(row * self._repeats)[:self._dimension] for row in rows]
+
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """Embed multiple texts into a float32 matrix without Python floats."""
+        if not texts:
+            return np.empty((0, self._dimension), dtype=np.float32)
+        components = self._normalized_digests(texts)
+        return np.ascontiguousarray(
+            np.tile(components, (1, self._repeats))[:, :self._dimension],
+            dtype=np.float32
+        )
+
     def embed_query(self, text: str) -> List[float]:
         """
         Generate deterministic embedding from text.
-        
+
         Uses SHA256 hash to create stable vector.
         Normalizes to unit vector for cosine similarity.
         """
-        # Generate hash
-        hash_obj = hashlib.sha256(text.encode('utf-8'))
-        hash_bytes = hash_obj.digest()
-        
-        # Create vector from hash (repeat if needed)
-        vector = []
-        for i in range(self._dimension):
-            # Use hash bytes cyclically
-            byte_val = hash_bytes[i % len(hash_bytes)]
-            # Normalize to [-1, 1] range
-            vector.append((byte_val / 127.5) - 1.0)
-        
-        # Normalize to unit vector
-        vec_array = np.array(vector)
-        norm = np.linalg.norm(vec_array)
-        if norm > 0:
-            vec_array = vec_array / norm
-        
-        return vec_array.tolist()
-
+        return self.embed_texts([text])[0]
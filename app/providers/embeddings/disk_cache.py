@@ -0,0 +1,462 @@
+"""Persistent memory-mapped embeddings cache shared between processes."""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from app.providers.embeddings.base import EmbeddingsProvider
+
+try:
+    import fcntl
+except ImportError:  # Windows: msvcrt byte-range locks (exclusive only)
+    fcntl = None
+    import msvcrt
+
+LOCK_SH = fcntl.LOCK_SH if fcntl else 1
+LOCK_EX = fcntl.LOCK_EX if fcntl else 2
+
+STORE_FORMAT = 1
+
+# Keys are the first 16 bytes of SHA-256(text)
+KEY_BYTES = 16
+
+# Rows copied per step during compaction
+COMPACT_COPY_ROWS = 65536
+
+# Auto-compact once the files exceed max_rows by this factor
+COMPACT_SLACK = 1.25
+
+def text_key(text: str) -> bytes:
+    """Return the store key for a text."""
+    return hashlib.sha256(text.encode("utf-8")).digest()[:KEY_BYTES]
+
+class DiskEmbeddingStore:
+    """
+    Append-only store of float32 vectors keyed by 16-byte digests.
+
+    A store directory holds:
+      - vectors[.N].f32: raw row-major float32 matrix, one row per entry
+      - keys[.N].idx: one 16-byte key per row, in the same order
+      - CURRENT: the generation N in use (missing = 0, unsuffixed files)
+      - meta.json: format version and dimension
+
+    Writers hold an exclusive lock on the directory's lock file and
+    append vectors before keys, so the key file's length always defines
+    the committed row count and a torn write is ignored and overwritten.
+    Readers keep a key -> row index in memory, extend it incrementally as
+    the keys file grows, and memory-map the vectors file. Compaction
+    writes both files of the next generation and then switches CURRENT
+    with a single os.replace, so a crash leaves either the old or the new
+    pair in use, never a mix; readers notice the new generation and
+    rebuild their index.
+    """
+
+    def __init__(self, directory: str, dimension: int):
+        """
+        Open (or create) a store.
+
+        Args:
+            directory: Store directory (created if missing)
+            dimension: Vector dimension
+
+        Raises:
+            ValueError: If the directory holds a store with another layout
+        """
+        self.directory = directory
+        self.dimension = dimension
+        self._current_path = os.path.join(directory, "CURRENT")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._lock_path = os.path.join(directory, ".lock")
+        self._row_bytes = dimension * 4
+
+        self._index: Dict[bytes, int] = {}
+        self._generation = 0
+        self._loaded_generation: Optional[int] = None
+        self._keys_read = 0
+        self._vectors: Optional[np.memmap] = None
+        self._thread_lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        with self._file_lock(LOCK_EX):
+            self._check_meta()
+            self._refresh_locked()
+
+    @property
+    def vectors_path(self) -> str:
+        """Vectors file of the current generation."""
+        return self._generation_path("vectors", "f32", self._generation)
+
+    @property
+    def keys_path(self) -> str:
+        """Keys file of the current generation."""
+        return self._generation_path("keys", "idx", self._generation)
+
+    def _generation_path(self, stem: str, suffix: str, generation: int) -> str:
+        """Path of a store file in a generation (0 keeps the original names)."""
+        name = f"{stem}.{suffix}" if generation == 0 else f"{stem}.{generation}.{suffix}"
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _file_lock(self, operation: int) -> Iterator[None]:
+        """Hold a lock on the store's lock file (shared locks are exclusive on Windows)."""
+        with open(self._lock_path, "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, operation)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                return
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _check_meta(self) -> None:
+        """Write meta.json for a new store or validate an existing one."""
+        meta = {"format": STORE_FORMAT, "dimension": self.dimension, "key_bytes": KEY_BYTES}
+        if not os.path.exists(self._meta_path):
+            with open(self._meta_path, "w") as f:
+                json.dump(meta, f)
+            return
+        with open(self._meta_path) as f:
+            existing = json.load(f)
+        if existing != meta:
+            raise ValueError(
+                f"Embedding store at {self.directory} has layout {existing}, expected {meta}"
+            )
+
+    def _read_generation(self) -> int:
+        """Generation named by CURRENT (0 before the first compaction)."""
+        try:
+            with open(self._current_path) as f:
+                return int(f.read().strip())
+        except FileNotFoundError:
+            return 0
+
+    def _refresh_locked(self) -> None:
+        """Pick up rows appended (or a compaction) by other writers. Caller holds a file lock."""
+        self._generation = self._read_generation()
+        if self._generation != self._loaded_generation:
+            # New store or compacted files: rebuild from scratch
+            self._index = {}
+            self._loaded_generation = self._generation
+            self._keys_read = 0
+            self._vectors = None
+
+        try:
+            stat = os.stat(self.keys_path)
+        except FileNotFoundError:
+            return
+
+        committed = stat.st_size - stat.st_size % KEY_BYTES
+        if committed > self._keys_read:
+            with open(self.keys_path, "rb") as f:
+                f.seek(self._keys_read)
+                data = f.read(committed - self._keys_read)
+            first_row = self._keys_read // KEY_BYTES
+            index = self._index
+            for offset in range(0, len(data), KEY_BYTES):
+                # Later rows win, so re-appended keys point at their newest copy
+                index[data[offset:offset + KEY_BYTES]] = first_row + offset // KEY_BYTES
+            self._keys_read = committed
+
+        rows = self._keys_read // KEY_BYTES
+        if rows and (self._vectors is None or self._vectors.shape[0] < rows):
+            self._vectors = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dimension)
+            )
+
+    def refresh(self) -> None:
+        """Load entries written by other processes since the last refresh."""
+        with self._thread_lock, self._file_lock(LOCK_SH):
+            self._refresh_locked()
+
+    @property
+    def rows(self) -> int:
+        """Committed rows in the files."""
+        return self._keys_read // KEY_BYTES
+
+    def __len__(self) -> int:
+        """Number of distinct keys."""
+        return len(self._index)
+
+    def get_many(self, keys: List[bytes]) -> Tuple[List[int], np.ndarray]:
+        """
+        Look up keys.
+
+        Args:
+            keys: Store keys
+
+        Returns:
+            (positions in keys that were found, float32 matrix of their vectors)
+        """
+        with self._thread_lock:
+            index, vectors = self._index, self._vectors
+            found = []
+            rows = []
+            for position, key in enumerate(keys):
+                row = index.get(key)
+                if row is not None:
+                    found.append(position)
+                    rows.append(row)
+            if not rows:
+                return [], np.empty((0, self.dimension), dtype=np.float32)
+            return found, np.asarray(vectors[rows], dtype=np.float32)
+
+    def append(self, keys: List[bytes], vectors: np.ndarray) -> int:
+        """
+        Append vectors for keys not already stored.
+
+        Args:
+            keys: Store keys
+            vectors: float32 matrix aligned with keys
+
+        Returns:
+            Number of rows written
+        """
+        with self._thread_lock, self._file_lock(LOCK_EX):
+            self._refresh_locked()
+
+            # Skip keys another writer stored meanwhile, and duplicates in this call
+            pending: Dict[bytes, int] = {}
+            for position, key in enumerate(keys):
+                if key not in self._index and key not in pending:
+                    pending[key] = position
+            if not pending:
+                return 0
+
+            block = np.ascontiguousarray(vectors[list(pending.values())], dtype=np.float32)
+            rows = self.rows
+            self._write_at(self.vectors_path, rows * self._row_bytes, block.tobytes())
+            self._write_at(self.keys_path, self._keys_read, b"".join(pending.keys()))
+            self._refresh_locked()
+            return len(pending)
+
+    @staticmethod
+    def _write_at(path: str, offset: int, data: bytes) -> None:
+        """Write data at offset, discarding any torn tail past it."""
+        with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+
+    def compact(self, max_rows: Optional[int] = None) -> int:
+        """
+        Rewrite the store trimmed to its newest max_rows keys.
+
+        Args:
+            max_rows: Maximum keys to keep (None = keep all)
+
+        Returns:
+            Number of rows after compaction
+        """
+        with self._thread_lock, self._file_lock(LOCK_EX):
+            self._refresh_locked()
+            live = sorted(self._index.items(), key=lambda item: item[1])
+            if max_rows is not None:
+                live = live[-max_rows:] if max_rows > 0 else []
+
+            old_generation = self._generation
+            generation = old_generation + 1
+            new_vectors = self._generation_path("vectors", "f32", generation)
+            new_keys = self._generation_path("keys", "idx", generation)
+            with open(new_vectors, "wb") as f:
+                for start in range(0, len(live), COMPACT_COPY_ROWS):
+                    rows = [row for _, row in live[start:start + COMPACT_COPY_ROWS]]
+                    f.write(np.ascontiguousarray(self._vectors[rows]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(new_keys, "wb") as f:
+                f.write(b"".join(key for key, _ in live))
+                f.flush()
+                os.fsync(f.fileno())
+
+            # The new pair only becomes visible when CURRENT is swapped
+            tmp_current = self._current_path + ".tmp"
+            with open(tmp_current, "w") as f:
+                f.write(str(generation))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_current, self._current_path)
+            self._refresh_locked()
+
+            # Open memmaps keep the old files alive on POSIX; on Windows
+            # they cannot be removed yet and are left behind
+            for stem, suffix in (("keys", "idx"), ("vectors", "f32")):
+                try:
+                    os.remove(self._generation_path(stem, suffix, old_generation))
+                except OSError:
+                    pass
+            return self.rows
+
+    def stats(self) -> Dict[str, Any]:
+        """Return occupancy figures."""
+        return {
+            "path": self.directory,
+            "rows": self.rows,
+            "keys": len(self),
+            "size_bytes": self.rows * (self._row_bytes + KEY_BYTES)
+        }
+
+class DiskCachedEmbeddingsProvider(EmbeddingsProvider):
+    """
+    Embeddings provider that reads through a persistent DiskEmbeddingStore.
+
+    Each (provider name, dimension) pair gets its own store directory
+    under the cache root, so the cache survives restarts and is shared by
+    every worker process on the host. New vectors are appended; once the
+    store grows past max_rows it is compacted back down to its newest
+    max_rows vectors.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingsProvider,
+        directory: str,
+        max_rows: Optional[int] = None
+    ):
+        """
+        Initialize disk cache.
+
+        Args:
+            provider: Provider to wrap
+            directory: Cache root directory
+            max_rows: Vectors to keep on compaction (None = unbounded)
+        """
+        if max_rows is not None and max_rows <= 0:
+            raise ValueError("max_rows must be positive")
+        self.provider = provider
+        self.max_rows = max_rows
+        self.store = DiskEmbeddingStore(
+            os.path.join(directory, f"{provider.name}-{provider.dimension}"),
+            provider.dimension
+        )
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.compactions = 0
+
+    @property
+    def name(self) -> str:
+        """Return wrapped provider name (cached vectors are the provider's)."""
+        return self.provider.name
+
+    @property
+    def dimension(self) -> int:
+        """Return embedding dimension."""
+        return self.provider.dimension
+
+    def _lookup(self, texts: List[str]) -> Tuple[np.ndarray, Dict[bytes, List[int]]]:
+        """
+        Fill rows found on disk.
+
+        Returns:
+            (result matrix, missing key -> result rows)
+        """
+        result = np.empty((len(texts), self.dimension), dtype=np.float32)
+        keys = [text_key(text) for text in texts]
+
+        self.store.refresh()
+        found, vectors = self.store.get_many(keys)
+        if found:
+            result[found] = vectors
+
+        found_set = set(found)
+        missing: Dict[bytes, List[int]] = {}
+        for position, key in enumerate(keys):
+            if position not in found_set:
+                missing.setdefault(key, []).append(position)
+
+        with self._counter_lock:
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        return result, missing
+
+    def _store(self, result: np.ndarray, missing: Dict[bytes, List[int]], vectors: np.ndarray) -> None:
+        """Append freshly embedded vectors and copy them into the result."""
+        for rows, vector in zip(missing.values(), vectors):
+            result[rows] = vector
+        written = self.store.append(list(missing.keys()), vectors)
+        with self._counter_lock:
+            self.writes += written
+        if written:
+            self._maybe_compact()
+
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, calling the wrapped provider only for texts not on disk."""
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        result, missing = self._lookup(texts)
+        if missing:
+            texts_to_embed = [texts[rows[0]] for rows in missing.values()]
+            self._store(result, missing, self.provider.embed_texts_array(texts_to_embed))
+        return result
+
+    async def aembed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Async variant of embed_texts_array.
+
+        File access runs in worker threads; misses go through the wrapped
+        provider's async interface and its limits.
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        result, missing = await asyncio.to_thread(self._lookup, texts)
+        if missing:
+            texts_to_embed = [texts[rows[0]] for rows in missing.values()]
+            vectors = await self.provider.aembed_texts_array(texts_to_embed)
+            await asyncio.to_thread(self._store, result, missing, vectors)
+        return result
+
+    def _maybe_compact(self) -> None:
+        """Trim the store to max_rows once it outgrows that by COMPACT_SLACK."""
+        if self.max_rows is not None and self.store.rows > self.max_rows * COMPACT_SLACK:
+            self.store.compact(self.max_rows)
+            with self._counter_lock:
+                self.compactions += 1
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple texts through the disk cache."""
+        return self.embed_texts_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query through the disk cache."""
+        return self.embed_texts_array([text])[0].tolist()
+
+    def close(self) -> None:
+        """Close the wrapped provider."""
+        self.provider.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return disk cache counters and occupancy."""
+        with self._counter_lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "writes": self.writes,
+                "compactions": self.compactions,
+                "max_rows": self.max_rows
+            }
+        stats.update(self.store.stats())
+        return stats
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return wrapped provider metrics plus disk cache counters."""
+        metrics = dict(self.provider.metrics())
+        metrics["disk_cache"] = self.stats()
+        return metrics
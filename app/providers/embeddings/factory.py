@@ -0,0 +1,79 @@
+"""Process-wide embeddings provider construction."""
+from functools import lru_cache
+from app.core.config import EMBEDDING_DIMENSION, settings
+from app.providers.embeddings.base import EmbeddingsProvider
+from app.providers.embeddings.batching import BatchingEmbeddingsProvider
+from app.providers.embeddings.cached import CachedEmbeddingsProvider
+from app.providers.embeddings.deterministic import DeterministicEmbeddingsProvider
+from app.providers.embeddings.disk_cache import DiskCachedEmbeddingsProvider
+from app.providers.embeddings.fake import FakeEmbeddingsProvider
+from app.providers.embeddings.hashing import HashingEmbeddingsProvider
+from app.providers.embeddings.process_pool import ProcessPoolEmbeddingsProvider
+
+def _base_provider() -> EmbeddingsProvider:
+    """Build the configured embeddings provider."""
+    dimension = EMBEDDING_DIMENSION
+    if settings.EMBEDDINGS_PROVIDER == "deterministic":
+        return DeterministicEmbeddingsProvider(dimension=dimension)
+    if settings.EMBEDDINGS_PROVIDER == "hashing":
+        return HashingEmbeddingsProvider(dimension=dimension)
+    if settings.EMBEDDINGS_PROVIDER == "fake":
+        return FakeEmbeddingsProvider(
+            dimension=dimension,
+            latency_seconds=settings.EMBEDDINGS_FAKE_LATENCY_SECONDS
+        )
+    raise ValueError(f"Unknown EMBEDDINGS_PROVIDER: {settings.EMBEDDINGS_PROVIDER}")
+
+@lru_cache(maxsize=1)
+def get_embeddings_provider() -> EmbeddingsProvider:
+    """
+    Return the shared embeddings provider for this process.
+    
+    The provider reads through a persistent disk cache when
+    EMBEDDINGS_DISK_CACHE_DIR is set, and is wrapped in an in-memory LRU
+    cache unless EMBEDDINGS_CACHE_MAX_BYTES is 0, so repeated texts skip
+    the provider across requests, workers and restarts. Cache misses from
+    concurrent async calls are coalesced into micro-batches when
+    EMBEDDINGS_BATCH_WINDOW_MS is set. With EMBEDDINGS_PROCESS_WORKERS
+    set, the provider itself runs in worker processes so CPU-bound
+    embedding stays off the event loop. Async limits apply to the
+    underlying provider; cache hits never wait on them.
+    """
+    if settings.EMBEDDINGS_PROCESS_WORKERS > 0:
+        # Workers rebuild the configured provider from settings
+        provider: EmbeddingsProvider = ProcessPoolEmbeddingsProvider(
+            _base_provider,
+            max_workers=settings.EMBEDDINGS_PROCESS_WORKERS
+        )
+    else:
+        provider = _base_provider()
+    provider = provider.configure_async(
+        max_concurrency=settings.EMBEDDINGS_MAX_CONCURRENCY,
+        max_batch_size=settings.EMBEDDINGS_MAX_BATCH_SIZE,
+        timeout_seconds=settings.EMBEDDINGS_TIMEOUT_SECONDS
+    )
+    if settings.EMBEDDINGS_BATCH_WINDOW_MS > 0:
+        provider = BatchingEmbeddingsProvider(
+            provider,
+            max_wait_ms=settings.EMBEDDINGS_BATCH_WINDOW_MS,
+            max_batch_size=settings.EMBEDDINGS_BATCH_MAX_SIZE
+        )
+    if settings.EMBEDDINGS_DISK_CACHE_DIR:
+        provider = DiskCachedEmbeddingsProvider(
+            provider,
+            directory=settings.EMBEDDINGS_DISK_CACHE_DIR,
+            max_rows=settings.EMBEDDINGS_DISK_CACHE_MAX_ROWS
+        )
+    if settings.EMBEDDINGS_CACHE_MAX_BYTES > 0:
+        provider = CachedEmbeddingsProvider(
+            provider,
+            max_bytes=settings.EMBEDDINGS_CACHE_MAX_BYTES,
+            ttl_seconds=settings.EMBEDDINGS_CACHE_TTL_SECONDS
+        )
+    return provider
+
+def shutdown_embeddings_provider() -> None:
+    """Close the shared provider if it was created (e.g. stop worker processes)."""
+    if get_embeddings_provider.cache_info().currsize:
+        get_embeddings_provider().close()
+        get_embeddings_provider.cache_clear()
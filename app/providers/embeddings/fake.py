@@ -0,0 +1,67 @@
+"""Fake embeddings provider with configurable latency (for tests and load runs)."""
+import threading
+from collections import deque
+import time
+from typing import Deque, List
+import numpy as np
+from app.providers.embeddings.deterministic import DeterministicEmbeddingsProvider
+
+# Call sizes kept in batch_sizes (the provider can serve long load runs)
+BATCH_SIZES_KEPT = 1000
+
+class FakeEmbeddingsProvider(DeterministicEmbeddingsProvider):
+    """
+    Deterministic provider that simulates a remote embeddings API.
+
+    Each call sleeps for latency_seconds plus per_text_latency_seconds per
+    text before returning the deterministic vectors, and records the call
+    count, recent call sizes and peak concurrency so callers' batching and
+    limits can be checked without a network.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 384,
+        latency_seconds: float = 0.0,
+        per_text_latency_seconds: float = 0.0
+    ):
+        """
+        Initialize provider.
+
+        Args:
+            dimension: Embedding dimension
+            latency_seconds: Fixed delay per call
+            per_text_latency_seconds: Additional delay per text
+        """
+        super().__init__(dimension=dimension)
+        self.latency_seconds = latency_seconds
+        self.per_text_latency_seconds = per_text_latency_seconds
+        self.calls = 0
+        self.batch_sizes: Deque[int] = deque(maxlen=BATCH_SIZES_KEPT)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _simulate_call(self, size: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.batch_sizes.append(size)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self.latency_seconds + self.per_text_latency_seconds * size
+            if delay > 0:
+                time.sleep(delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts after the simulated delay."""
+        self._simulate_call(len(texts))
+        return super().embed_texts(texts)
+
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a float32 matrix after the simulated delay."""
+        self._simulate_call(len(texts))
+        return super().embed_texts_array(texts)
@@ -0,0 +1,255 @@
+"""Feature-hashing n-gram embeddings provider (local, no model or network)."""
+import re
+import unicodedata
+from typing import Iterator, List, Tuple
+import numpy as np
+from app.providers.embeddings.base import EmbeddingsProvider
+
+# Word characters, including Devanagari combining marks (matches app.core.tokenization)
+_WORD_RE = re.compile(r"[\w\u0900-\u0963\u0966-\u097F]+")
+
+_SPACE = ord(" ")
+
+# Polynomial rolling-hash base (odd, so it is invertible mod 2**32) and its inverse
+_BASE = 0x01000193
+_BASE_INV = pow(_BASE, -1, 2 ** 32)
+
+# Per-feature-type salts so e.g. a word and a char n-gram with equal text differ
+_SALT_WORD = 0x9E3779B9
+_SALT_CHAR = 0x85EBCA77
+
+_MIX_SHIFT_A = np.uint32(16)
+_MIX_SHIFT_B = np.uint32(13)
+_MIX_MUL_A = np.uint32(0x85EBCA6B)
+_MIX_MUL_B = np.uint32(0xC2B2AE35)
+
+def _mix32(values: np.ndarray) -> np.ndarray:
+    """MurmurHash3 finalizer: spreads rolling hashes over all 32 bits (in place)."""
+    values ^= values >> _MIX_SHIFT_A
+    values *= _MIX_MUL_A
+    values ^= values >> _MIX_SHIFT_B
+    values *= _MIX_MUL_B
+    values ^= values >> _MIX_SHIFT_A
+    return values
+
+def _powers(base: int, count: int) -> np.ndarray:
+    """base**0 .. base**(count-1) modulo 2**32."""
+    powers = np.full(count, base, dtype=np.uint32)
+    powers[0] = 1
+    return np.cumprod(powers, dtype=np.uint32)
+
+class HashingEmbeddingsProvider(EmbeddingsProvider):
+    """
+    Embeddings from hashed word and character n-grams.
+
+    Texts are NFKC-normalized, case-folded and reduced to their words.
+    Every word n-gram and every character n-gram of the space-padded word
+    sequence is hashed into one of n_buckets features, and the sparse
+    feature counts are multiplied by a fixed sparse random projection
+    (nnz_per_bucket signed entries per bucket, drawn from a seeded RNG)
+    down to `dimension` components, then L2-normalized.
+
+    Hashes are stable across processes and platforms (polynomial rolling
+    hashes over code points), and a text's vector does not depend on the
+    rest of its batch, so texts sharing words or word fragments get
+    similar vectors wherever they are embedded. Empty texts map to a fixed
+    unit vector.
+
+    Unlike the SHA-256 provider, cost grows with text length, since every
+    character starts several n-grams: on one core a 500-character chunk
+    takes about 110us (SHA-256: about 1us) and a short query batched with
+    others about 10us, while a lone query call is about 140us of fixed
+    NumPy overhead. Ingestion embeds each new chunk once (stored vectors
+    are reused by content hash) and can spread batches over processes
+    with EMBEDDINGS_PROCESS_WORKERS.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 384,
+        word_ngram_range: Tuple[int, int] = (1, 2),
+        char_ngram_range: Tuple[int, int] = (3, 5),
+        n_buckets: int = 2 ** 18,
+        nnz_per_bucket: int = 2,
+        char_weight: float = 0.5,
+        seed: int = 0
+    ):
+        """
+        Initialize provider.
+
+        Args:
+            dimension: Embedding dimension
+            word_ngram_range: Smallest and largest word n-gram
+            char_ngram_range: Smallest and largest character n-gram
+            n_buckets: Hashed feature space size (power of two)
+            nnz_per_bucket: Non-zero projection entries per feature bucket
+            char_weight: Weight of character n-grams relative to word n-grams
+            seed: Projection RNG seed (changing it changes every vector)
+        """
+        if word_ngram_range[0] < 1 or word_ngram_range[0] > word_ngram_range[1]:
+            raise ValueError(f"Invalid word_ngram_range: {word_ngram_range}")
+        if char_ngram_range[0] < 1 or char_ngram_range[0] > char_ngram_range[1]:
+            raise ValueError(f"Invalid char_ngram_range: {char_ngram_range}")
+        if n_buckets <= 0 or n_buckets & (n_buckets - 1):
+            raise ValueError("n_buckets must be a power of two")
+        if not 0 < dimension <= 2 ** 15:
+            raise ValueError("dimension must be between 1 and 32768")
+        self._dimension = dimension
+        self.word_ngram_range = word_ngram_range
+        self.char_ngram_range = char_ngram_range
+        self.n_buckets = n_buckets
+        self.nnz_per_bucket = nnz_per_bucket
+        self.char_weight = char_weight
+        self.seed = seed
+
+        # Sparse random projection, one row of nnz entries per bucket. Entry
+        # (component c, sign s) is stored as 2*c + (s < 0), which is also its
+        # slot in the per-text sign-split accumulator used by _project.
+        # int32 so gathered rows add to slot offsets without a conversion.
+        rng = np.random.default_rng(seed)
+        components = rng.integers(0, dimension, size=(n_buckets, nnz_per_bucket))
+        negative = rng.integers(0, 2, size=(n_buckets, nnz_per_bucket))
+        self._projection = (2 * components + negative).astype(np.int32)
+        self._empty_vector = np.full(dimension, 1.0 / np.sqrt(dimension), dtype=np.float32)
+        self._power_tables = (_powers(_BASE, 4096), _powers(_BASE_INV, 4096))
+
+    @property
+    def name(self) -> str:
+        """Return provider name including the settings that shape its vectors."""
+        return (
+            f"HashingEmbeddingsProvider-w{self.word_ngram_range[0]}{self.word_ngram_range[1]}"
+            f"-c{self.char_ngram_range[0]}{self.char_ngram_range[1]}"
+            f"-b{self.n_buckets}-n{self.nnz_per_bucket}-s{self.seed}"
+        )
+
+    @property
+    def dimension(self) -> int:
+        """Return embedding dimension."""
+        return self._dimension
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Padded, space-separated lower-case words of a text."""
+        words = _WORD_RE.findall(unicodedata.normalize("NFKC", text).casefold())
+        return " " + " ".join(words) + " " if words else ""
+
+    def _powers_for(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BASE and BASE**-1 powers for at least count positions.
+
+        The tables are kept across calls and replaced by larger ones when a
+        batch outgrows them (a prefix of a longer table is the same table).
+        """
+        tables = self._power_tables
+        if len(tables[0]) < count:
+            size = max(count, 2 * len(tables[0]))
+            tables = (_powers(_BASE, size), _powers(_BASE_INV, size))
+            self._power_tables = tables
+        return tables
+
+    def _char_ngram_hashes(self, codes: np.ndarray, rows: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yield (rows, salted unmixed hashes) of every character n-gram, smallest n first.
+
+        Hashes are built by Horner's rule over shifted slices, so each
+        extra n costs one multiply-add over the batch; n-grams spanning
+        two texts are dropped.
+        """
+        low, high = self.char_ngram_range
+        hashes = codes.copy()
+        for n in range(1, high + 1):
+            if n > 1:
+                if len(hashes) <= 1:
+                    return
+                hashes = hashes[:-1] * np.uint32(_BASE) + codes[n - 1:]
+            if n >= low:
+                count = len(hashes)
+                valid = rows[:count] == rows[n - 1:n - 1 + count]
+                yield rows[:count][valid], hashes[valid] ^ np.uint32(_SALT_CHAR + n)
+
+    def _word_ngram_hashes(self, codes: np.ndarray, rows: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yield (rows, salted unmixed hashes) of every word n-gram, smallest n first.
+
+        A word n-gram is the span from the start of word i to the end of
+        word i+n-1; span hashes come from prefix sums scaled by inverse
+        powers of the base, so each costs O(1).
+        """
+        total = len(codes)
+        base_powers, inverse_powers = self._powers_for(total)
+        prefix = np.zeros(total + 1, dtype=np.uint32)
+        # prefix[i] = sum(codes[j] * BASE**-j for j < i), so the rolling hash
+        # of codes[a:b] is (prefix[b] - prefix[a]) * BASE**(b - 1)
+        np.cumsum(codes * inverse_powers[:total], dtype=np.uint32, out=prefix[1:])
+
+        is_word = codes != _SPACE
+        word_starts = np.flatnonzero(is_word[1:] & ~is_word[:-1]) + 1
+        word_ends = np.flatnonzero(is_word[:-1] & ~is_word[1:]) + 1
+        word_rows = rows[word_starts]
+        low, high = self.word_ngram_range
+        for n in range(low, high + 1):
+            count = len(word_starts) - n + 1
+            if count <= 0:
+                return
+            valid = word_rows[:count] == word_rows[n - 1:]
+            starts = word_starts[:count][valid]
+            ends = word_ends[n - 1:][valid]
+            hashes = (prefix[ends] - prefix[starts]) * base_powers[ends - 1]
+            yield word_rows[:count][valid], hashes ^ np.uint32(_SALT_WORD + n)
+
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """Embed multiple texts into a float32 matrix in one vectorized pass."""
+        dim = self._dimension
+        n_texts = len(texts)
+        if not texts:
+            return np.empty((0, dim), dtype=np.float32)
+
+        normalized = [self._normalize(text) for text in texts]
+        lengths = np.fromiter((len(text) for text in normalized), dtype=np.int64, count=n_texts)
+        if not lengths.any():
+            return np.tile(self._empty_vector, (n_texts, 1))
+
+        # Accumulator slots are indexed in int32 while the batch fits
+        dim2 = 2 * dim
+        index_type = np.int32 if n_texts * 2 * dim2 < 2 ** 31 else np.int64
+        codes = np.frombuffer("".join(normalized).encode("utf-32-le"), dtype=np.uint32)
+        rows = np.repeat(np.arange(n_texts, dtype=index_type), lengths)
+
+        # Group every feature as (text, type) with type 0 = char, 1 = word
+        groups = []
+        hashes = []
+        for feature_rows, feature_hashes in self._char_ngram_hashes(codes, rows):
+            groups.append(feature_rows * 2)
+            hashes.append(feature_hashes)
+        for feature_rows, feature_hashes in self._word_ngram_hashes(codes, rows):
+            groups.append(feature_rows * 2 + 1)
+            hashes.append(feature_hashes)
+        if not groups:
+            return np.tile(self._empty_vector, (n_texts, 1))
+        groups = np.concatenate(groups)
+        buckets = _mix32(np.concatenate(hashes)) & np.uint32(self.n_buckets - 1)
+
+        # Sparse projection as one bincount over (text, type, component, sign)
+        # slots; take() with native indices gathers several times faster than
+        # fancy indexing with the uint32 buckets
+        entries = self._projection.take(buckets.astype(np.intp), axis=0)
+        targets = (groups * index_type(dim2))[:, None] + entries
+        counts = np.bincount(targets.ravel(), minlength=n_texts * 2 * dim2)
+        counts = counts.reshape(n_texts, 2, dim, 2)
+        signed = counts[..., 0] - counts[..., 1]
+        vectors = self.char_weight * signed[:, 0] + signed[:, 1]
+
+        norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+        empty = norms == 0
+        norms[empty] = 1.0
+        result = np.ascontiguousarray(vectors / norms[:, None], dtype=np.float32)
+        result[empty] = self._empty_vector
+        return result
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple texts."""
+        return self.embed_texts_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query text."""
+        return self.embed_texts_array([text])[0].tolist()
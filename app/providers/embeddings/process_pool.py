@@ -0,0 +1,210 @@
+"""Embeddings provider that runs another provider in worker processes."""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from app.providers.embeddings.base import EmbeddingsProvider
+
+DEFAULT_TASK_BATCH_SIZE = 256
+
+# Provider built once per worker process by _init_worker
+_worker_provider: Optional[EmbeddingsProvider] = None
+
+def _init_worker(factory: Callable[[], EmbeddingsProvider]) -> None:
+    """Build and warm the worker's provider."""
+    global _worker_provider
+    _worker_provider = factory()
+    _worker_provider.embed_texts_array(["warm up"])
+
+def _worker_info() -> tuple:
+    """Return (name, dimension) of the worker's provider."""
+    return _worker_provider.name, _worker_provider.dimension
+
+def _embed_into(shm_name: str, total_rows: int, start: int, texts: List[str]) -> None:
+    """Embed texts into rows [start, start + len(texts)) of a shared float32 matrix."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((total_rows, _worker_provider.dimension), dtype=np.float32, buffer=shm.buf)
+        out[start:start + len(texts)] = _worker_provider.embed_texts_array(texts)
+        del out  # release the buffer export before closing
+    finally:
+        shm.close()
+
+class _SharedResult:
+    """
+    Shared-memory result matrix for one call.
+
+    The segment is released once every task has finished and the caller
+    has copied the result (or given up), so a timed-out call never unlinks
+    memory a worker is still writing.
+    """
+
+    def __init__(self, rows: int, dimension: int, tasks: int):
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, rows * dimension * 4))
+        self.rows = rows
+        self.dimension = dimension
+        self._pending = tasks + 1  # tasks plus the caller
+        self._lock = threading.Lock()
+
+    def copy(self) -> np.ndarray:
+        view = np.ndarray((self.rows, self.dimension), dtype=np.float32, buffer=self.shm.buf)
+        result = view.copy()
+        del view
+        return result
+
+    def release(self, *_: Any) -> None:
+        with self._lock:
+            self._pending -= 1
+            done = self._pending == 0
+        if done:
+            self.shm.close()
+            self.shm.unlink()
+
+class ProcessPoolEmbeddingsProvider(EmbeddingsProvider):
+    """
+    Embeddings provider that runs a CPU-bound provider in worker processes.
+
+    Each worker builds its provider once from a picklable factory and keeps
+    it warm; calls are split into batches of task_batch_size texts and the
+    workers write float32 rows straight into one shared-memory segment, so
+    only texts are pickled. Async calls await the pool's futures without
+    tying up the event loop or its thread pool, and are bounded by the
+    pool size and async_timeout_seconds.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], EmbeddingsProvider],
+        max_workers: int = 2,
+        task_batch_size: int = DEFAULT_TASK_BATCH_SIZE
+    ):
+        """
+        Start the worker pool.
+
+        Args:
+            factory: Picklable callable building the provider in each worker
+            max_workers: Worker processes
+            task_batch_size: Texts per worker task
+        """
+        if max_workers <= 0:
+            raise ValueError("max_workers must be positive")
+        if task_batch_size <= 0:
+            raise ValueError("task_batch_size must be positive")
+        self.max_workers = max_workers
+        self.task_batch_size = task_batch_size
+        # Spawned workers do not inherit the server's threads or locks
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(factory,)
+        )
+        self._name, self._dimension = self._pool.submit(_worker_info).result()
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.tasks = 0
+        self.texts = 0
+
+    @property
+    def name(self) -> str:
+        """Return the worker provider's name."""
+        return self._name
+
+    @property
+    def dimension(self) -> int:
+        """Return embedding dimension."""
+        return self._dimension
+
+    def _submit(self, texts: List[str]) -> tuple:
+        """Start tasks for texts; returns (shared result, futures)."""
+        size = self.task_batch_size
+        starts = range(0, len(texts), size)
+        result = _SharedResult(len(texts), self._dimension, len(starts))
+        futures: List[Future] = []
+        try:
+            for start in starts:
+                futures.append(
+                    self._pool.submit(_embed_into, result.shm.name, len(texts), start, texts[start:start + size])
+                )
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            result.release()
+            raise
+        finally:
+            for future in futures:
+                future.add_done_callback(result.release)
+            # Tasks that were never submitted will not release
+            for _ in range(len(starts) - len(futures)):
+                result.release()
+        with self._stats_lock:
+            self.calls += 1
+            self.tasks += len(futures)
+            self.texts += len(texts)
+        return result, futures
+
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in the worker processes (blocks the calling thread)."""
+        if not texts:
+            return np.empty((0, self._dimension), dtype=np.float32)
+        result, futures = self._submit(texts)
+        try:
+            wait(futures)
+            for future in futures:
+                future.result()
+            return result.copy()
+        finally:
+            result.release()
+
+    async def aembed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in the worker processes without blocking the event loop.
+
+        Raises:
+            TimeoutError: If the call exceeds async_timeout_seconds
+        """
+        if not texts:
+            return np.empty((0, self._dimension), dtype=np.float32)
+        result, futures = self._submit(texts)
+        timeout = self.async_timeout_seconds
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*[asyncio.wrap_future(future) for future in futures]),
+                timeout
+            )
+            return result.copy()
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Embedding {len(texts)} texts timed out after {timeout}s")
+        finally:
+            # Drop queued tasks of abandoned calls; running ones finish and release
+            for future in futures:
+                future.cancel()
+            result.release()
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple texts in the worker processes."""
+        return self.embed_texts_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query in a worker process."""
+        return self.embed_texts_array([text])[0].tolist()
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return provider metrics plus pool counters."""
+        metrics = super().metrics()
+        with self._stats_lock:
+            metrics["process_pool"] = {
+                "workers": self.max_workers,
+                "task_batch_size": self.task_batch_size,
+                "calls": self.calls,
+                "tasks": self.tasks,
+                "texts": self.texts
+            }
+        return metrics
@@ -0,0 +1,151 @@
+"""KB ingestion job repository (Postgres-backed work queue)."""
+from typing import Any, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from uuid import UUID
+from app.db.models.kb_ingest_job import KBIngestJob
+from app.repositories.base import BaseRepository
+
+# Job timestamps are naive UTC like the ORM defaults (datetime.utcnow)
+_UTC_NOW = "timezone('utc', now())"
+
+# The job is still held by the claim that returned this attempt number
+_CLAIMED = "status = 'RUNNING' AND attempts = :attempts"
+
+class KBIngestJobRepository(BaseRepository[KBIngestJob]):
+    """
+    Repository for background ingestion jobs.
+    
+    The worker-side methods (claim_next, update_progress, complete,
+    requeue, fail) each commit immediately: queue state has to be visible
+    to other workers and pollers while the job's own transaction is open.
+    All but claim_next are fenced on the claim's attempt number, so a
+    worker whose job was reclaimed as stale cannot overwrite the state
+    set by the worker that reclaimed it.
+    """
+    
+    def __init__(self, db: Session):
+        super().__init__(KBIngestJob, db)
+    
+    def create_job(self, job: KBIngestJob) -> KBIngestJob:
+        """Add a job (committed by the caller with its document)."""
+        self.db.add(job)
+        self.db.flush()
+        return job
+    
+    def get_by_tenant(self, tenant_id: UUID, job_id: UUID) -> Optional[KBIngestJob]:
+        """Get job by tenant and job ID (tenant-scoped)."""
+        return self.db.query(KBIngestJob).filter(
+            KBIngestJob.id == job_id,
+            KBIngestJob.tenant_id == tenant_id
+        ).first()
+    
+    def claim_next(self, stale_after_seconds: float) -> Optional[Any]:
+        """
+        Claim the next runnable job and mark it RUNNING.
+        
+        Runnable jobs are QUEUED ones whose run_after has passed, and
+        RUNNING ones whose worker has not reported progress for
+        stale_after_seconds (the worker died). FOR UPDATE SKIP LOCKED lets
+        any number of workers claim concurrently without blocking on or
+        double-claiming the same row.
+        
+        Returns:
+            Row with id, tenant_id, document_id and attempts (including
+            this one), or None if the queue is empty
+        """
+        sql = text(f"""
+            UPDATE kb_ingest_jobs AS jobs
+            SET status = 'RUNNING',
+                attempts = jobs.attempts + 1,
+                started_at = {_UTC_NOW},
+                heartbeat_at = {_UTC_NOW}
+            WHERE jobs.id = (
+                SELECT id
+                FROM kb_ingest_jobs
+                WHERE (status = 'QUEUED' AND run_after <= {_UTC_NOW})
+                   OR (status = 'RUNNING'
+                       AND heartbeat_at < {_UTC_NOW} - make_interval(secs => :stale_after))
+                ORDER BY run_after
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING jobs.id, jobs.tenant_id, jobs.document_id, jobs.attempts
+        """)
+        row = self.db.execute(sql, {"stale_after": stale_after_seconds}).first()
+        self.db.commit()
+        return row
+    
+    def update_progress(
+        self,
+        job_id: UUID,
+        attempts: int,
+        processed: int,
+        embedded: int,
+        total: int
+    ) -> bool:
+        """Record progress and refresh the job's heartbeat (False if the claim was lost)."""
+        result = self.db.execute(
+            text(f"""
+                UPDATE kb_ingest_jobs
+                SET chunks_processed = :processed,
+                    chunks_embedded = :embedded,
+                    chunks_total = :total,
+                    heartbeat_at = {_UTC_NOW}
+                WHERE id = :job_id AND {_CLAIMED}
+            """),
+            {"job_id": job_id, "attempts": attempts, "processed": processed, "embedded": embedded, "total": total}
+        )
+        self.db.commit()
+        return result.rowcount > 0
+    
+    def complete(self, job_id: UUID, attempts: int) -> bool:
+        """Mark a job SUCCEEDED (False if the claim was lost)."""
+        result = self.db.execute(
+            text(f"""
+                UPDATE kb_ingest_jobs
+                SET status = 'SUCCEEDED', error = NULL, finished_at = {_UTC_NOW}
+                WHERE id = :job_id AND {_CLAIMED}
+            """),
+            {"job_id": job_id, "attempts": attempts}
+        )
+        self.db.commit()
+        return result.rowcount > 0
+    
+    def requeue(self, job_id: UUID, attempts: int, error: str, delay_seconds: float) -> bool:
+        """Put a failed job back in the queue to retry after delay_seconds (False if the claim was lost)."""
+        result = self.db.execute(
+            text(f"""
+                UPDATE kb_ingest_jobs
+                SET status = 'QUEUED',
+                    error = :error,
+                    run_after = {_UTC_NOW} + make_interval(secs => :delay)
+                WHERE id = :job_id AND {_CLAIMED}
+            """),
+            {"job_id": job_id, "attempts": attempts, "error": error, "delay": delay_seconds}
+        )
+        self.db.commit()
+        return result.rowcount > 0
+    
+    def fail(self, job_id: UUID, attempts: int, error: str) -> bool:
+        """Mark a job and its document FAILED (False if the claim was lost)."""
+        result = self.db.execute(
+            text(f"""
+                WITH failed AS (
+                    UPDATE kb_ingest_jobs
+                    SET status = 'FAILED', error = :error, finished_at = {_UTC_NOW}
+                    WHERE id = :job_id AND {_CLAIMED}
+                    RETURNING document_id
+                ), documents AS (
+                    UPDATE kb_documents
+                    SET status = 'FAILED'
+                    FROM failed
+                    WHERE kb_documents.id = failed.document_id
+                )
+                SELECT count(*) FROM failed
+            """),
+            {"job_id": job_id, "attempts": attempts, "error": error}
+        )
+        failed = result.scalar() > 0
+        self.db.commit()
+        return failed
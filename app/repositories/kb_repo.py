@@ -1,10 +1,88 @@
 """KB repository with pgvector similarity search."""
-from typing import List, Optional, Tuple
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, text
+from sqlalchemy import Row, String, and_, bindparam, delete, insert, text
 from uuid import UUID
+import numpy as np
 from app.db.models.kb_document import KBDocument
 from app.db.models.kb_chunk import KBChunk
+from app.db.models.kb_projection import KBProjection
+
+# Maximum chunk IDs per DELETE statement
+DELETE_BATCH_SIZE = 500
+
+# Vector storage modes for search candidates
+VECTOR_STORAGE_FULL = "full"
+VECTOR_STORAGE_HALFVEC = "halfvec"
+VECTOR_STORAGE_BIT = "bit"
+VECTOR_STORAGE_REDUCED = "reduced"
+
+# Candidate ordering per compact storage mode (served by the column's index)
+_CANDIDATE_ORDER = {
+    VECTOR_STORAGE_HALFVEC: "kb_chunks.embedding_half <=> CAST(queries.embedding AS halfvec({dim}))",
+    VECTOR_STORAGE_BIT: "kb_chunks.embedding_bit <~> binary_quantize(queries.embedding)",
+    VECTOR_STORAGE_REDUCED: "kb_chunks.embedding_reduced <=> queries.reduced_embedding",
+}
+
+VECTOR_STORAGE_MODES = (VECTOR_STORAGE_FULL,) + tuple(_CANDIDATE_ORDER)
+
+# Default candidates fetched per requested hit before exact rescoring;
+# Hamming distance over sign bits is much coarser than halfvec
+DEFAULT_RESCORE_OVERFETCH = {
+    VECTOR_STORAGE_HALFVEC: 4,
+    VECTOR_STORAGE_BIT: 16,
+    VECTOR_STORAGE_REDUCED: 8,
+}
+
+# Search modes: pgvector similarity, full-text match, or both fused with
+# reciprocal rank fusion (RRF_K is the usual constant damping top ranks)
+SEARCH_MODE_VECTOR = "vector"
+SEARCH_MODE_LEXICAL = "lexical"
+SEARCH_MODE_HYBRID = "hybrid"
+SEARCH_MODES = (SEARCH_MODE_VECTOR, SEARCH_MODE_LEXICAL, SEARCH_MODE_HYBRID)
+RRF_K = 60
+
+# Hits taken from each of the vector and lexical lists per requested hit
+HYBRID_CANDIDATE_FACTOR = 4
+
+# A query's text as a tsquery matching any of its terms (plainto_tsquery
+# alone requires all of them); ts_rank_cd still ranks chunks matching more
+# terms higher
+_LEXICAL_QUERY_SQL = (
+    "CAST(replace(CAST(plainto_tsquery(CAST(:text_search_config AS regconfig), {query_text}) AS text),"
+    " ' & ', ' | ') AS tsquery)"
+)
+
+# Bounds of pgvector's ivfflat.probes and hnsw.ef_search settings
+IVFFLAT_MAX_PROBES = 32768
+HNSW_MAX_EF_SEARCH = 1000
+# pgvector's hnsw.ef_search default
+HNSW_DEFAULT_EF_SEARCH = 40
+
+# Chunks read or updated per statement when applying a projection
+PROJECTION_BATCH_SIZE = 1000
+
+# kb_chunks columns written by binary COPY and their Postgres types; the
+# generated columns (embedding_half, embedding_bit) are filled in by Postgres
+_CHUNK_COPY_COLUMNS = (
+    ("id", "uuid"),
+    ("document_id", "uuid"),
+    ("chunk_index", "int4"),
+    ("text", "varchar"),
+    ("start_offset", "int4"),
+    ("end_offset", "int4"),
+    ("content_hash", "varchar"),
+    ("embedding", "vector"),
+    ("embedding_model", "varchar"),
+    ("embedding_reduced", "vector"),
+    ("created_at", "timestamp"),
+)
+_CHUNK_COPY_SQL = (
+    f"COPY kb_chunks ({', '.join(name for name, _ in _CHUNK_COPY_COLUMNS)}) "
+    "FROM STDIN WITH (FORMAT BINARY)"
+)
 
 class KBRepository:
     """Repository for KB operations."""
@@ -18,14 +96,26 @@ class KBRepository:
         self.db.flush()
         return document
     
-    def get_document_by_tenant(self, tenant_id: UUID, document_id: UUID) -> Optional[KBDocument]:
-        """Get document by tenant and document ID (tenant-scoped)."""
-        return self.db.query(KBDocument).filter(
+    def get_document_by_tenant(
+        self,
+        tenant_id: UUID,
+        document_id: UUID,
+        lock: bool = False
+    ) -> Optional[KBDocument]:
+        """
+        Get document by tenant and document ID (tenant-scoped).
+        
+        With lock, the row is locked FOR UPDATE until the transaction ends.
+        """
+        query = self.db.query(KBDocument).filter(
             and_(
                 KBDocument.id == document_id,
                 KBDocument.tenant_id == tenant_id
             )
-        ).first()
+        )
+        if lock:
+            query = query.with_for_update()
+        return query.first()
     
     def list_documents_by_tenant(
         self,
@@ -43,76 +133,587 @@ class KBRepository:
         
         return documents, total
     
+    def delete_document(self, document: KBDocument) -> int:
+        """
+        Delete a document and all of its chunks.
+        
+        Returns:
+            Number of chunks deleted
+        """
+        deleted = self.delete_document_chunks(document.id)
+        self.db.delete(document)
+        self.db.flush()
+        return deleted
+    
+    def delete_document_chunks(self, document_id: UUID) -> int:
+        """
+        Delete all of a document's chunks.
+        
+        Returns:
+            Number of chunks deleted
+        """
+        chunk_ids = [
+            row.id for row in
+            self.db.query(KBChunk.id).filter(KBChunk.document_id == document_id).all()
+        ]
+        return self.delete_chunks(chunk_ids)
+    
     def create_chunks(self, chunks: List[KBChunk]) -> List[KBChunk]:
         """Create multiple chunks."""
         self.db.add_all(chunks)
         self.db.flush()
         return chunks
     
+    def bulk_create_documents(self, rows: List[dict]) -> None:
+        """
+        Insert documents from column dicts without building ORM objects.
+        
+        Args:
+            rows: One dict of KBDocument column values per document
+        """
+        if rows:
+            self.db.execute(insert(KBDocument), rows)
+    
+    def bulk_create_chunks(self, rows: List[dict]) -> None:
+        """
+        Insert chunks from column dicts without building ORM objects.
+        
+        Rows are sent as batched multi-row INSERTs, so large ingests cost a
+        handful of round trips rather than one per chunk.
+        
+        Args:
+            rows: One dict of KBChunk column values per chunk
+        """
+        if rows:
+            self.db.execute(insert(KBChunk), rows)
+    
+    def copy_chunks(self, rows: List[dict]) -> None:
+        """
+        Insert chunks from column dicts with a binary COPY.
+        
+        On psycopg 3 connections with the pgvector adapters registered (see
+        app.db.session), rows are streamed through COPY kb_chunks FROM STDIN
+        in binary format: no per-row statements, and vectors are sent as
+        packed float32s instead of text. Otherwise this falls back to
+        bulk_create_chunks. Either way the rows join the session's
+        transaction; id and created_at default as in the ORM model.
+        
+        Args:
+            rows: One dict of KBChunk column values per chunk
+        """
+        if not rows:
+            return
+        # Chunks may reference documents still pending in the session
+        self.db.flush()
+        connection = self._copy_connection()
+        if connection is None:
+            self.bulk_create_chunks(rows)
+            return
+        
+        created_at = datetime.utcnow()
+        with connection.cursor() as cursor:
+            with cursor.copy(_CHUNK_COPY_SQL) as copy:
+                copy.set_types([type_name for _, type_name in _CHUNK_COPY_COLUMNS])
+                for row in rows:
+                    copy.write_row((
+                        row.get("id") or uuid.uuid4(),
+                        row["document_id"],
+                        row["chunk_index"],
+                        row.get("text"),
+                        row.get("start_offset"),
+                        row.get("end_offset"),
+                        row.get("content_hash"),
+                        row.get("embedding"),
+                        row.get("embedding_model"),
+                        row.get("embedding_reduced"),
+                        row.get("created_at") or created_at
+                    ))
+    
+    def _copy_connection(self):
+        """The session's psycopg 3 connection, if it can COPY vectors in binary."""
+        if self.db.get_bind().dialect.driver != "psycopg":
+            return None
+        connection = self.db.connection().connection.driver_connection
+        if connection.adapters.types.get("vector") is None:
+            return None
+        return connection
+    
+    def list_chunks(self, document_id: UUID) -> List[KBChunk]:
+        """List a document's chunks in chunk_index order."""
+        return self.db.query(KBChunk).filter(
+            KBChunk.document_id == document_id
+        ).order_by(KBChunk.chunk_index).all()
+    
+    def count_chunks(self, document_id: UUID) -> int:
+        """Count a document's chunks."""
+        return self.db.query(KBChunk).filter(KBChunk.document_id == document_id).count()
+    
+    def get_embeddings_by_hash(
+        self,
+        tenant_id: UUID,
+        content_hashes: Iterable[str],
+        embedding_model: str
+    ) -> Dict[str, np.ndarray]:
+        """
+        Look up stored embeddings for chunk content already in a tenant's KB.
+        
+        Only embeddings computed by the same provider model are returned;
+        chunks embedded by another model (or before models were recorded)
+        are not reused.
+        
+        Args:
+            tenant_id: Tenant ID for scoping
+            content_hashes: Chunk content hashes to look up
+            embedding_model: model_id of the provider that would embed them
+        
+        Returns:
+            Mapping of content hash to embedding for the hashes found
+        """
+        content_hashes = list(content_hashes)
+        if not content_hashes:
+            return {}
+        
+        sql = text("""
+            SELECT DISTINCT ON (kb_chunks.content_hash)
+                   kb_chunks.content_hash, kb_chunks.embedding
+            FROM kb_chunks
+            JOIN kb_documents ON kb_chunks.document_id = kb_documents.id
+            WHERE kb_documents.tenant_id = :tenant_id
+              AND kb_chunks.content_hash = ANY(:content_hashes)
+              AND kb_chunks.embedding_model = :embedding_model
+              AND kb_chunks.embedding IS NOT NULL
+        """).columns(content_hash=String, embedding=KBChunk.embedding.type)
+        
+        rows = self.db.execute(sql, {
+            "tenant_id": str(tenant_id),
+            "content_hashes": content_hashes,
+            "embedding_model": embedding_model
+        }).fetchall()
+        return {row.content_hash: row.embedding for row in rows}
+    
+    def delete_chunks(self, chunk_ids: List[UUID], batch_size: int = DELETE_BATCH_SIZE) -> int:
+        """
+        Delete chunks by ID in batches.
+        
+        Args:
+            chunk_ids: Chunk IDs to delete
+            batch_size: Maximum IDs per DELETE statement
+        
+        Returns:
+            Number of chunks deleted
+        """
+        deleted = 0
+        for offset in range(0, len(chunk_ids), batch_size):
+            batch = chunk_ids[offset:offset + batch_size]
+            result = self.db.execute(
+                delete(KBChunk)
+                .where(KBChunk.id.in_(batch))
+                .execution_options(synchronize_session=False)
+            )
+            deleted += result.rowcount
+        return deleted
+    
+    def get_vector_dimension(self, table: str, column: str) -> Optional[int]:
+        """Declared dimension of a vector column (None if the column is missing)."""
+        return self.db.execute(
+            text(
+                "SELECT atttypmod FROM pg_attribute "
+                "WHERE attrelid = CAST(:table AS regclass) AND attname = :column AND NOT attisdropped"
+            ),
+            {"table": table, "column": column}
+        ).scalar()
+    
+    def get_projection(self, tenant_id: UUID) -> Optional[KBProjection]:
+        """Get a tenant's PCA projection, if one has been fitted."""
+        return self.db.get(KBProjection, tenant_id)
+    
+    def save_projection(self, projection: KBProjection) -> KBProjection:
+        """Insert or replace a tenant's PCA projection."""
+        projection = self.db.merge(projection)
+        self.db.flush()
+        return projection
+    
+    def sample_embeddings(self, tenant_id: UUID, limit: int) -> np.ndarray:
+        """
+        Draw a random sample of a tenant's chunk embeddings.
+        
+        Args:
+            tenant_id: Tenant ID for scoping
+            limit: Maximum embeddings to return
+        
+        Returns:
+            float32 matrix with one row per sampled chunk
+        """
+        sql = text("""
+            SELECT kb_chunks.embedding
+            FROM kb_chunks
+            JOIN kb_documents ON kb_chunks.document_id = kb_documents.id
+            WHERE kb_documents.tenant_id = :tenant_id
+              AND kb_chunks.embedding IS NOT NULL
+            ORDER BY random()
+            LIMIT :limit
+        """).columns(embedding=KBChunk.embedding.type)
+        
+        rows = self.db.execute(sql, {"tenant_id": str(tenant_id), "limit": limit}).fetchall()
+        dimension = KBChunk.embedding.type.dim
+        if not rows:
+            return np.empty((0, dimension), dtype=np.float32)
+        return np.stack([row.embedding for row in rows]).astype(np.float32, copy=False)
+    
+    def iter_embeddings(
+        self,
+        tenant_id: UUID,
+        batch_size: int = PROJECTION_BATCH_SIZE
+    ) -> Iterator[Tuple[List[UUID], np.ndarray]]:
+        """
+        Walk a tenant's chunk embeddings in id order (keyset pagination).
+        
+        Args:
+            tenant_id: Tenant ID for scoping
+            batch_size: Chunks per batch
+        
+        Yields:
+            (chunk IDs, float32 embedding matrix) per batch
+        """
+        sql = text("""
+            SELECT kb_chunks.id, kb_chunks.embedding
+            FROM kb_chunks
+            JOIN kb_documents ON kb_chunks.document_id = kb_documents.id
+            WHERE kb_documents.tenant_id = :tenant_id
+              AND kb_chunks.embedding IS NOT NULL
+              AND kb_chunks.id > CAST(:after AS uuid)
+            ORDER BY kb_chunks.id
+            LIMIT :limit
+        """).columns(id=KBChunk.id.type, embedding=KBChunk.embedding.type)
+        
+        after = str(UUID(int=0))
+        while True:
+            rows = self.db.execute(sql, {
+                "tenant_id": str(tenant_id),
+                "after": after,
+                "limit": batch_size
+            }).fetchall()
+            if not rows:
+                return
+            yield [row.id for row in rows], np.stack([row.embedding for row in rows])
+            after = str(rows[-1].id)
+    
+    def update_reduced_embeddings(self, chunk_ids: List[UUID], reduced: np.ndarray) -> None:
+        """
+        Store PCA-reduced embeddings for chunks.
+        
+        Args:
+            chunk_ids: Chunk IDs
+            reduced: float32 matrix aligned with chunk_ids
+        """
+        if not chunk_ids:
+            return
+        sql = text(
+            "UPDATE kb_chunks SET embedding_reduced = :embedding WHERE id = :id"
+        ).bindparams(bindparam("embedding", type_=KBChunk.embedding_reduced.type))
+        self.db.execute(sql, [
+            {"id": chunk_id, "embedding": vector}
+            for chunk_id, vector in zip(chunk_ids, reduced)
+        ])
+    
     def search_similar(
         self,
         tenant_id: UUID,
-        query_embedding: List[float],
+        query_embedding: Optional[np.ndarray],
         top_k: int = 5,
-        filters: Optional[dict] = None
-    ) -> List[Tuple[KBChunk, float]]:
+        filters: Optional[dict] = None,
+        storage: str = VECTOR_STORAGE_FULL,
+        rescore_overfetch: Optional[int] = None,
+        reduced_embedding: Optional[np.ndarray] = None,
+        mode: str = SEARCH_MODE_VECTOR,
+        query_text: Optional[str] = None,
+        text_search_config: str = "english",
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Row]:
         """
-        Search for similar chunks using pgvector.
+        Search for similar chunks using pgvector, full-text search or both.
+        
+        With a compact storage mode, top_k * rescore_overfetch candidates
+        are pulled through the quantized column's index and reranked by
+        exact cosine distance against the full-precision embedding.
+        Lexical search matches any query term against the chunks' GIN
+        indexed search_vector and ranks by ts_rank_cd. Hybrid search takes
+        top_k * HYBRID_CANDIDATE_FACTOR hits from each and fuses them with
+        reciprocal rank fusion. probes / ef_search set how much of an
+        ivfflat / HNSW index the vector side reads, for the rest of the
+        transaction. Whatever the mode, hits come back hydrated
+        from the same statement as plain rows, so a search is a single
+        round trip and loads nothing into the session.
         
         Args:
             tenant_id: Tenant ID for scoping
-            query_embedding: Query embedding vector
+            query_embedding: Query embedding (float32 array; unused for lexical)
             top_k: Number of results to return
             filters: Optional filters (e.g., {"tags": ["returns"]})
+            storage: Candidate index, one of VECTOR_STORAGE_MODES
+            rescore_overfetch: Candidates per result (None = per-mode default)
+            reduced_embedding: Query in the tenant's PCA space (required for
+                VECTOR_STORAGE_REDUCED)
+            mode: One of SEARCH_MODES
+            query_text: Query text (required for lexical and hybrid)
+            text_search_config: Postgres text search configuration
+            probes: ivfflat lists to scan (None = leave as is)
+            ef_search: HNSW candidate list size (None = leave as is; raised
+                to the number of candidates fetched if lower)
+        
+        Returns:
+            Rows with chunk_id, chunk_index, text, document_id, title and
+            score in [0, 1] (higher is better), ordered by score (desc)
+        """
+        return self.search_similar_batch(
+            tenant_id=tenant_id,
+            query_embeddings=None if query_embedding is None else [query_embedding],
+            top_k=top_k,
+            filters=filters,
+            storage=storage,
+            rescore_overfetch=rescore_overfetch,
+            reduced_embeddings=None if reduced_embedding is None else [reduced_embedding],
+            mode=mode,
+            query_texts=None if query_text is None else [query_text],
+            text_search_config=text_search_config,
+            probes=probes,
+            ef_search=ef_search
+        )[0]
+    
+    def search_similar_batch(
+        self,
+        tenant_id: UUID,
+        query_embeddings: Optional[Sequence[np.ndarray]],
+        top_k: int = 5,
+        filters: Optional[dict] = None,
+        storage: str = VECTOR_STORAGE_FULL,
+        rescore_overfetch: Optional[int] = None,
+        reduced_embeddings: Optional[Sequence[np.ndarray]] = None,
+        mode: str = SEARCH_MODE_VECTOR,
+        query_texts: Optional[Sequence[str]] = None,
+        text_search_config: str = "english",
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> List[List[Row]]:
+        """
+        Run several searches (as search_similar) in one statement.
+        
+        The queries are a VALUES list joined LATERAL to the top-k
+        subquery, so each one gets its own index-ordered scan and limit
+        while the tenant check, planning and hydration happen once.
+        
+        Args:
+            query_embeddings: One embedding per query (unused for lexical)
+            reduced_embeddings: The queries in the tenant's PCA space
+                (required for VECTOR_STORAGE_REDUCED)
+            query_texts: One text per query (required for lexical and hybrid)
+            Other arguments as for search_similar
         
         Returns:
-            List of (chunk, similarity_score) tuples, ordered by similarity (desc)
+            Hit rows (as search_similar, plus query_index) per query, in
+            query order
         """
-        # Build base query with tenant scoping via document
-        # Use pgvector's <=> operator for cosine distance via raw SQL
-        # Convert embedding list to PostgreSQL array format
-        embedding_str = '[' + ','.join(str(x) for x in query_embedding) + ']'
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r}; expected one of {', '.join(SEARCH_MODES)}")
+        if storage not in VECTOR_STORAGE_MODES:
+            raise ValueError(
+                f"Unknown vector storage {storage!r}; expected one of {', '.join(VECTOR_STORAGE_MODES)}"
+            )
+        if mode != SEARCH_MODE_LEXICAL:
+            if query_embeddings is None:
+                raise ValueError(f"{mode.capitalize()} search needs the query embeddings")
+            if storage == VECTOR_STORAGE_REDUCED and reduced_embeddings is None:
+                raise ValueError("Reduced storage needs the query projected with the tenant's projection")
+        if mode != SEARCH_MODE_VECTOR and query_texts is None:
+            raise ValueError(f"{mode.capitalize()} search needs the query text")
+        count = len(query_texts) if mode == SEARCH_MODE_LEXICAL else len(query_embeddings)
+        if count == 0:
+            return []
         
-        # Build SQL query
-        sql_base = """
-            SELECT kb_chunks.id, 
-                   (kb_chunks.embedding <=> :embedding::vector) as distance
+        # Tenant scoping via document
+        sql_from = """
             FROM kb_chunks
             JOIN kb_documents ON kb_chunks.document_id = kb_documents.id
-            WHERE kb_documents.tenant_id = :tenant_id
         """
+        sql_where = "WHERE kb_documents.tenant_id = :tenant_id"
         
         params = {
-            "embedding": embedding_str,
-            "tenant_id": str(tenant_id)
+            "tenant_id": str(tenant_id),
+            "top_k": top_k
         }
         
         # Add tag filter if provided
         if filters and "tags" in filters and filters["tags"]:
             tags = filters["tags"]
-            sql_base += " AND kb_documents.tags && :tags::text[]"
+            sql_where += " AND kb_documents.tags && CAST(:tags AS text[])"
             params["tags"] = tags
         
-        sql_base += " ORDER BY distance LIMIT :top_k"
-        params["top_k"] = top_k
-        
-        # Execute raw SQL
-        result = self.db.execute(text(sql_base), params)
-        rows = result.fetchall()
-        
-        # Fetch chunks and build results
-        chunks_with_scores = []
-        for row in rows:
-            chunk_id = row.id
-            distance = float(row.distance)
-            
-            # Get chunk object
-            chunk = self.db.query(KBChunk).filter(KBChunk.id == chunk_id).first()
-            if chunk:
-                # Convert distance to similarity score (higher is better)
-                # cosine_distance returns [0, 2], similarity = 1 - distance/2
-                similarity = 1.0 - (distance / 2.0)
-                chunks_with_scores.append((chunk, similarity))
-        
-        return chunks_with_scores
-
+        if mode == SEARCH_MODE_VECTOR:
+            sql_hits = f"""
+                SELECT vector_hits.id, 1 - vector_hits.distance / 2 AS score
+                FROM ({self._vector_hits_sql(sql_from, sql_where, storage)}) AS vector_hits
+            """
+            params["vector_limit"] = top_k
+        elif mode == SEARCH_MODE_LEXICAL:
+            sql_hits = self._lexical_hits_sql(sql_from, sql_where)
+            params["lexical_limit"] = top_k
+        else:
+            # Reciprocal rank fusion, scaled so a hit ranked first by both is 1
+            sql_hits = f"""
+                SELECT fused.id,
+                       CAST(SUM(1.0 / (:rrf_k + fused.rank)) * (:rrf_k + 1) / 2 AS double precision) AS score
+                FROM (
+                    SELECT vector_hits.id, row_number() OVER (ORDER BY vector_hits.distance) AS rank
+                    FROM ({self._vector_hits_sql(sql_from, sql_where, storage)}) AS vector_hits
+                    UNION ALL
+                    SELECT lexical_hits.id, row_number() OVER (ORDER BY lexical_hits.score DESC) AS rank
+                    FROM ({self._lexical_hits_sql(sql_from, sql_where)}) AS lexical_hits
+                ) AS fused
+                GROUP BY fused.id
+                ORDER BY score DESC
+                LIMIT :top_k
+            """
+            params["vector_limit"] = params["lexical_limit"] = top_k * HYBRID_CANDIDATE_FACTOR
+            params["rrf_k"] = RRF_K
+        
+        # One row per query with what the hit subqueries read from it.
+        # Embeddings are bound through the column type so psycopg sends the
+        # float32 arrays in binary form.
+        columns = ["query_index"]
+        if mode != SEARCH_MODE_LEXICAL:
+            columns.append("embedding")
+            if storage == VECTOR_STORAGE_REDUCED:
+                columns.append("reduced_embedding")
+        if mode != SEARCH_MODE_VECTOR:
+            columns.append("lexical_query")
+            params["text_search_config"] = text_search_config
+        
+        values = []
+        binds = []
+        for i in range(count):
+            row = [str(i)]
+            if mode != SEARCH_MODE_LEXICAL:
+                row.append(f"CAST(:embedding_{i} AS vector)")
+                params[f"embedding_{i}"] = query_embeddings[i]
+                binds.append(bindparam(f"embedding_{i}", type_=KBChunk.embedding.type))
+                if storage == VECTOR_STORAGE_REDUCED:
+                    row.append(f"CAST(:reduced_embedding_{i} AS vector)")
+                    params[f"reduced_embedding_{i}"] = reduced_embeddings[i]
+                    binds.append(bindparam(f"reduced_embedding_{i}", type_=KBChunk.embedding_reduced.type))
+            if mode != SEARCH_MODE_VECTOR:
+                row.append(_LEXICAL_QUERY_SQL.format(query_text=f":query_text_{i}"))
+                params[f"query_text_{i}"] = query_texts[i]
+            values.append(f"({', '.join(row)})")
+        
+        if mode != SEARCH_MODE_LEXICAL:
+            if storage != VECTOR_STORAGE_FULL:
+                overfetch = rescore_overfetch or DEFAULT_RESCORE_OVERFETCH[storage]
+                params["vector_candidates"] = params["vector_limit"] * max(1, overfetch)
+            self._set_search_effort(probes, ef_search, params.get("vector_candidates", params["vector_limit"]))
+        
+        # Hydrate only the top_k hits, in the same statement. Chunk text is
+        # sliced from the document in Postgres (legacy rows carry their own)
+        sql_base = f"""
+            WITH queries ({', '.join(columns)}) AS (
+                VALUES {', '.join(values)}
+            )
+            SELECT queries.query_index,
+                   hits.id AS chunk_id,
+                   kb_chunks.chunk_index,
+                   COALESCE(
+                       kb_chunks.text,
+                       substr(kb_documents.content, kb_chunks.start_offset + 1,
+                              kb_chunks.end_offset - kb_chunks.start_offset),
+                       ''
+                   ) AS text,
+                   kb_documents.id AS document_id,
+                   kb_documents.title,
+                   hits.score
+            FROM queries
+            CROSS JOIN LATERAL ({sql_hits}) AS hits
+            JOIN kb_chunks ON kb_chunks.id = hits.id
+            JOIN kb_documents ON kb_documents.id = kb_chunks.document_id
+            ORDER BY queries.query_index, hits.score DESC
+        """
+        
+        results: List[List[Row]] = [[] for _ in range(count)]
+        for row in self.db.execute(text(sql_base).bindparams(*binds), params):
+            results[row.query_index].append(row)
+        return results
+    
+    def search_exact(
+        self,
+        tenant_id: UUID,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        filters: Optional[dict] = None,
+        **options: Any
+    ) -> List[Row]:
+        """
+        Exact nearest chunks for a vector search.
+        
+        Index scans are disabled for the rest of the transaction, so the
+        vector indexes are bypassed for a sequential scan; this is the
+        ground truth ANN search recall is measured against. With a compact
+        storage mode (options as for search_similar) the candidates are the
+        exact nearest by the compact vectors, rescored at full precision,
+        so only the index's own loss separates it from the ANN search.
+        Callers should end the transaction afterwards.
+        
+        Returns:
+            Rows as for search_similar in vector mode
+        """
+        self.db.execute(text("SELECT set_config('enable_indexscan', 'off', true)"))
+        return self.search_similar(tenant_id, query_embedding, top_k, filters, **options)
+    
+    def _set_search_effort(self, probes: Optional[int], ef_search: Optional[int], candidates: int) -> None:
+        """Set ivfflat.probes / hnsw.ef_search until the transaction ends."""
+        assignments = []
+        params = {}
+        if probes is not None:
+            assignments.append("set_config('ivfflat.probes', :probes, true)")
+            params["probes"] = str(probes)
+        if ef_search is not None:
+            # An HNSW scan returns at most ef_search rows
+            assignments.append("set_config('hnsw.ef_search', :ef_search, true)")
+            params["ef_search"] = str(min(max(ef_search, candidates), HNSW_MAX_EF_SEARCH))
+        if assignments:
+            self.db.execute(text(f"SELECT {', '.join(assignments)}"), params)
+    
+    @staticmethod
+    def _vector_hits_sql(sql_from: str, sql_where: str, storage: str) -> str:
+        """Nearest :vector_limit chunks to queries.embedding as (id, distance) by exact cosine distance."""
+        if storage == VECTOR_STORAGE_FULL:
+            return f"""
+                SELECT kb_chunks.id,
+                       (kb_chunks.embedding <=> queries.embedding) as distance
+                {sql_from}
+                {sql_where}
+                ORDER BY distance LIMIT :vector_limit
+            """
+        candidate_order = _CANDIDATE_ORDER[storage].format(dim=KBChunk.embedding.type.dim)
+        return f"""
+            SELECT candidates.id,
+                   (candidates.embedding <=> queries.embedding) as distance
+            FROM (
+                SELECT kb_chunks.id, kb_chunks.embedding
+                {sql_from}
+                {sql_where}
+                ORDER BY {candidate_order}
+                LIMIT :vector_candidates
+            ) AS candidates
+            ORDER BY distance LIMIT :vector_limit
+        """
+    
+    @staticmethod
+    def _lexical_hits_sql(sql_from: str, sql_where: str) -> str:
+        """Best :lexical_limit matches for queries.lexical_query as (id, score in [0, 1))."""
+        # Normalization 32 maps rank to rank / (rank + 1)
+        return f"""
+            SELECT kb_chunks.id,
+                   ts_rank_cd(kb_chunks.search_vector, queries.lexical_query, 32) AS score
+            {sql_from}
+            {sql_where} AND kb_chunks.search_vector @@ queries.lexical_query
+            ORDER BY score DESC LIMIT :lexical_limit
+        """
@@ -14,6 +14,60 @@ class KBDocumentResponse(BaseModel):
     document_id: str
     status: str  # INGESTED, PENDING, FAILED
     chunks_created: int
+    job_id: Optional[str] = None  # Set when queued for background ingestion
+
+class KBIngestJobResponse(BaseModel):
+    """GET /tenants/{tenant_id}/kb/jobs/{job_id} response."""
+    job_id: str
+    document_id: str
+    status: str  # QUEUED, RUNNING, SUCCEEDED, FAILED
+    attempts: int
+    chunks_total: Optional[int] = None  # Known once a worker has chunked the document
+    chunks_processed: int
+    chunks_embedded: int  # Chunks sent to the embeddings provider
+    error: Optional[str] = None  # Last failure (also set while a retry is queued)
+    created_at: str
+    started_at: Optional[str] = None  # Latest attempt
+    finished_at: Optional[str] = None
+
+class KBBulkDocumentResult(BaseModel):
+    """Per-document result of POST /tenants/{tenant_id}/kb/documents:bulk."""
+    line: int  # 1-based NDJSON line number
+    document_id: Optional[str] = None  # Set when ingested
+    title: Optional[str] = None
+    status: str  # INGESTED or FAILED
+    chunks_created: int
+    error: Optional[str] = None
+
+class KBBulkIngestResponse(BaseModel):
+    """POST /tenants/{tenant_id}/kb/documents:bulk response."""
+    documents: List[KBBulkDocumentResult]
+    documents_ingested: int
+    documents_failed: int
+    chunks_created: int
+    chunks_embedded: int  # Chunks sent to the embeddings provider
+
+class KBDocumentUpdate(BaseModel):
+    """PATCH /tenants/{tenant_id}/kb/documents/{document_id} request."""
+    source_type: Optional[str] = None
+    title: Optional[str] = None
+    tags: Optional[List[str]] = None
+    content: Optional[str] = None
+
+class KBDocumentUpdateResponse(BaseModel):
+    """PATCH /tenants/{tenant_id}/kb/documents/{document_id} response."""
+    document_id: str
+    status: str
+    chunks_total: int
+    chunks_embedded: int  # Chunks sent to the embeddings provider
+    chunks_reused: int  # Chunks that kept or reused an existing embedding
+    chunks_deleted: int
+
+class KBDocumentDeleteResponse(BaseModel):
+    """DELETE /tenants/{tenant_id}/kb/documents/{document_id} response."""
+    document_id: str
+    deleted: bool
+    chunks_deleted: int
 
 class KBDocumentListItem(BaseModel):
     """List item for GET /tenants/{tenant_id}/kb/documents."""
@@ -29,10 +83,24 @@ class KBSearchRequest(BaseModel):
     query: str
     top_k: int = Field(default=5, ge=1, le=50)
     filters: Optional[Dict[str, Any]] = Field(default_factory=dict)
+    mode: Optional[str] = None  # vector, lexical or hybrid (None = tenant default)
+    # Vector index search effort (None = tenant default); higher trades latency for recall
+    probes: Optional[int] = Field(default=None, ge=1, le=32768)  # ivfflat lists scanned
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)  # HNSW candidate list size
+
+class KBSearchBatchRequest(BaseModel):
+    """POST /tenants/{tenant_id}/kb/search:batch request (options apply to every query)."""
+    queries: List[str]  # At most KB_SEARCH_BATCH_MAX_QUERIES
+    top_k: int = Field(default=5, ge=1, le=50)
+    filters: Optional[Dict[str, Any]] = Field(default_factory=dict)
+    mode: Optional[str] = None
+    probes: Optional[int] = Field(default=None, ge=1, le=32768)
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
 
 class KBSearchHit(BaseModel):
     """Search hit in response."""
     chunk_id: str
+    chunk_index: int  # Position within the document
     score: float  # Similarity score (higher is better)
     text: str
     document: Dict[str, str]  # {"document_id": "...", "title": "..."}
@@ -41,3 +109,25 @@ class KBSearchResponse(BaseModel):
     """POST /tenants/{tenant_id}/kb/search response."""
     hits: List[KBSearchHit]
 
+class KBSearchBatchResult(BaseModel):
+    """Hits for one query of a search batch."""
+    query: str
+    hits: List[KBSearchHit]
+
+class KBSearchBatchResponse(BaseModel):
+    """POST /tenants/{tenant_id}/kb/search:batch response."""
+    results: List[KBSearchBatchResult]  # In request order
+
+
+class KBProjectionFitRequest(BaseModel):
+    """POST /tenants/{tenant_id}/kb/projection request."""
+    sample_size: Optional[int] = Field(default=None, ge=2, le=1_000_000)
+
+class KBProjectionResponse(BaseModel):
+    """GET/POST /tenants/{tenant_id}/kb/projection response."""
+    source_dimension: int
+    dimension: int
+    explained_variance: float  # Fraction of sample variance kept
+    sample_size: int
+    fitted_at: str
+    chunks_reduced: Optional[int] = None  # Set when fitting
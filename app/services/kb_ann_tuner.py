@@ -0,0 +1,102 @@
+"""Periodic per-tenant tuning of ANN search effort."""
+import asyncio
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.session import SessionLocal
+from app.services.kb_service import KBService, sampled_search_tenants
+
+logger = get_logger(__name__)
+
+class KBANNTuner:
+    """
+    Re-tunes probes / ef_search for every tenant searched recently.
+    
+    Query samples are kept by KBService in the process serving searches,
+    so the tuner runs in the API process. Each round tunes one tenant at
+    a time in a worker thread (the replayed searches are synchronous).
+    """
+    
+    def __init__(
+        self,
+        interval_seconds: Optional[float] = None,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.interval_seconds = (
+            settings.KB_ANN_TUNE_INTERVAL_SECONDS if interval_seconds is None
+            else interval_seconds
+        )
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """Start tuning periodically on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="kb-ann-tuner")
+    
+    async def stop(self) -> None:
+        """Stop tuning (a round already running finishes in its thread)."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+    
+    def run_once(self) -> int:
+        """
+        Tune every tenant with sampled queries.
+        
+        Returns:
+            Number of tenants whose search effort was stored
+        """
+        tuned = 0
+        for tenant_id in sampled_search_tenants():
+            db = self.session_factory()
+            try:
+                tuning = KBService(db).tune_ann_search(tenant_id)
+            except Exception as e:
+                logger.error(f"KB ANN tuning failed for tenant {tenant_id}: {e}")
+                continue
+            finally:
+                db.close()
+            if tuning is None:
+                continue
+            if tuning["recall"] < settings.KB_ANN_TUNE_RECALL_TARGET:
+                logger.warning(
+                    f"KB ANN tuning for tenant {tenant_id}: recall {tuning['recall']} below target "
+                    f"even at {tuning['setting']}={tuning['value']}; search effort left unchanged"
+                )
+            else:
+                tuned += 1
+                logger.info(
+                    f"KB ANN tuning for tenant {tenant_id}: {tuning['setting']}={tuning['value']} "
+                    f"(recall {tuning['recall']} over {tuning['queries']} queries)"
+                )
+        return tuned
+    
+    async def _loop(self) -> None:
+        """Tune every interval until stopped."""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"KB ANN tuner error: {e}")
+
+_tuner: Optional[KBANNTuner] = None
+
+def start_kb_ann_tuner() -> None:
+    """Start the in-process tuner (KB_ANN_TUNE_INTERVAL_SECONDS > 0)."""
+    global _tuner
+    if settings.KB_ANN_TUNE_INTERVAL_SECONDS <= 0 or _tuner is not None:
+        return
+    _tuner = KBANNTuner()
+    _tuner.start()
+
+async def stop_kb_ann_tuner() -> None:
+    """Stop the in-process tuner if it was started."""
+    global _tuner
+    if _tuner is not None:
+        await _tuner.stop()
+        _tuner = None
@@ -0,0 +1,198 @@
+"""Background workers for queued KB document ingestion."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.errors import APIError
+from app.core.logging import get_logger
+from app.db.session import SessionLocal
+from app.repositories.kb_ingest_job import KBIngestJobRepository
+from app.services.kb_service import KBService
+
+logger = get_logger(__name__)
+
+class KBIngestWorkerPool:
+    """
+    Asyncio workers that drain the kb_ingest_jobs queue.
+    
+    Each worker claims one job at a time (FOR UPDATE SKIP LOCKED, so pools
+    in several processes can share the queue), ingests its document in a
+    session of its own and reports progress through a second session so
+    pollers see it before the document commits. Failed jobs are retried
+    with exponential backoff up to max_attempts; client errors (e.g. the
+    document was deleted) fail immediately. Queue updates are fenced on
+    the claim's attempt number and, like all database work, kept off the
+    event loop.
+    """
+    
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        retry_backoff_seconds: Optional[float] = None,
+        stale_after_seconds: Optional[float] = None,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.workers = settings.KB_INGEST_WORKERS if workers is None else workers
+        self.poll_seconds = settings.KB_INGEST_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.max_attempts = settings.KB_INGEST_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.retry_backoff_seconds = (
+            settings.KB_INGEST_RETRY_BACKOFF_SECONDS if retry_backoff_seconds is None
+            else retry_backoff_seconds
+        )
+        self.stale_after_seconds = (
+            settings.KB_INGEST_STALE_AFTER_SECONDS if stale_after_seconds is None
+            else stale_after_seconds
+        )
+        self.session_factory = session_factory
+        self._tasks: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+    
+    def start(self) -> None:
+        """Start the workers on the running event loop."""
+        if self._tasks:
+            return
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"kb-ingest-worker-{i}")
+            for i in range(self.workers)
+        ]
+    
+    async def stop(self) -> None:
+        """
+        Stop the workers.
+        
+        Jobs in flight are cancelled and requeued to run again right away
+        (by this or another process).
+        """
+        if not self._tasks:
+            return
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def run_once(self) -> bool:
+        """
+        Claim and process one job.
+        
+        Returns:
+            False if no job was runnable
+        """
+        claim = await asyncio.to_thread(self._claim)
+        if claim is None:
+            return False
+        await self._process(claim)
+        return True
+    
+    async def _work(self) -> None:
+        """Worker loop: drain the queue, then poll until stopped."""
+        while not self._stopping.is_set():
+            try:
+                found = await self.run_once()
+            except Exception as e:
+                # E.g. the database is unreachable; keep polling
+                logger.error(f"KB ingest worker error: {e}")
+                found = False
+            if not found:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+    
+    def _claim(self) -> Optional[Any]:
+        """Claim the next runnable job, if any."""
+        db = self.session_factory()
+        try:
+            return KBIngestJobRepository(db).claim_next(self.stale_after_seconds)
+        finally:
+            db.close()
+    
+    async def _process(self, claim: Any) -> None:
+        """Ingest a claimed job's document and record the outcome."""
+        loop = asyncio.get_running_loop()
+        db = self.session_factory()
+        progress_db = self.session_factory()
+        # Queue updates run in order on one thread of their own: off the
+        # event loop, and never two at once on the progress session
+        progress_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kb-ingest-progress")
+        jobs = KBIngestJobRepository(progress_db)
+        
+        def record(update: Callable[..., Any], *args: Any) -> Awaitable[Any]:
+            return loop.run_in_executor(progress_executor, update, *args)
+        
+        try:
+            if claim.attempts > self.max_attempts:
+                # Reclaimed after its last attempt's worker died
+                await record(jobs.fail, claim.id, claim.attempts, f"Gave up after {self.max_attempts} attempts")
+                return
+            
+            def on_progress(stored: int, embedded: int, total: int) -> None:
+                # Called from the ingest; written in the background
+                progress_executor.submit(jobs.update_progress, claim.id, claim.attempts, stored, embedded, total)
+            
+            try:
+                await KBService(db).aingest_queued_document(
+                    claim.tenant_id, claim.document_id, on_progress
+                )
+            except asyncio.CancelledError:
+                await record(jobs.requeue, claim.id, claim.attempts, "Worker stopped", 0)
+                raise
+            except Exception as e:
+                await record(self._record_failure, jobs, claim, e)
+            else:
+                if not await record(jobs.complete, claim.id, claim.attempts):
+                    logger.warning(f"KB ingest job {claim.id} attempt {claim.attempts} was reclaimed by another worker")
+        finally:
+            # After any progress updates still queued
+            await record(progress_db.close)
+            progress_executor.shutdown(wait=False)
+            await asyncio.to_thread(db.close)
+    
+    def _record_failure(self, jobs: KBIngestJobRepository, claim: Any, error: Exception) -> None:
+        """Requeue a failed job with backoff, or fail it and its document."""
+        message = error.message if isinstance(error, APIError) else str(error)
+        retryable = not (isinstance(error, APIError) and error.status_code < 500)
+        if retryable and claim.attempts < self.max_attempts:
+            delay = self.retry_backoff_seconds * 2 ** (claim.attempts - 1)
+            logger.warning(
+                f"KB ingest job {claim.id} attempt {claim.attempts} failed, "
+                f"retrying in {delay:.0f}s: {message}"
+            )
+            jobs.requeue(claim.id, claim.attempts, message, delay)
+        else:
+            logger.error(f"KB ingest job {claim.id} failed: {message}")
+            jobs.fail(claim.id, claim.attempts, message)
+
+_pool: Optional[KBIngestWorkerPool] = None
+
+def start_kb_ingest_workers() -> None:
+    """Start the in-process worker pool (KB_INGEST_WORKERS > 0)."""
+    global _pool
+    if settings.KB_INGEST_WORKERS <= 0 or _pool is not None:
+        return
+    _pool = KBIngestWorkerPool()
+    _pool.start()
+
+async def stop_kb_ingest_workers() -> None:
+    """Stop the in-process worker pool if it was started."""
+    global _pool
+    if _pool is not None:
+        await _pool.stop()
+        _pool = None
+
+async def _main() -> None:
+    """Run a standalone worker pool until interrupted."""
+    pool = KBIngestWorkerPool(workers=max(1, settings.KB_INGEST_WORKERS))
+    pool.start()
+    logger.info(f"KB ingest workers started: {pool.workers}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+
+if __name__ == "__main__":
+    asyncio.run(_main())
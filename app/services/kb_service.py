@@ -1,24 +1,341 @@
 """KB service for document ingestion and search."""
-from typing import List
+import asyncio
+import threading
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Generator, Iterator, List, Optional, Tuple, Union
 from uuid import UUID
+import numpy as np
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 from app.db.models.kb_document import KBDocument
-from app.db.models.kb_chunk import KBChunk
-from app.repositories.kb_repo import KBRepository
+from app.db.models.kb_projection import KBProjection
+from app.db.models.kb_ingest_job import KBIngestJob
+from app.db.models.tenant import Tenant
+from app.repositories.kb_repo import (
+    HNSW_DEFAULT_EF_SEARCH, HNSW_MAX_EF_SEARCH, IVFFLAT_MAX_PROBES, KBRepository,
+    SEARCH_MODE_LEXICAL, SEARCH_MODE_VECTOR, SEARCH_MODES,
+    VECTOR_STORAGE_BIT, VECTOR_STORAGE_FULL, VECTOR_STORAGE_HALFVEC, VECTOR_STORAGE_REDUCED
+)
 from app.repositories.tenant import TenantRepository
+from app.repositories.kb_ingest_job import KBIngestJobRepository
 from app.providers.embeddings.base import EmbeddingsProvider
-from app.providers.embeddings.deterministic import DeterministicEmbeddingsProvider
-from app.core.chunking import chunk_text
+from app.providers.embeddings.factory import get_embeddings_provider
+from app.core.chunking import (
+    CHUNK_MODE_CHARS, CHUNK_MODES, PARALLEL_CHUNKING_MIN_CHARS, Span,
+    chunk_documents, hash_chunk_text, iter_document_spans
+)
+from app.core.tokenization import RegexTokenizer, Tokenizer
 from app.core.errors import APIError
+from app.core.projection import PCAProjection
+from app.schemas.kb import KBDocumentCreate
+from app.core.config import KB_PCA_DIMENSION, settings
+
+# Number of chunks embedded and flushed together during ingestion
+INGEST_BATCH_SIZE = 64
+
+# Bulk ingest commits documents in groups of at least this many chunks
+BULK_TRANSACTION_CHUNKS = 2048
+
+# Ingest/update flows yield (tenant_id, texts, hashes) whenever they need
+# embeddings and are sent back (matrix, embedded_count), or yield a whole
+# ChunkStream and are sent back (chunks stored, embedded_count); see _run / _arun
+EmbedRequest = Tuple[UUID, List[str], List[str]]
+EmbedResult = Tuple[np.ndarray, int]
+EmbedSteps = Generator[Union[EmbedRequest, "ChunkStream"], Union[EmbedResult, Tuple[int, int]], Any]
+
+# One batch of a document's chunks: (spans, texts, content hashes)
+ChunkBatch = Tuple[List[Span], List[str], List[str]]
+
+# Bulk ingest input: (line number, document or None, error message or None)
+BulkItem = Tuple[int, Optional[KBDocumentCreate], Optional[str]]
+
+# Recently used tenant projections, keyed by tenant and checked against the
+# stored fit time so refits are picked up without reloading on every query
+PROJECTION_CACHE_SIZE = 64
+_projection_cache: "OrderedDict[UUID, Tuple[datetime, PCAProjection]]" = OrderedDict()
+_projection_cache_lock = threading.Lock()
+
+# Generated columns behind the halfvec / bit storage modes; only created by
+# the kb_chunk_quantized migration with KB_QUANTIZED_STORAGE, and looked up
+# until found (they are never dropped while the app runs)
+QUANTIZED_COLUMNS = ("embedding_half", "embedding_bit")
+_quantized_columns_found = False
+
+# Recent vector search queries (embedding, top_k, filters) per tenant,
+# replayed by tune_ann_search; the least recently searched tenants are dropped
+QUERY_SAMPLE_TENANTS = 256
+QuerySample = Tuple[np.ndarray, int, Optional[dict]]
+_query_samples: "OrderedDict[UUID, deque[QuerySample]]" = OrderedDict()
+_query_samples_lock = threading.Lock()
+
+# Search effort setting tuned per KB_VECTOR_INDEX and the values tried,
+# cheapest first
+ANN_TUNE_CANDIDATES = {
+    "ivfflat": ("probes", (1, 2, 4, 8, 16, 32, 64, 128, 256)),
+    "hnsw": ("ef_search", (10, 20, 40, 80, 160, 320, 640, 1000)),
+}
+
+def sampled_search_tenants() -> List[UUID]:
+    """Tenants with recent vector search queries sampled in this process."""
+    with _query_samples_lock:
+        return list(_query_samples)
+
+class ChunkStream:
+    """
+    A document's chunks for the flow driver to embed and store.
+    
+    _run embeds and writes one batch at a time; _arun pipelines the
+    batches (see KBService._astore_chunks). Nothing is committed.
+    
+    Args:
+        document: Document the chunks belong to
+        content: Document content the spans index into
+        spans: Chunk spans
+        projection: Tenant PCA projection, if fitted
+        on_batch: Called with (chunks stored, texts embedded) after each batch
+    """
+    
+    def __init__(
+        self,
+        document: KBDocument,
+        content: str,
+        spans: Iterator[Span],
+        projection: Optional[PCAProjection],
+        on_batch: Optional[Callable[[int, int], None]] = None
+    ):
+        self.document = document
+        self.content = content
+        self.spans = spans
+        self.projection = projection
+        self.on_batch = on_batch
 
 class KBService:
     """Service for KB operations."""
     
-    def __init__(self, db: Session, embeddings_provider: EmbeddingsProvider = None):
+    def __init__(
+        self,
+        db: Session,
+        embeddings_provider: EmbeddingsProvider = None,
+        tokenizer: Tokenizer = None
+    ):
         self.db = db
         self.kb_repo = KBRepository(db)
         self.tenant_repo = TenantRepository(db)
-        self.embeddings_provider = embeddings_provider or DeterministicEmbeddingsProvider()
+        self.job_repo = KBIngestJobRepository(db)
+        self.embeddings_provider = embeddings_provider or get_embeddings_provider()
+        self.tokenizer = tokenizer or RegexTokenizer()
+    
+    def _chunking_options(self, tenant: Tenant) -> dict:
+        """
+        Resolve chunking options from tenant features.
+        
+        Tenants opt in via features["kb_chunking"], e.g.
+        {"mode": "tokens", "chunk_size": 256, "chunk_overlap": 32}.
+        Missing keys fall back to the per-mode defaults.
+        
+        Raises:
+            APIError: VALIDATION_ERROR for an unknown mode or a size or
+                overlap that is not an integer in range
+        """
+        config = (tenant.features or {}).get("kb_chunking") or {}
+        options = {
+            "mode": config.get("mode", CHUNK_MODE_CHARS),
+            "chunk_size": config.get("chunk_size"),
+            "chunk_overlap": config.get("chunk_overlap"),
+            "tokenizer": self.tokenizer
+        }
+        problem = None
+        if not isinstance(options["mode"], str) or options["mode"] not in CHUNK_MODES:
+            problem = f"mode must be one of {', '.join(CHUNK_MODES)}"
+        elif not self._is_int_at_least(options["chunk_size"], 1):
+            problem = "chunk_size must be a positive integer"
+        elif not self._is_int_at_least(options["chunk_overlap"], 0):
+            problem = "chunk_overlap must be a non-negative integer"
+        if problem is not None:
+            raise APIError(
+                code="VALIDATION_ERROR",
+                message=f"Invalid KB chunking config for tenant {tenant.id}: {problem}",
+                status_code=400
+            )
+        return options
+    
+    @staticmethod
+    def _is_int_at_least(value: Any, minimum: int) -> bool:
+        """Whether an optional setting is unset or an int (not a bool) >= minimum."""
+        return value is None or (isinstance(value, int) and not isinstance(value, bool) and value >= minimum)
+    
+    def _search_options(self, tenant: Tenant) -> dict:
+        """
+        Resolve search options from tenant features.
+        
+        Tenants opt in via features["kb_search"], e.g.
+        {"mode": "hybrid", "storage": "halfvec", "rescore_overfetch": 8,
+        "probes": 10, "ef_search": 100}. Missing keys fall back to
+        KB_SEARCH_MODE, KB_VECTOR_STORAGE, KB_RESCORE_OVERFETCH,
+        KB_IVFFLAT_PROBES and KB_HNSW_EF_SEARCH.
+        """
+        config = (tenant.features or {}).get("kb_search") or {}
+        return {
+            "mode": config.get("mode", settings.KB_SEARCH_MODE),
+            "storage": config.get("storage", settings.KB_VECTOR_STORAGE),
+            "rescore_overfetch": config.get("rescore_overfetch", settings.KB_RESCORE_OVERFETCH),
+            "probes": config.get("probes", settings.KB_IVFFLAT_PROBES),
+            "ef_search": config.get("ef_search", settings.KB_HNSW_EF_SEARCH)
+        }
+    
+    def _search_mode(self, tenant: Tenant, mode: Optional[str]) -> str:
+        """Resolve the search mode (request, then tenant default) or raise VALIDATION_ERROR."""
+        mode = mode or self._search_options(tenant)["mode"]
+        if mode not in SEARCH_MODES:
+            raise APIError(
+                code="VALIDATION_ERROR",
+                message=f"Unknown search mode '{mode}', expected one of {', '.join(SEARCH_MODES)}",
+                status_code=400
+            )
+        return mode
+    
+    @staticmethod
+    def _check_search_effort(name: str, value: Any, maximum: int) -> None:
+        """Raise VALIDATION_ERROR unless value is None or an int in [1, maximum]."""
+        if value is None:
+            return
+        if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= maximum:
+            raise APIError(
+                code="VALIDATION_ERROR",
+                message=f"{name} must be an integer between 1 and {maximum}",
+                status_code=400
+            )
+    
+    def _split_known(
+        self,
+        tenant_id: UUID,
+        texts: List[str],
+        hashes: List[str]
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, str]]:
+        """
+        Find which chunk texts the tenant already has embeddings for.
+        
+        Returns:
+            (content hash -> stored embedding, content hash -> text still to embed)
+        """
+        known = self.kb_repo.get_embeddings_by_hash(tenant_id, set(hashes), self.embeddings_provider.model_id)
+        missing: Dict[str, str] = {}
+        for content_hash, text in zip(hashes, texts):
+            if content_hash not in known and content_hash not in missing:
+                missing[content_hash] = text
+        return known, missing
+    
+    def _assemble_embeddings(self, known: Dict[str, np.ndarray], hashes: List[str]) -> np.ndarray:
+        """Stack embeddings into a float32 matrix aligned with hashes."""
+        embeddings = np.empty((len(hashes), self.embeddings_provider.dimension), dtype=np.float32)
+        for row, content_hash in enumerate(hashes):
+            embeddings[row] = known[content_hash]
+        return embeddings
+    
+    def _embed_deduplicated(
+        self,
+        tenant_id: UUID,
+        texts: List[str],
+        hashes: List[str]
+    ) -> EmbedResult:
+        """
+        Embed chunk texts, reusing embeddings the tenant already stores.
+        
+        Content seen anywhere in the tenant's KB (matched by content hash)
+        is not sent to the provider again, and duplicates within the batch
+        are embedded once.
+        
+        Args:
+            tenant_id: Tenant ID
+            texts: Chunk texts
+            hashes: Content hashes aligned with texts
+        
+        Returns:
+            (float32 matrix with one row per text, number of texts actually embedded)
+        """
+        known, missing = self._split_known(tenant_id, texts, hashes)
+        if missing:
+            vectors = self.embeddings_provider.embed_documents_array(list(missing.values()))
+            known.update(zip(missing.keys(), vectors))
+        return self._assemble_embeddings(known, hashes), len(missing)
+    
+    async def _aembed_deduplicated(
+        self,
+        tenant_id: UUID,
+        texts: List[str],
+        hashes: List[str],
+        db_executor: Optional[Executor] = None
+    ) -> EmbedResult:
+        """
+        Async variant of _embed_deduplicated (provider calls do not block the loop).
+        
+        With db_executor, the stored-embedding lookup runs there instead of
+        on the event loop (see _astore_chunks).
+        """
+        if db_executor is None:
+            known, missing = self._split_known(tenant_id, texts, hashes)
+        else:
+            known, missing = await asyncio.get_running_loop().run_in_executor(
+                db_executor, self._split_known, tenant_id, texts, hashes
+            )
+        if missing:
+            vectors = await self.embeddings_provider.aembed_documents_array(list(missing.values()))
+            known.update(zip(missing.keys(), vectors))
+        return self._assemble_embeddings(known, hashes), len(missing)
+    
+    def _run(self, steps: EmbedSteps) -> Any:
+        """Drive an ingest/update flow, embedding synchronously."""
+        reply: Any = None
+        error: Optional[Exception] = None
+        while True:
+            try:
+                request = steps.send(reply) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                if isinstance(request, ChunkStream):
+                    reply, error = self._store_chunks(request), None
+                else:
+                    reply, error = self._embed_deduplicated(*request), None
+            except Exception as e:
+                reply, error = None, e
+    
+    @staticmethod
+    def _advance(steps: EmbedSteps, reply: Any, error: Optional[Exception]) -> Tuple[bool, Any]:
+        """Resume a flow: (True, its result) once finished, else (False, its next request)."""
+        try:
+            return False, steps.send(reply) if error is None else steps.throw(error)
+        except StopIteration as stop:
+            return True, stop.value
+    
+    async def _arun(self, steps: EmbedSteps, db_executor: Optional[Executor] = None) -> Any:
+        """
+        Drive an ingest/update flow, awaiting the async embeddings interface.
+        
+        With db_executor, the flow's own steps (its database work between
+        requests) run there instead of on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        reply: Any = None
+        error: Optional[Exception] = None
+        while True:
+            if db_executor is None:
+                done, request = self._advance(steps, reply, error)
+            else:
+                done, request = await loop.run_in_executor(db_executor, self._advance, steps, reply, error)
+            if done:
+                return request
+            try:
+                if isinstance(request, ChunkStream):
+                    reply, error = await self._astore_chunks(request), None
+                else:
+                    reply, error = await self._aembed_deduplicated(*request), None
+            except Exception as e:
+                reply, error = None, e
     
     def ingest_document(
         self,
@@ -41,14 +358,32 @@ class KBService:
         Returns:
             Created document with status INGESTED
         """
+        return self._run(self._ingest_steps(tenant_id, source_type, title, content, tags))
+    
+    async def aingest_document(
+        self,
+        tenant_id: UUID,
+        source_type: str,
+        title: str,
+        content: str,
+        tags: List[str] = None
+    ) -> KBDocument:
+        """Async variant of ingest_document (embedding does not block the event loop)."""
+        return await self._arun(self._ingest_steps(tenant_id, source_type, title, content, tags))
+    
+    def _ingest_steps(
+        self,
+        tenant_id: UUID,
+        source_type: str,
+        title: str,
+        content: str,
+        tags: Optional[List[str]]
+    ) -> EmbedSteps:
+        """Ingestion flow; yields embedding requests (see _run)."""
         # Verify tenant exists
-        tenant = self.tenant_repo.get(tenant_id)
-        if not tenant:
-            raise APIError(
-                code="NOT_FOUND",
-                message=f"Tenant {tenant_id} not found",
-                status_code=404
-            )
+        tenant = self._require_tenant(tenant_id)
+        spans_iter = self._document_spans(tenant, content)
+        projection = self._load_projection(tenant_id)
         
         # Create document
         document = KBDocument(
@@ -62,33 +397,9 @@ class KBService:
         document = self.kb_repo.create_document(document)
         
         try:
-            # Chunk the content
-            chunks_text = chunk_text(content or "", chunk_size=500, chunk_overlap=50)
-            
-            if not chunks_text:
-                # Empty content - still mark as ingested
-                document.status = "INGESTED"
-                self.db.commit()
-                return document
-            
-            # Embed chunks
-            embeddings = self.embeddings_provider.embed_texts(chunks_text)
-            
-            # Create chunk records
-            chunks = []
-            for idx, (chunk_text, embedding) in enumerate(zip(chunks_text, embeddings)):
-                chunk = KBChunk(
-                    document_id=document.id,
-                    chunk_index=idx,
-                    text=chunk_text,
-                    embedding=embedding
-                )
-                chunks.append(chunk)
-            
-            # Save chunks
-            self.kb_repo.create_chunks(chunks)
+            yield ChunkStream(document, content or "", spans_iter, projection)
             
-            # Update document status
+            # Update document status (empty content is still ingested)
             document.status = "INGESTED"
             self.db.commit()
             
@@ -104,44 +415,1137 @@ class KBService:
                 status_code=500
             )
     
+    def _document_spans(self, tenant: Tenant, content: Optional[str]) -> Iterator[Span]:
+        """Chunk spans of content under the tenant's chunking config."""
+        try:
+            return iter_document_spans(content or "", **self._chunking_options(tenant))
+        except ValueError as e:
+            raise APIError(
+                code="VALIDATION_ERROR",
+                message=f"Invalid KB chunking config for tenant {tenant.id}: {str(e)}",
+                status_code=400
+            )
+    
+    @staticmethod
+    def _chunk_batches(content: str, spans: Iterator[Span]) -> Iterator[ChunkBatch]:
+        """Slice and hash chunk texts in INGEST_BATCH_SIZE batches."""
+        while True:
+            batch_spans = list(islice(spans, INGEST_BATCH_SIZE))
+            if not batch_spans:
+                return
+            # Text is sliced per batch, never stored
+            batch_texts = [content[start:end] for start, end in batch_spans]
+            yield batch_spans, batch_texts, [hash_chunk_text(text) for text in batch_texts]
+    
+    def _write_chunk_batch(
+        self,
+        stream: ChunkStream,
+        first_index: int,
+        spans: List[Span],
+        hashes: List[str],
+        embeddings: np.ndarray
+    ) -> None:
+        """Store one embedded batch of a stream's chunks (flushed, not committed)."""
+        reduced = self._reduce(stream.projection, embeddings)
+        self.kb_repo.copy_chunks([
+            {
+                "document_id": stream.document.id,
+                "chunk_index": first_index + row,
+                "start_offset": start,
+                "end_offset": end,
+                "content_hash": hashes[row],
+                "embedding": embeddings[row],
+                "embedding_model": self.embeddings_provider.model_id,
+                "embedding_reduced": reduced[row]
+            }
+            for row, (start, end) in enumerate(spans)
+        ])
+    
+    def _store_chunks(self, stream: ChunkStream) -> Tuple[int, int]:
+        """
+        Embed and store a stream's chunks one batch at a time.
+        
+        Returns:
+            (chunks stored, texts sent to the embeddings provider)
+        """
+        stored = 0
+        embedded = 0
+        for spans, texts, hashes in self._chunk_batches(stream.content, stream.spans):
+            embeddings, batch_embedded = self._embed_deduplicated(stream.document.tenant_id, texts, hashes)
+            self._write_chunk_batch(stream, stored, spans, hashes, embeddings)
+            stored += len(spans)
+            embedded += batch_embedded
+            if stream.on_batch is not None:
+                stream.on_batch(stored, embedded)
+        return stored, embedded
+    
+    async def _astore_chunks(self, stream: ChunkStream) -> Tuple[int, int]:
+        """
+        Embed and store a stream's chunks as a three-stage pipeline.
+        
+        Chunking, embedding and writing run as concurrent tasks joined by
+        queues of KB_INGEST_PIPELINE_DEPTH batches, so the provider embeds
+        the next batch while the previous one is written, and a stage that
+        falls behind makes the ones before it wait. At most a few batches
+        of vectors are held in memory whatever the document size.
+        
+        Database work (stored-embedding lookups and chunk writes) runs on a
+        single dedicated thread: it stays off the event loop so it overlaps
+        with embedding, and the session is never used by two threads at
+        once.
+        
+        Returns:
+            (chunks stored, texts sent to the embeddings provider)
+        """
+        depth = settings.KB_INGEST_PIPELINE_DEPTH
+        to_embed: asyncio.Queue = asyncio.Queue(maxsize=depth)
+        to_write: asyncio.Queue = asyncio.Queue(maxsize=depth)
+        loop = asyncio.get_running_loop()
+        db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kb-ingest-db")
+        
+        async def chunk_stage() -> None:
+            for batch in self._chunk_batches(stream.content, stream.spans):
+                await to_embed.put(batch)
+            await to_embed.put(None)
+        
+        async def embed_stage() -> None:
+            while (batch := await to_embed.get()) is not None:
+                spans, texts, hashes = batch
+                embeddings, batch_embedded = await self._aembed_deduplicated(
+                    stream.document.tenant_id, texts, hashes, db_executor
+                )
+                await to_write.put((spans, hashes, embeddings, batch_embedded))
+            await to_write.put(None)
+        
+        async def write_stage() -> Tuple[int, int]:
+            stored = 0
+            embedded = 0
+            while (batch := await to_write.get()) is not None:
+                spans, hashes, embeddings, batch_embedded = batch
+                await loop.run_in_executor(
+                    db_executor, self._write_chunk_batch, stream, stored, spans, hashes, embeddings
+                )
+                stored += len(spans)
+                embedded += batch_embedded
+                if stream.on_batch is not None:
+                    stream.on_batch(stored, embedded)
+            return stored, embedded
+        
+        stages = [
+            asyncio.ensure_future(stage)
+            for stage in (chunk_stage(), embed_stage(), write_stage())
+        ]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            # A failed stage would leave the others blocked on its queue
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            raise
+        finally:
+            # The caller may roll back as soon as we return
+            db_executor.shutdown(wait=True)
+        return stages[-1].result()
+    
+    def queue_document(
+        self,
+        tenant_id: UUID,
+        source_type: str,
+        title: str,
+        content: str,
+        tags: List[str] = None
+    ) -> Tuple[KBDocument, KBIngestJob]:
+        """
+        Store a document as PENDING and queue a background ingestion job.
+        
+        The tenant's chunking config is checked up front so a bad config
+        fails the request rather than the job.
+        
+        Returns:
+            (document, job), both committed
+        """
+        tenant = self._require_tenant(tenant_id)
+        self._document_spans(tenant, "")
+        
+        document = self.kb_repo.create_document(
+            KBDocument(
+                tenant_id=tenant_id,
+                source_type=source_type,
+                title=title,
+                content=content,
+                tags=tags or [],
+                status="PENDING"
+            )
+        )
+        job = self.job_repo.create_job(KBIngestJob(tenant_id=tenant_id, document_id=document.id))
+        self.db.commit()
+        return document, job
+    
+    async def aingest_queued_document(
+        self,
+        tenant_id: UUID,
+        document_id: UUID,
+        on_progress: Optional[Callable[[int, int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Chunk, embed and store a PENDING document (background job body).
+        
+        The document row stays locked until the chunks and the INGESTED
+        status are committed together, so a job reclaimed while its first
+        worker is still running waits for it and then finds the document
+        done; chunks from any earlier attempt are replaced. On failure the
+        session is rolled back and the error propagates, so the caller
+        decides whether the document FAILED or is retried. Database work
+        runs off the event loop.
+        
+        Args:
+            tenant_id: Tenant ID
+            document_id: Document ID
+            on_progress: Called with (chunks stored, texts embedded, chunks total)
+        
+        Returns:
+            chunks_total and chunks_embedded
+        """
+        db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kb-ingest-job")
+        try:
+            return await self._arun(self._queued_document_steps(tenant_id, document_id, on_progress), db_executor)
+        finally:
+            db_executor.shutdown(wait=False)
+    
+    def _queued_document_steps(
+        self,
+        tenant_id: UUID,
+        document_id: UUID,
+        on_progress: Optional[Callable[[int, int, int], None]]
+    ) -> EmbedSteps:
+        """Background ingestion flow; yields embedding requests (see _run)."""
+        tenant = self._require_tenant(tenant_id)
+        document = self._get_document(tenant_id, document_id, lock=True)
+        if document.status == "INGESTED":
+            # Already done (e.g. a reclaimed job whose worker committed late)
+            chunks_total = self.kb_repo.count_chunks(document.id)
+            self.db.rollback()
+            return {"chunks_total": chunks_total, "chunks_embedded": 0}
+        
+        content = document.content or ""
+        spans = list(self._document_spans(tenant, content))
+        projection = self._load_projection(tenant_id)
+        
+        def on_batch(stored: int, embedded: int) -> None:
+            if on_progress is not None:
+                on_progress(stored, embedded, len(spans))
+        
+        try:
+            self.kb_repo.delete_document_chunks(document.id)
+            on_batch(0, 0)
+            _, embedded = yield ChunkStream(document, content, iter(spans), projection, on_batch)
+            document.status = "INGESTED"
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        return {"chunks_total": len(spans), "chunks_embedded": embedded}
+    
+    def get_ingest_job(self, tenant_id: UUID, job_id: UUID) -> KBIngestJob:
+        """Get a tenant's ingestion job or raise NOT_FOUND."""
+        job = self.job_repo.get_by_tenant(tenant_id, job_id)
+        if not job:
+            raise APIError(
+                code="NOT_FOUND",
+                message=f"Ingestion job {job_id} not found in tenant {tenant_id}",
+                status_code=404
+            )
+        return job
+    
+    async def aingest_documents_bulk(
+        self,
+        tenant_id: UUID,
+        items: AsyncIterable[BulkItem]
+    ) -> Dict[str, Any]:
+        """
+        Ingest a stream of documents in a few large transactions.
+        
+        Documents are chunked as they arrive, in batches through
+        chunk_documents (see _abulk_spans), and grouped until a group holds
+        BULK_TRANSACTION_CHUNKS chunks. Each group is embedded in one
+        deduplicated call (the provider splits it into batches) and
+        inserted in a single transaction, so a failing group does not
+        affect the others; its documents are then inserted again one by
+        one, without re-embedding, so only the ones at fault fail. Input
+        lines that failed to parse are reported as FAILED.
+        
+        Args:
+            tenant_id: Tenant ID
+            items: (line number, document, error) per input line
+        
+        Returns:
+            Per-document results (in line order) plus totals:
+            documents_ingested, documents_failed, chunks_created, chunks_embedded
+        """
+        tenant = self._require_tenant(tenant_id)
+        # Check the tenant's chunking config before any document is read
+        self._document_spans(tenant, "")
+        chunking = self._chunking_options(tenant)
+        projection = self._load_projection(tenant_id)
+        
+        results: List[Dict[str, Any]] = []
+        embedded = 0
+        group: List[Tuple[int, KBDocumentCreate, List[Span]]] = []
+        group_chunks = 0
+        # The session is used from one thread at a time, off the event loop
+        db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kb-ingest-bulk")
+        try:
+            async for line, document, spans in self._abulk_spans(items, chunking, results):
+                group.append((line, document, spans))
+                group_chunks += len(spans)
+                if group_chunks >= BULK_TRANSACTION_CHUNKS:
+                    embedded += await self._aingest_bulk_group(tenant_id, group, projection, results, db_executor)
+                    group, group_chunks = [], 0
+            if group:
+                embedded += await self._aingest_bulk_group(tenant_id, group, projection, results, db_executor)
+        finally:
+            db_executor.shutdown(wait=True)
+        
+        results.sort(key=lambda result: result["line"])
+        ingested = [result for result in results if result["status"] == "INGESTED"]
+        return {
+            "documents": results,
+            "documents_ingested": len(ingested),
+            "documents_failed": len(results) - len(ingested),
+            "chunks_created": sum(result["chunks_created"] for result in ingested),
+            "chunks_embedded": embedded
+        }
+    
+    async def _abulk_spans(
+        self,
+        items: AsyncIterable[BulkItem],
+        chunking: dict,
+        results: List[Dict[str, Any]]
+    ) -> AsyncIterator[Tuple[int, KBDocumentCreate, List[Span]]]:
+        """
+        Chunk bulk documents in batches of about PARALLEL_CHUNKING_MIN_CHARS.
+        
+        Each batch goes through chunk_documents in a thread (and from there
+        to the shared chunking processes when KB_CHUNKING_WORKERS is set),
+        so the event loop keeps reading the request body. Lines that failed
+        to parse are appended to results as FAILED.
+        
+        Yields:
+            (line number, document, spans) per parsed document, in input order
+        """
+        batch: List[Tuple[int, KBDocumentCreate]] = []
+        batch_chars = 0
+        async for line, document, error in items:
+            if error is not None:
+                results.append({"line": line, "status": "FAILED", "chunks_created": 0, "error": error})
+                continue
+            batch.append((line, document))
+            batch_chars += len(document.content or "")
+            if batch_chars >= PARALLEL_CHUNKING_MIN_CHARS:
+                for item in await self._achunk_bulk_batch(batch, chunking):
+                    yield item
+                batch, batch_chars = [], 0
+        if batch:
+            for item in await self._achunk_bulk_batch(batch, chunking):
+                yield item
+    
+    @staticmethod
+    async def _achunk_bulk_batch(
+        batch: List[Tuple[int, KBDocumentCreate]],
+        chunking: dict
+    ) -> List[Tuple[int, KBDocumentCreate, List[Span]]]:
+        """Chunk a batch of bulk documents off the event loop."""
+        spans = await asyncio.to_thread(
+            chunk_documents, [document.content or "" for _, document in batch], **chunking
+        )
+        return [(line, document, document_spans) for (line, document), document_spans in zip(batch, spans)]
+    
+    async def _aingest_bulk_group(
+        self,
+        tenant_id: UUID,
+        group: List[Tuple[int, KBDocumentCreate, List[Span]]],
+        projection: Optional[PCAProjection],
+        results: List[Dict[str, Any]],
+        db_executor: Executor
+    ) -> int:
+        """
+        Embed and insert one group of bulk documents in a single transaction.
+        
+        The group is embedded once; its database work (stored-embedding
+        lookup and inserts) runs on db_executor. Appends a result per
+        document to results (see _write_bulk_group for failed inserts).
+        
+        Returns:
+            Number of texts sent to the embeddings provider
+        """
+        rows: List[Tuple[dict, List[dict]]] = []
+        texts = []
+        hashes = []
+        for _, document, spans in group:
+            document_id = uuid.uuid4()
+            content = document.content or ""
+            chunk_rows = []
+            for chunk_index, (start, end) in enumerate(spans):
+                text = content[start:end]
+                texts.append(text)
+                hashes.append(hash_chunk_text(text))
+                chunk_rows.append({
+                    "document_id": document_id,
+                    "chunk_index": chunk_index,
+                    "start_offset": start,
+                    "end_offset": end,
+                    "content_hash": hashes[-1]
+                })
+            rows.append(({
+                "id": document_id,
+                "tenant_id": tenant_id,
+                "source_type": document.source_type,
+                "title": document.title,
+                "content": content,
+                "tags": document.tags or [],
+                "status": "INGESTED"
+            }, chunk_rows))
+        
+        embedded = 0
+        try:
+            if texts:
+                embeddings, embedded = await self._aembed_deduplicated(tenant_id, texts, hashes, db_executor)
+                reduced = self._reduce(projection, embeddings)
+                chunk_rows = (row for _, document_chunks in rows for row in document_chunks)
+                for row, embedding, reduced_embedding in zip(chunk_rows, embeddings, reduced):
+                    row["embedding"] = embedding
+                    row["embedding_model"] = self.embeddings_provider.model_id
+                    row["embedding_reduced"] = reduced_embedding
+        except Exception as e:
+            errors = [f"Failed to ingest document: {str(e)}"] * len(group)
+        else:
+            errors = await asyncio.get_running_loop().run_in_executor(
+                db_executor, self._write_bulk_group, rows
+            )
+        
+        for (line, document, spans), (document_row, _), error in zip(group, rows, errors):
+            if error is not None:
+                results.append({
+                    "line": line,
+                    "title": document.title,
+                    "status": "FAILED",
+                    "chunks_created": 0,
+                    "error": error
+                })
+                continue
+            results.append({
+                "line": line,
+                "document_id": str(document_row["id"]),
+                "title": document.title,
+                "status": "INGESTED",
+                "chunks_created": len(spans)
+            })
+        return embedded
+    
+    def _write_bulk_group(self, rows: List[Tuple[dict, List[dict]]]) -> List[Optional[str]]:
+        """
+        Insert embedded bulk documents and their chunks in one transaction.
+        
+        If the transaction fails, each document is inserted again in a
+        transaction of its own (reusing its embedded rows), so only the
+        ones at fault fail.
+        
+        Args:
+            rows: (document row, chunk rows) per document
+        
+        Returns:
+            Per document, None once committed or the error that failed it
+        """
+        try:
+            self.kb_repo.bulk_create_documents([document_row for document_row, _ in rows])
+            self.kb_repo.copy_chunks([row for _, chunk_rows in rows for row in chunk_rows])
+            self.db.commit()
+            return [None] * len(rows)
+        except Exception as e:
+            self.db.rollback()
+            if len(rows) == 1:
+                return [f"Failed to ingest document: {str(e)}"]
+        # Isolate the documents at fault
+        return [self._write_bulk_group([item])[0] for item in rows]
+    
+    def _get_document(self, tenant_id: UUID, document_id: UUID, lock: bool = False) -> KBDocument:
+        """Get a tenant's document (locked FOR UPDATE with lock) or raise NOT_FOUND."""
+        document = self.kb_repo.get_document_by_tenant(tenant_id, document_id, lock=lock)
+        if not document:
+            raise APIError(
+                code="NOT_FOUND",
+                message=f"Document {document_id} not found in tenant {tenant_id}",
+                status_code=404
+            )
+        return document
+    
+    def update_document(
+        self,
+        tenant_id: UUID,
+        document_id: UUID,
+        title: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        source_type: Optional[str] = None,
+        content: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Update a document, re-embedding only chunks whose content changed.
+        
+        New chunks are matched to existing ones by content hash. Matches keep
+        their row and embedding and are renumbered in place; changed chunks
+        reuse leftover rows where possible and are embedded in batches (or
+        take an existing tenant embedding for the same content); any
+        remaining rows are deleted in batches.
+        
+        Args:
+            tenant_id: Tenant ID
+            document_id: Document ID
+            title: New title
+            tags: New tags
+            source_type: New source type
+            content: New content (None leaves chunks untouched)
+        
+        Returns:
+            status plus counts: chunks_total, chunks_embedded, chunks_reused, chunks_deleted
+        """
+        return self._run(self._update_steps(tenant_id, document_id, title, tags, source_type, content))
+    
+    async def aupdate_document(
+        self,
+        tenant_id: UUID,
+        document_id: UUID,
+        title: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        source_type: Optional[str] = None,
+        content: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async variant of update_document (embedding does not block the event loop)."""
+        return await self._arun(self._update_steps(tenant_id, document_id, title, tags, source_type, content))
+    
+    def _update_steps(
+        self,
+        tenant_id: UUID,
+        document_id: UUID,
+        title: Optional[str],
+        tags: Optional[List[str]],
+        source_type: Optional[str],
+        content: Optional[str]
+    ) -> EmbedSteps:
+        """Update flow; yields embedding requests (see _run)."""
+        tenant = self._require_tenant(tenant_id)
+        document = self._get_document(tenant_id, document_id)
+        
+        if title is not None:
+            document.title = title
+        if tags is not None:
+            document.tags = tags
+        if source_type is not None:
+            document.source_type = source_type
+        
+        if content is None:
+            self.db.commit()
+            chunks_total = self.kb_repo.count_chunks(document.id)
+            return {
+                "status": document.status,
+                "chunks_total": chunks_total,
+                "chunks_embedded": 0,
+                "chunks_reused": chunks_total,
+                "chunks_deleted": 0
+            }
+        
+        new_spans = list(self._document_spans(tenant, content))
+        
+        projection = self._load_projection(tenant_id)
+        
+        try:
+            # Index existing chunks by content hash (several chunks may share
+            # one); chunks embedded by another model can only be overwritten
+            old_content = document.content or ""
+            embedding_model = self.embeddings_provider.model_id
+            unmatched: Dict[str, deque] = defaultdict(deque)
+            stale = []
+            for chunk in self.kb_repo.list_chunks(document.id):
+                if chunk.embedding_model != embedding_model:
+                    stale.append(chunk)
+                    continue
+                content_hash = chunk.content_hash or hash_chunk_text(chunk.resolve_text(old_content))
+                unmatched[content_hash].append(chunk)
+            
+            # Store the new content first: chunk rows resolve their text
+            # (and full-text search vector) against it from here on
+            document.content = content
+            self.db.flush()
+            
+            # Keep chunks whose content is unchanged, renumbering them in place
+            new_hashes = [hash_chunk_text(content[start:end]) for start, end in new_spans]
+            changed = []
+            for idx, (start, end) in enumerate(new_spans):
+                candidates = unmatched.get(new_hashes[idx])
+                if candidates:
+                    chunk = candidates.popleft()
+                    chunk.chunk_index = idx
+                    chunk.start_offset = start
+                    chunk.end_offset = end
+                    chunk.content_hash = new_hashes[idx]
+                    chunk.text = None
+                else:
+                    changed.append(idx)
+            
+            # Rows left over can be overwritten with changed chunks
+            spare = deque(sorted(
+                [chunk for chunks in unmatched.values() for chunk in chunks] + stale,
+                key=lambda chunk: chunk.chunk_index
+            ))
+            
+            embedded = 0
+            for offset in range(0, len(changed), INGEST_BATCH_SIZE):
+                batch = changed[offset:offset + INGEST_BATCH_SIZE]
+                embeddings, batch_embedded = yield (
+                    tenant_id,
+                    [content[new_spans[idx][0]:new_spans[idx][1]] for idx in batch],
+                    [new_hashes[idx] for idx in batch]
+                )
+                embedded += batch_embedded
+                reduced = self._reduce(projection, embeddings)
+                new_rows = []
+                for idx, embedding, reduced_embedding in zip(batch, embeddings, reduced):
+                    start, end = new_spans[idx]
+                    if spare:
+                        chunk = spare.popleft()
+                        chunk.text = None
+                        chunk.chunk_index = idx
+                        chunk.start_offset = start
+                        chunk.end_offset = end
+                        chunk.content_hash = new_hashes[idx]
+                        chunk.embedding = embedding
+                        chunk.embedding_model = embedding_model
+                        chunk.embedding_reduced = reduced_embedding
+                    else:
+                        new_rows.append({
+                            "document_id": document.id,
+                            "chunk_index": idx,
+                            "start_offset": start,
+                            "end_offset": end,
+                            "content_hash": new_hashes[idx],
+                            "embedding": embedding,
+                            "embedding_model": embedding_model,
+                            "embedding_reduced": reduced_embedding
+                        })
+                if new_rows:
+                    self.kb_repo.copy_chunks(new_rows)
+                else:
+                    self.db.flush()
+            
+            self.db.flush()
+            deleted = self.kb_repo.delete_chunks([chunk.id for chunk in spare])
+            
+            document.status = "INGESTED"
+            self.db.commit()
+            
+            return {
+                "status": document.status,
+                "chunks_total": len(new_spans),
+                "chunks_embedded": embedded,
+                "chunks_reused": len(new_spans) - embedded,
+                "chunks_deleted": deleted
+            }
+            
+        except Exception as e:
+            self.db.rollback()
+            raise APIError(
+                code="TOOL_EXECUTION_FAILED",
+                message=f"Failed to update document: {str(e)}",
+                status_code=500
+            )
+    
+    def delete_document(self, tenant_id: UUID, document_id: UUID) -> int:
+        """
+        Delete a document and its chunks.
+        
+        Returns:
+            Number of chunks deleted
+        """
+        document = self._get_document(tenant_id, document_id)
+        deleted = self.kb_repo.delete_document(document)
+        self.db.commit()
+        return deleted
+    
     def search(
         self,
         tenant_id: UUID,
         query: str,
         top_k: int = 5,
-        filters: dict = None
-    ) -> List[tuple]:
+        filters: dict = None,
+        mode: Optional[str] = None,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Row]:
         """
-        Search KB using semantic similarity.
+        Search KB using semantic similarity, full-text match, or both.
         
         Args:
             tenant_id: Tenant ID
             query: Search query
             top_k: Number of results
             filters: Optional filters
+            mode: "vector", "lexical" or "hybrid" (None = tenant default)
+            probes: ivfflat lists to scan (None = tenant default)
+            ef_search: HNSW candidate list size (None = tenant default)
         
         Returns:
-            List of (chunk, score) tuples
+            Hit rows (see KBRepository.search_similar)
         """
-        # Verify tenant exists
-        tenant = self.tenant_repo.get(tenant_id)
-        if not tenant:
+        tenant = self._require_tenant(tenant_id)
+        mode = self._search_mode(tenant, mode)
+        
+        # Embed query (lexical search does not need it)
+        query_embedding = None
+        if mode != SEARCH_MODE_LEXICAL:
+            query_embedding = self.embeddings_provider.embed_query_array(query)
+            self._record_query(tenant_id, query_embedding, top_k, filters)
+        
+        # Search
+        results = self._search_similar(tenant, query, query_embedding, top_k, filters, mode, probes, ef_search)
+        
+        return results
+    
+    async def asearch(
+        self,
+        tenant_id: UUID,
+        query: str,
+        top_k: int = 5,
+        filters: dict = None,
+        mode: Optional[str] = None,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Row]:
+        """
+        Async variant of search (query embedding does not block the event loop).
+        
+        Raises:
+            APIError: PROVIDER_ERROR if the embeddings provider times out
+        """
+        tenant = self._require_tenant(tenant_id)
+        mode = self._search_mode(tenant, mode)
+        
+        query_embedding = None
+        if mode != SEARCH_MODE_LEXICAL:
+            try:
+                query_embedding = await self.embeddings_provider.aembed_query_array(query)
+            except TimeoutError as e:
+                raise APIError(
+                    code="PROVIDER_ERROR",
+                    message=f"Embeddings provider timed out: {str(e)}",
+                    status_code=502
+                )
+            self._record_query(tenant_id, query_embedding, top_k, filters)
+        
+        return self._search_similar(tenant, query, query_embedding, top_k, filters, mode, probes, ef_search)
+    
+    async def asearch_batch(
+        self,
+        tenant_id: UUID,
+        queries: List[str],
+        top_k: int = 5,
+        filters: dict = None,
+        mode: Optional[str] = None,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> List[List[Row]]:
+        """
+        Run several searches with the same options in one round trip.
+        
+        The tenant is checked once, the queries are embedded in one
+        provider batch and searched in a single statement.
+        
+        Args:
+            tenant_id: Tenant ID
+            queries: Search queries (at most KB_SEARCH_BATCH_MAX_QUERIES)
+            Other arguments as for search
+        
+        Returns:
+            Hit rows per query, in query order
+        
+        Raises:
+            APIError: VALIDATION_ERROR if there are no or too many queries,
+                PROVIDER_ERROR if the embeddings provider times out
+        """
+        if not 1 <= len(queries) <= settings.KB_SEARCH_BATCH_MAX_QUERIES:
             raise APIError(
-                code="NOT_FOUND",
-                message=f"Tenant {tenant_id} not found",
-                status_code=404
+                code="VALIDATION_ERROR",
+                message=f"A search batch takes 1 to {settings.KB_SEARCH_BATCH_MAX_QUERIES} queries, got {len(queries)}",
+                status_code=400
             )
+        tenant = self._require_tenant(tenant_id)
+        mode = self._search_mode(tenant, mode)
         
-        # Embed query
-        query_embedding = self.embeddings_provider.embed_query(query)
+        query_embeddings = None
+        if mode != SEARCH_MODE_LEXICAL:
+            try:
+                query_embeddings = await self.embeddings_provider.aembed_texts_array(queries)
+            except TimeoutError as e:
+                raise APIError(
+                    code="PROVIDER_ERROR",
+                    message=f"Embeddings provider timed out: {str(e)}",
+                    status_code=502
+                )
+            for query_embedding in query_embeddings:
+                self._record_query(tenant_id, query_embedding, top_k, filters)
         
-        # Search
-        results = self.kb_repo.search_similar(
-            tenant_id=tenant_id,
+        options = self._search_call_options(tenant, query_embeddings, probes, ef_search)
+        return self.kb_repo.search_similar_batch(
+            tenant_id=tenant.id,
+            query_embeddings=query_embeddings,
+            top_k=top_k,
+            filters=filters,
+            mode=mode,
+            query_texts=queries,
+            text_search_config=settings.KB_TEXT_SEARCH_CONFIG,
+            **options
+        )
+    
+    def _search_similar(
+        self,
+        tenant: Tenant,
+        query: str,
+        query_embedding: Optional[np.ndarray],
+        top_k: int,
+        filters: Optional[dict],
+        mode: str,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        exact: bool = False
+    ) -> List[Row]:
+        """Run a search with the tenant's search options (a vector search without ANN indexes with exact)."""
+        options = self._search_call_options(
+            tenant, None if query_embedding is None else query_embedding[None, :], probes, ef_search
+        )
+        reduced_embeddings = options.pop("reduced_embeddings", None)
+        if reduced_embeddings is not None:
+            options["reduced_embedding"] = reduced_embeddings[0]
+        
+        if exact:
+            return self.kb_repo.search_exact(tenant.id, query_embedding, top_k, filters, **options)
+        return self.kb_repo.search_similar(
+            tenant_id=tenant.id,
             query_embedding=query_embedding,
             top_k=top_k,
-            filters=filters
+            filters=filters,
+            mode=mode,
+            query_text=query,
+            text_search_config=settings.KB_TEXT_SEARCH_CONFIG,
+            **options
         )
+    
+    def _search_call_options(
+        self,
+        tenant: Tenant,
+        query_embeddings: Optional[np.ndarray],
+        probes: Optional[int],
+        ef_search: Optional[int]
+    ) -> dict:
+        """
+        Repository search options: the tenant's, with per-request search
+        effort applied and, for reduced storage, the queries projected
+        into the tenant's PCA space (reduced_embeddings).
+        """
+        options = self._search_options(tenant)
+        del options["mode"]
+        # Per-request search effort overrides the tenant's
+        if probes is not None:
+            options["probes"] = probes
+        if ef_search is not None:
+            options["ef_search"] = ef_search
+        self._check_search_effort("probes", options["probes"], IVFFLAT_MAX_PROBES)
+        self._check_search_effort("ef_search", options["ef_search"], HNSW_MAX_EF_SEARCH)
+        if options["ef_search"] is None and settings.KB_VECTOR_INDEX == "hnsw":
+            # Set even at the default, so the repository raises it to the
+            # candidate count (an HNSW scan returns at most ef_search rows)
+            options["ef_search"] = HNSW_DEFAULT_EF_SEARCH
+        if options["storage"] in (VECTOR_STORAGE_HALFVEC, VECTOR_STORAGE_BIT) and not self._quantized_storage_available():
+            raise APIError(
+                code="VALIDATION_ERROR",
+                message=f"Vector storage '{options['storage']}' is not enabled on this deployment (KB_QUANTIZED_STORAGE)",
+                status_code=400
+            )
+        if options["storage"] == VECTOR_STORAGE_REDUCED and query_embeddings is not None:
+            projection = self._load_projection(tenant.id)
+            if projection is None:
+                # Nothing fitted yet, so no reduced vectors to search
+                options["storage"] = VECTOR_STORAGE_FULL
+            else:
+                options["reduced_embeddings"] = projection.transform(query_embeddings)
+        return options
+    
+    def _quantized_storage_available(self) -> bool:
+        """Whether halfvec / bit search can run: enabled and the columns migrated."""
+        global _quantized_columns_found
+        if not settings.KB_QUANTIZED_STORAGE:
+            return False
+        if not _quantized_columns_found:
+            _quantized_columns_found = all(
+                self.kb_repo.get_vector_dimension("kb_chunks", column) is not None
+                for column in QUANTIZED_COLUMNS
+            )
+        return _quantized_columns_found
+    
+    @staticmethod
+    def _record_query(tenant_id: UUID, query_embedding: np.ndarray, top_k: int, filters: Optional[dict]) -> None:
+        """Keep a vector search query for tune_ann_search to replay."""
+        if settings.KB_ANN_TUNE_SAMPLE_SIZE <= 0:
+            return
+        with _query_samples_lock:
+            sample = _query_samples.get(tenant_id)
+            if sample is None:
+                sample = _query_samples[tenant_id] = deque(maxlen=settings.KB_ANN_TUNE_SAMPLE_SIZE)
+            _query_samples.move_to_end(tenant_id)
+            sample.append((query_embedding, top_k, filters))
+            while len(_query_samples) > QUERY_SAMPLE_TENANTS:
+                _query_samples.popitem(last=False)
+    
+    def tune_ann_search(
+        self,
+        tenant_id: UUID,
+        recall_target: Optional[float] = None,
+        min_queries: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Store the cheapest ANN search effort that meets a recall target.
         
-        return results
-
+        The tenant's recent vector search queries are replayed: their exact
+        top_k through the tenant's storage mode (sequential scan, so a
+        quantized or reduced mode's own loss is not counted against the
+        index) is the ground truth, and each candidate ivfflat.probes or
+        hnsw.ef_search value (per KB_VECTOR_INDEX) is tried, cheapest first,
+        through the tenant's usual search path. The first value whose mean
+        recall@k reaches the target is stored in features["kb_search"], so
+        later searches use it without a per-request setting; if none does,
+        the tenant's settings are left alone.
+        
+        Args:
+            tenant_id: Tenant ID
+            recall_target: Mean recall@k to reach (default KB_ANN_TUNE_RECALL_TARGET)
+            min_queries: Sampled queries needed (default KB_ANN_TUNE_MIN_QUERIES)
+        
+        Returns:
+            The tuning (setting, value, recall, queries, index, tuned_at;
+            for the most expensive value with its recall when the target
+            was missed, and then not stored), or None if the tenant opted
+            out ("autotune": false) or has too few sampled queries with
+            results
+        """
+        recall_target = settings.KB_ANN_TUNE_RECALL_TARGET if recall_target is None else recall_target
+        min_queries = settings.KB_ANN_TUNE_MIN_QUERIES if min_queries is None else min_queries
+        tenant = self._require_tenant(tenant_id)
+        if ((tenant.features or {}).get("kb_search") or {}).get("autotune") is False:
+            return None
+        
+        queries, truth = [], []
+        with _query_samples_lock:
+            sampled = list(_query_samples.get(tenant_id, ()))
+        for query_embedding, top_k, filters in sampled:
+            exact = {
+                row.chunk_id for row in
+                self._search_similar(tenant, "", query_embedding, top_k, filters, SEARCH_MODE_VECTOR, exact=True)
+            }
+            # Ends the transaction, and with it the disabled index scans
+            self.db.rollback()
+            if exact:
+                queries.append((query_embedding, top_k, filters))
+                truth.append(exact)
+        if len(queries) < max(1, min_queries):
+            return None
+        
+        name, values = ANN_TUNE_CANDIDATES[settings.KB_VECTOR_INDEX]
+        for value in values:
+            found = 0
+            for (query_embedding, top_k, filters), exact in zip(queries, truth):
+                rows = self._search_similar(
+                    tenant, "", query_embedding, top_k, filters, SEARCH_MODE_VECTOR, **{name: value}
+                )
+                found += len(exact.intersection(row.chunk_id for row in rows)) / len(exact)
+            recall = found / len(queries)
+            if recall >= recall_target:
+                break
+        self.db.rollback()
+        
+        tuning = {
+            "setting": name,
+            "value": value,
+            "recall": round(recall, 4),
+            "queries": len(queries),
+            "index": settings.KB_VECTOR_INDEX,
+            "tuned_at": datetime.utcnow().isoformat() + "Z"
+        }
+        if recall < recall_target:
+            # Pinning the most expensive value would not reach it either
+            return tuning
+        features = dict(tenant.features or {})
+        kb_search = {**(features.get("kb_search") or {}), name: value, "ann_tuning": tuning}
+        features["kb_search"] = kb_search
+        tenant.features = features
+        self.db.commit()
+        return tuning
+    
+    def _load_projection(self, tenant_id: UUID) -> Optional[PCAProjection]:
+        """Return the tenant's fitted PCA projection, if any (cached per fit)."""
+        record = self.kb_repo.get_projection(tenant_id)
+        # Shared by request handlers and worker threads (ingest, ANN tuner)
+        with _projection_cache_lock:
+            if record is None:
+                _projection_cache.pop(tenant_id, None)
+                return None
+            cached = _projection_cache.get(tenant_id)
+            if cached is not None and cached[0] == record.created_at:
+                _projection_cache.move_to_end(tenant_id)
+                return cached[1]
+        projection = record.to_projection()
+        with _projection_cache_lock:
+            _projection_cache[tenant_id] = (record.created_at, projection)
+            while len(_projection_cache) > PROJECTION_CACHE_SIZE:
+                _projection_cache.popitem(last=False)
+        return projection
+    
+    @staticmethod
+    def _reduce(projection: Optional[PCAProjection], embeddings: np.ndarray) -> List[Optional[np.ndarray]]:
+        """Project a batch of embeddings, or give None per row without a projection."""
+        if projection is None:
+            return [None] * len(embeddings)
+        return list(projection.transform(embeddings))
+    
+    def fit_projection(self, tenant_id: UUID, sample_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fit a PCA projection to a tenant's embeddings and reduce every chunk.
+        
+        A random sample of the tenant's chunk embeddings is reduced to
+        KB_PCA_DIMENSION components; the projection replaces any earlier
+        one and every chunk's embedding_reduced is rewritten, so tenants
+        using "reduced" storage search the smaller index from then on.
+        
+        Args:
+            tenant_id: Tenant ID
+            sample_size: Embeddings to fit on (default KB_PCA_SAMPLE_SIZE)
+        
+        Returns:
+            Projection summary plus chunks_reduced
+        
+        Raises:
+            APIError: VALIDATION_ERROR if the tenant has too few embeddings
+        """
+        self._require_tenant(tenant_id)
+        
+        sample = self.kb_repo.sample_embeddings(tenant_id, sample_size or settings.KB_PCA_SAMPLE_SIZE)
+        try:
+            projection = PCAProjection.fit(sample, KB_PCA_DIMENSION)
+        except ValueError as e:
+            raise APIError(
+                code="VALIDATION_ERROR",
+                message=f"Cannot fit KB projection for tenant {tenant_id}: {str(e)}",
+                status_code=400
+            )
+        
+        mean, components = projection.to_bytes()
+        record = self.kb_repo.save_projection(
+            KBProjection(
+                tenant_id=tenant_id,
+                source_dimension=projection.source_dimension,
+                dimension=projection.dimension,
+                mean=mean,
+                components=components,
+                explained_variance=projection.explained_variance,
+                sample_size=len(sample),
+                created_at=datetime.utcnow()
+            )
+        )
+        
+        reduced = 0
+        for chunk_ids, embeddings in self.kb_repo.iter_embeddings(tenant_id):
+            self.kb_repo.update_reduced_embeddings(chunk_ids, projection.transform(embeddings))
+            reduced += len(chunk_ids)
+        self.db.commit()
+        
+        return {**self._projection_summary(record), "chunks_reduced": reduced}
+    
+    def get_projection(self, tenant_id: UUID) -> Dict[str, Any]:
+        """
+        Describe a tenant's fitted PCA projection.
+        
+        Raises:
+            APIError: NOT_FOUND if the tenant has no projection
+        """
+        self._require_tenant(tenant_id)
+        record = self.kb_repo.get_projection(tenant_id)
+        if record is None:
+            raise APIError(
+                code="NOT_FOUND",
+                message=f"No KB projection fitted for tenant {tenant_id}",
+                status_code=404
+            )
+        return self._projection_summary(record)
+    
+    @staticmethod
+    def _projection_summary(record: KBProjection) -> Dict[str, Any]:
+        """Public fields of a stored projection."""
+        return {
+            "source_dimension": record.source_dimension,
+            "dimension": record.dimension,
+            "explained_variance": record.explained_variance,
+            "sample_size": record.sample_size,
+            "fitted_at": record.created_at.isoformat() + "Z"
+        }
+    
+    def check_embedding_dimension(self) -> None:
+        """
+        Check the embeddings provider against the vector columns.
+        
+        The column sizes are fixed by the migrations (EMBEDDING_DIMENSION,
+        KB_PCA_DIMENSION); a provider of another dimension could neither
+        store nor compare its vectors.
+        
+        Raises:
+            RuntimeError: If a column's dimension differs from the expected one
+                or KB_QUANTIZED_STORAGE is set without the quantized columns
+        """
+        expected = [
+            ("kb_chunks", "embedding", self.embeddings_provider.dimension),
+            ("embeddings", "embedding", self.embeddings_provider.dimension),
+            ("kb_chunks", "embedding_reduced", KB_PCA_DIMENSION),
+        ]
+        if settings.KB_QUANTIZED_STORAGE:
+            expected += [
+                ("kb_chunks", column, self.embeddings_provider.dimension)
+                for column in QUANTIZED_COLUMNS
+            ]
+            missing = [
+                column for column in QUANTIZED_COLUMNS
+                if self.kb_repo.get_vector_dimension("kb_chunks", column) is None
+            ]
+            if missing:
+                raise RuntimeError(
+                    f"KB_QUANTIZED_STORAGE is set but kb_chunks has no {', '.join(missing)} column; "
+                    "it must be set when the kb_chunk_quantized migration runs"
+                )
+        mismatches = []
+        for table, column, dimension in expected:
+            actual = self.kb_repo.get_vector_dimension(table, column)
+            if actual is not None and actual != dimension:
+                mismatches.append(f"{table}.{column} is vector({actual}), expected {dimension}")
+        if mismatches:
+            raise RuntimeError(
+                "Embedding dimensions do not match the database schema ("
+                + "; ".join(mismatches)
+                + "); the provider must produce EMBEDDING_DIMENSION-sized vectors and the migrations must be current"
+            )
+    
+    def _require_tenant(self, tenant_id: UUID) -> Tenant:
+        """Get a tenant or raise NOT_FOUND."""
+        tenant = self.tenant_repo.get(tenant_id)
+        if not tenant:
+            raise APIError(
+                code="NOT_FOUND",
+                message=f"Tenant {tenant_id} not found",
+                status_code=404
+            )
+        return tenant
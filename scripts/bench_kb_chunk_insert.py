@@ -0,0 +1,103 @@
+"""
+Benchmark KB chunk inserts: ORM objects vs multi-row INSERT vs binary COPY.
+
+Inserts the same generated chunks (with random unit embeddings) through
+each path inside a transaction that is rolled back afterwards, so the
+database is left unchanged. Needs a migrated database at DATABASE_URL.
+
+Usage:
+    python -m scripts.bench_kb_chunk_insert --chunks 20000 --batch-size 64
+"""
+import argparse
+import time
+import uuid
+from typing import Callable, Dict, List
+import numpy as np
+from app.core.config import EMBEDDING_DIMENSION
+from app.db.models import KBChunk, KBDocument, Tenant
+from app.db.session import SessionLocal
+from app.repositories.kb_repo import KBRepository
+
+def _chunk_rows(document_id: uuid.UUID, count: int, rng: np.random.Generator) -> List[dict]:
+    """Generate chunk column dicts with unit float32 embeddings."""
+    embeddings = rng.normal(size=(count, EMBEDDING_DIMENSION)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return [
+        {
+            "document_id": document_id,
+            "chunk_index": idx,
+            "start_offset": idx * 500,
+            "end_offset": idx * 500 + 500,
+            "content_hash": f"{idx:064x}",
+            "embedding": embeddings[idx],
+            "embedding_reduced": None
+        }
+        for idx in range(count)
+    ]
+
+def _insert_orm(repo: KBRepository, rows: List[dict]) -> None:
+    repo.create_chunks([KBChunk(**row) for row in rows])
+
+def _insert_multirow(repo: KBRepository, rows: List[dict]) -> None:
+    repo.bulk_create_chunks(rows)
+    repo.db.flush()
+
+def _insert_copy(repo: KBRepository, rows: List[dict]) -> None:
+    repo.copy_chunks(rows)
+
+WRITERS: Dict[str, Callable[[KBRepository, List[dict]], None]] = {
+    "orm": _insert_orm,
+    "insert": _insert_multirow,
+    "copy": _insert_copy,
+}
+
+def run(name: str, chunks: int, batch_size: int, seed: int) -> float:
+    """
+    Insert chunks in batches through one writer and roll back.
+    
+    Returns:
+        Chunks inserted per second
+    """
+    db = SessionLocal()
+    try:
+        tenant = Tenant(
+            id=uuid.uuid4(),
+            name="Benchmark",
+            slug=f"bench-{uuid.uuid4().hex[:8]}",
+            timezone="UTC",
+            default_language="en-US",
+            features={}
+        )
+        db.add(tenant)
+        document = KBDocument(tenant_id=tenant.id, source_type="TEXT", title="Benchmark", content="", tags=[])
+        repo = KBRepository(db)
+        repo.create_document(document)
+        rows = _chunk_rows(document.id, chunks, np.random.default_rng(seed))
+        
+        writer = WRITERS[name]
+        start = time.perf_counter()
+        for offset in range(0, chunks, batch_size):
+            writer(repo, rows[offset:offset + batch_size])
+        elapsed = time.perf_counter() - start
+        return chunks / elapsed
+    finally:
+        db.rollback()
+        db.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per writer call (ingestion uses 64)")
+    parser.add_argument("--writers", nargs="+", choices=list(WRITERS), default=list(WRITERS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    print(f"{args.chunks} chunks, batch size {args.batch_size}, dimension {EMBEDDING_DIMENSION}")
+    baseline = None
+    for name in args.writers:
+        rate = run(name, args.chunks, args.batch_size, args.seed)
+        baseline = baseline or rate
+        print(f"{name:>8}: {rate:10.0f} chunks/s  ({rate / baseline:5.1f}x {args.writers[0]})")
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,13 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.core.config import EMBEDDING_DIMENSION
 from app.db.session import SessionLocal
 from app.db.models import Tenant, KBDocument
+from app.providers.embeddings.deterministic import DeterministicEmbeddingsProvider
+from app.services.kb_service import KBService
+import json
+import numpy as np
 import uuid
 from datetime import datetime
 
@@ -102,3 +107,145 @@ def test_list_documents_contract(test_tenant, db):
         assert "status" in doc_item
         assert "created_at" in doc_item
 
+
+def test_update_document_contract(test_tenant):
+    """Test PATCH /api/v1/tenants/{tenant_id}/kb/documents/{document_id} contract."""
+    content = " ".join(
+        f"Policy clause {i} covers returns, refunds and exchanges for order type {i}."
+        for i in range(60)
+    )
+    create = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/documents",
+        json={"source_type": "TEXT", "title": "Manual", "content": content}
+    )
+    document_id = create.json()["data"]["document_id"]
+    
+    edited = content.replace("order type 30.", "order type 30 (excluding sale items).")
+    response = client.patch(
+        f"/api/v1/tenants/{test_tenant.id}/kb/documents/{document_id}",
+        json={"title": "Manual v2", "content": edited}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ok"] is True
+    
+    doc_data = data["data"]
+    assert doc_data["document_id"] == document_id
+    assert doc_data["status"] == "INGESTED"
+    assert 0 < doc_data["chunks_embedded"] < doc_data["chunks_total"]
+    assert doc_data["chunks_reused"] + doc_data["chunks_embedded"] == doc_data["chunks_total"]
+
+def test_delete_document_contract(test_tenant):
+    """Test DELETE /api/v1/tenants/{tenant_id}/kb/documents/{document_id} contract."""
+    create = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/documents",
+        json={"source_type": "TEXT", "title": "Temp", "content": "Temporary notice."}
+    )
+    document_id = create.json()["data"]["document_id"]
+    
+    response = client.delete(f"/api/v1/tenants/{test_tenant.id}/kb/documents/{document_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ok"] is True
+    assert data["data"]["deleted"] is True
+    assert data["data"]["chunks_deleted"] == 1
+    
+    missing = client.delete(f"/api/v1/tenants/{test_tenant.id}/kb/documents/{document_id}")
+    assert missing.status_code == 404
+
+class CountingEmbeddingsProvider(DeterministicEmbeddingsProvider):
+    """Deterministic provider that counts embedded texts."""
+    
+    def __init__(self):
+        super().__init__()
+        self.embedded = 0
+    
+    def embed_texts(self, texts):
+        self.embedded += len(texts)
+        return super().embed_texts(texts)
+
+def test_ingest_reuses_tenant_embeddings(test_tenant, db):
+    """Test that repeated boilerplate is embedded once per tenant."""
+    provider = CountingEmbeddingsProvider()
+    service = KBService(db, embeddings_provider=provider)
+    boilerplate = "Delivery dates are estimates and may vary by region. " * 5
+    
+    service.ingest_document(test_tenant.id, "TEXT", "Product A", boilerplate)
+    first = provider.embedded
+    service.ingest_document(test_tenant.id, "TEXT", "Product B", boilerplate)
+    
+    assert first > 0
+    assert provider.embedded == first
+
+class OtherModelEmbeddingsProvider(CountingEmbeddingsProvider):
+    """Same vectors, different model identity."""
+
+def test_ingest_reuses_only_same_model_embeddings(test_tenant, db):
+    """Embeddings stored by another provider model are not reused."""
+    boilerplate = "Warranty claims need the original receipt. " * 5
+    first = CountingEmbeddingsProvider()
+    KBService(db, embeddings_provider=first).ingest_document(test_tenant.id, "TEXT", "Warranty A", boilerplate)
+    
+    other = OtherModelEmbeddingsProvider()
+    document = KBService(db, embeddings_provider=other).ingest_document(test_tenant.id, "TEXT", "Warranty B", boilerplate)
+    
+    assert other.embedded == first.embedded > 0
+    chunks = KBService(db).kb_repo.list_chunks(document.id)
+    assert {chunk.embedding_model for chunk in chunks} == {other.model_id}
+
+def test_bulk_create_documents_contract(test_tenant):
+    """Test POST /api/v1/tenants/{tenant_id}/kb/documents:bulk contract."""
+    lines = [
+        json.dumps({"source_type": "TEXT", "title": "Returns", "content": "Returns accepted within 7 days with invoice."}),
+        "{not json",
+        json.dumps({"title": "Missing source type"}),
+        "",
+        json.dumps({"source_type": "TEXT", "title": "Shipping", "tags": ["shipping"], "content": "Orders ship in 2 days. " * 60}),
+        json.dumps({"source_type": "TEXT", "title": "Empty", "content": ""})
+    ]
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/documents:bulk",
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ok"] is True
+    
+    result = data["data"]
+    assert [doc["line"] for doc in result["documents"]] == [1, 2, 3, 5, 6]
+    assert [doc["status"] for doc in result["documents"]] == ["INGESTED", "FAILED", "FAILED", "INGESTED", "INGESTED"]
+    assert result["documents_ingested"] == 3
+    assert result["documents_failed"] == 2
+    assert result["documents"][1]["error"]
+    assert result["documents"][4]["chunks_created"] == 0
+    assert result["chunks_created"] == sum(doc["chunks_created"] for doc in result["documents"])
+    assert result["chunks_created"] > 2
+    
+    # Ingested documents are listed with their metadata
+    response = client.get(f"/api/v1/tenants/{test_tenant.id}/kb/documents")
+    titles = {doc["title"]: doc for doc in response.json()["data"]}
+    assert titles["Shipping"]["tags"] == ["shipping"]
+    assert titles["Shipping"]["status"] == "INGESTED"
+
+def test_ingest_copies_chunks_with_embeddings(test_tenant, db, monkeypatch):
+    """Chunks written by the COPY path round-trip their spans and embeddings."""
+    provider = DeterministicEmbeddingsProvider(dimension=EMBEDDING_DIMENSION)
+    service = KBService(db, embeddings_provider=provider)
+    assert service.kb_repo._copy_connection() is not None
+    
+    def insert_fallback(rows):
+        pytest.fail("chunks were written with INSERTs instead of COPY")
+    monkeypatch.setattr(service.kb_repo, "bulk_create_chunks", insert_fallback)
+    content = "Refunds are issued within 5 business days. " * 40
+    document = service.ingest_document(test_tenant.id, "TEXT", "Refunds", content)
+    
+    chunks = service.kb_repo.list_chunks(document.id)
+    assert len(chunks) > 1
+    assert [chunk.chunk_index for chunk in chunks] == list(range(len(chunks)))
+    texts = [chunk.resolve_text(content) for chunk in chunks]
+    expected = provider.embed_texts_array(texts)
+    for chunk, embedding in zip(chunks, expected):
+        assert chunk.text is None
+        assert chunk.created_at is not None
+        assert np.allclose(chunk.embedding, embedding)
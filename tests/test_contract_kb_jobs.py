@@ -0,0 +1,138 @@
+"""Contract tests for background KB ingestion jobs."""
+import asyncio
+import pytest
+from sqlalchemy import text as text_sql
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.db.models import Tenant
+from app.repositories.kb_ingest_job import KBIngestJobRepository
+from app.services.kb_ingest_worker import KBIngestWorkerPool
+import uuid
+
+client = TestClient(app)
+
+@pytest.fixture
+def db():
+    """Database session fixture."""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def test_tenant(db):
+    """Create test tenant."""
+    tenant = Tenant(
+        id=uuid.uuid4(),
+        name="Test Tenant",
+        slug=f"test-tenant-{uuid.uuid4().hex[:8]}",
+        timezone="UTC",
+        default_language="en-US",
+        features={}
+    )
+    db.add(tenant)
+    db.commit()
+    db.refresh(tenant)
+    return tenant
+
+def _drain_queue():
+    """Process every runnable job, as the background workers would."""
+    pool = KBIngestWorkerPool(workers=0)
+    while asyncio.run(pool.run_once()):
+        pass
+
+def test_background_ingest_contract(test_tenant):
+    """POST with background=true returns PENDING and a job that workers complete."""
+    content = " ".join(f"Sentence {i} about shipping and returns." for i in range(200))
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/documents?background=true",
+        json={"source_type": "TEXT", "title": "Shipping", "tags": [], "content": content}
+    )
+    assert response.status_code == 200
+    doc_data = response.json()["data"]
+    assert doc_data["status"] == "PENDING"
+    assert doc_data["chunks_created"] == 0
+    job_id = doc_data["job_id"]
+    
+    response = client.get(f"/api/v1/tenants/{test_tenant.id}/kb/jobs/{job_id}")
+    assert response.status_code == 200
+    job = response.json()["data"]
+    assert job["status"] == "QUEUED"
+    assert job["document_id"] == doc_data["document_id"]
+    assert job["attempts"] == 0
+    assert job["chunks_total"] is None
+    
+    _drain_queue()
+    
+    response = client.get(f"/api/v1/tenants/{test_tenant.id}/kb/jobs/{job_id}")
+    job = response.json()["data"]
+    assert job["status"] == "SUCCEEDED"
+    assert job["attempts"] == 1
+    assert job["chunks_total"] > 1
+    assert job["chunks_processed"] == job["chunks_total"]
+    assert job["error"] is None
+    assert job["finished_at"] is not None
+    
+    response = client.get(f"/api/v1/tenants/{test_tenant.id}/kb/documents")
+    documents = response.json()["data"]
+    assert [d["status"] for d in documents] == ["INGESTED"]
+
+def test_stale_claim_cannot_overwrite_reclaimed_job(db, test_tenant):
+    """Updates from a worker whose job was reclaimed are ignored."""
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/documents?background=true",
+        json={"source_type": "TEXT", "title": "Doc", "tags": [], "content": "Hello there."}
+    )
+    job_id = response.json()["data"]["job_id"]
+    jobs = KBIngestJobRepository(db)
+    first = jobs.claim_next(stale_after_seconds=300)
+    # The first worker goes quiet and the job is reclaimed
+    second = jobs.claim_next(stale_after_seconds=0)
+    assert str(first.id) == str(second.id) == job_id
+    assert second.attempts == first.attempts + 1
+    
+    assert jobs.fail(first.id, first.attempts, "stale worker") is False
+    assert jobs.complete(second.id, second.attempts) is True
+    job = client.get(f"/api/v1/tenants/{test_tenant.id}/kb/jobs/{job_id}").json()["data"]
+    assert job["status"] == "SUCCEEDED"
+    assert job["error"] is None
+
+def test_background_ingest_replaces_chunks_of_earlier_attempt(db, test_tenant):
+    """Chunks left by an earlier attempt of a PENDING document are replaced."""
+    content = " ".join(f"Sentence {i} about shipping and returns." for i in range(50))
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/documents?background=true",
+        json={"source_type": "TEXT", "title": "Shipping", "tags": [], "content": content}
+    )
+    document_id = response.json()["data"]["document_id"]
+    count_chunks = text_sql("SELECT count(*) FROM kb_chunks WHERE document_id = :id")
+    _drain_queue()
+    chunks = db.execute(count_chunks, {"id": document_id}).scalar()
+    assert chunks > 1
+    
+    # As if an attempt had stored chunks without finishing the document
+    db.execute(text_sql("UPDATE kb_documents SET status = 'PENDING' WHERE id = :id"), {"id": document_id})
+    db.execute(text_sql("UPDATE kb_ingest_jobs SET status = 'QUEUED' WHERE document_id = :id"), {"id": document_id})
+    db.commit()
+    _drain_queue()
+    
+    assert db.execute(count_chunks, {"id": document_id}).scalar() == chunks
+
+def test_background_ingest_invalid_chunking_config(db, test_tenant):
+    """A bad chunking config fails the request instead of queueing a job."""
+    test_tenant.features = {"kb_chunking": {"mode": "sentences"}}
+    db.commit()
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/documents?background=true",
+        json={"source_type": "TEXT", "title": "Doc", "tags": [], "content": "Hello."}
+    )
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "VALIDATION_ERROR"
+
+def test_get_ingest_job_not_found(test_tenant):
+    """Unknown job IDs return NOT_FOUND."""
+    response = client.get(f"/api/v1/tenants/{test_tenant.id}/kb/jobs/{uuid.uuid4()}")
+    assert response.status_code == 404
+    assert response.json()["error"]["code"] == "NOT_FOUND"
@@ -0,0 +1,102 @@
+"""Contract tests for KB projection endpoints."""
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import EMBEDDING_DIMENSION, KB_PCA_DIMENSION
+from app.db.session import SessionLocal
+from app.db.models import Tenant, KBDocument, KBChunk
+from app.providers.embeddings.deterministic import DeterministicEmbeddingsProvider
+import uuid
+
+client = TestClient(app)
+
+@pytest.fixture
+def db():
+    """Database session fixture."""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def test_tenant(db):
+    """Create test tenant."""
+    tenant = Tenant(
+        id=uuid.uuid4(),
+        name="Test Tenant",
+        slug=f"test-tenant-{uuid.uuid4().hex[:8]}",
+        timezone="UTC",
+        default_language="en-US",
+        features={}
+    )
+    db.add(tenant)
+    db.commit()
+    db.refresh(tenant)
+    return tenant
+
+def _add_chunks(db, tenant, count):
+    """Add a document with count embedded chunks."""
+    doc = KBDocument(
+        id=uuid.uuid4(),
+        tenant_id=tenant.id,
+        source_type="TEXT",
+        title="FAQ",
+        content="",
+        tags=[],
+        status="INGESTED"
+    )
+    db.add(doc)
+    db.flush()
+
+    provider = DeterministicEmbeddingsProvider(dimension=EMBEDDING_DIMENSION)
+    texts = [f"Question {i}: where is order number {i}?" for i in range(count)]
+    for idx, (text, embedding) in enumerate(zip(texts, provider.embed_texts_array(texts))):
+        db.add(KBChunk(document_id=doc.id, chunk_index=idx, text=text, embedding=embedding))
+    db.commit()
+    return texts
+
+def test_get_projection_not_fitted(test_tenant):
+    """GET before fitting returns NOT_FOUND."""
+    response = client.get(f"/api/v1/tenants/{test_tenant.id}/kb/projection")
+    assert response.status_code == 404
+    assert response.json()["ok"] is False
+    assert response.json()["error"]["code"] == "NOT_FOUND"
+
+def test_fit_projection_needs_enough_embeddings(db, test_tenant):
+    """Fitting with fewer embeddings than components is a validation error."""
+    _add_chunks(db, test_tenant, 3)
+    response = client.post(f"/api/v1/tenants/{test_tenant.id}/kb/projection", json={})
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "VALIDATION_ERROR"
+
+def test_fit_projection_contract(db, test_tenant):
+    """Test POST /api/v1/tenants/{tenant_id}/kb/projection contract."""
+    texts = _add_chunks(db, test_tenant, KB_PCA_DIMENSION + 72)
+
+    response = client.post(f"/api/v1/tenants/{test_tenant.id}/kb/projection", json={})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ok"] is True
+    projection = data["data"]
+    assert projection["source_dimension"] == EMBEDDING_DIMENSION
+    assert projection["dimension"] == KB_PCA_DIMENSION
+    assert projection["sample_size"] == len(texts)
+    assert projection["chunks_reduced"] == len(texts)
+    assert 0.0 <= projection["explained_variance"] <= 1.0
+
+    response = client.get(f"/api/v1/tenants/{test_tenant.id}/kb/projection")
+    assert response.status_code == 200
+    assert response.json()["data"]["fitted_at"] == projection["fitted_at"]
+
+    # Reduced-index candidates are rescored at full precision
+    test_tenant.features = {"kb_search": {"storage": "reduced"}}
+    db.commit()
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search",
+        json={"query": texts[42], "top_k": 3}
+    )
+    assert response.status_code == 200
+    hits = response.json()["data"]["hits"]
+    assert hits[0]["text"] == texts[42]
+    assert hits[0]["score"] == pytest.approx(1.0, abs=1e-6)
@@ -1,10 +1,13 @@
 """Contract tests for KB search endpoint."""
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event, text as text_sql
 from app.main import app
-from app.db.session import SessionLocal
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
 from app.db.models import Tenant, KBDocument, KBChunk
 from app.providers.embeddings.deterministic import DeterministicEmbeddingsProvider
+from app.services.kb_service import KBService
 import uuid
 from datetime import datetime
 
@@ -122,3 +125,228 @@ def test_search_without_filters(test_tenant, test_document_with_chunks):
     assert data["ok"] is True
     assert "hits" in data["data"]
 
+
+@pytest.mark.skipif(not settings.KB_QUANTIZED_STORAGE, reason="quantized columns need KB_QUANTIZED_STORAGE")
+@pytest.mark.parametrize("storage", ["halfvec", "bit"])
+def test_search_quantized_storage_rescores_exactly(db, test_tenant, test_document_with_chunks, storage):
+    """Compact-index candidates are rescored at full precision."""
+    test_tenant.features = {"kb_search": {"storage": storage}}
+    db.commit()
+    
+    text = "Items must be unused and in original packaging."
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search",
+        json={"query": text, "top_k": 2}
+    )
+    assert response.status_code == 200
+    hits = response.json()["data"]["hits"]
+    assert len(hits) == 2
+    assert hits[0]["text"] == text
+    # Exact cosine distance of the identical vector, not a quantized estimate
+    assert hits[0]["score"] == pytest.approx(1.0, abs=1e-6)
+    assert hits[0]["score"] >= hits[1]["score"]
+
+@pytest.mark.parametrize("storage", ["halfvec", "bit"])
+def test_search_quantized_storage_needs_opt_in(db, test_tenant, monkeypatch, storage):
+    """Without the quantized columns, the compact modes are a validation error."""
+    monkeypatch.setattr(settings, "KB_QUANTIZED_STORAGE", False)
+    test_tenant.features = {"kb_search": {"storage": storage}}
+    db.commit()
+    
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search",
+        json={"query": "unused items", "top_k": 2}
+    )
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "VALIDATION_ERROR"
+
+def test_search_hydrates_hits_in_one_query(db, test_tenant, test_document_with_chunks):
+    """Hits carry text, chunk index and document title without per-hit queries."""
+    service = KBService(db, embeddings_provider=DeterministicEmbeddingsProvider())
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        hits = service.search(test_tenant.id, "Refunds processed within 5-7 business days.", top_k=3)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    
+    assert len([s for s in statements if "kb_chunks" in s]) == 1
+    assert len(hits) == 3
+    assert hits[0].text == "Refunds processed within 5-7 business days."
+    assert hits[0].chunk_index == 2
+    assert hits[0].document_id == test_document_with_chunks.id
+    assert hits[0].title == "Returns Policy"
+
+def test_search_resolves_span_chunk_text(test_tenant):
+    """Chunks stored as spans are returned with their text sliced from the document."""
+    content = "Gift cards never expire and can be used on any order."
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/documents",
+        json={"source_type": "TEXT", "title": "Gift Cards", "tags": [], "content": content}
+    )
+    assert response.status_code == 200
+    
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search",
+        json={"query": content, "top_k": 1}
+    )
+    hit = response.json()["data"]["hits"][0]
+    assert hit["text"] == content
+    assert hit["chunk_index"] == 0
+    assert hit["document"]["title"] == "Gift Cards"
+
+def _ingest_shipping_faq(tenant):
+    """Ingest a document where one chunk mentions an order number."""
+    content = (
+        "Standard shipping takes three to five business days. " * 20
+        + "Order ORD-48213 was split into two parcels from different warehouses. "
+        + "Express shipping arrives the next business day when ordered before noon. " * 20
+    )
+    response = client.post(
+        f"/api/v1/tenants/{tenant.id}/kb/documents",
+        json={"source_type": "TEXT", "title": "Shipping FAQ", "tags": [], "content": content}
+    )
+    assert response.status_code == 200
+    assert response.json()["data"]["chunks_created"] > 2
+
+@pytest.mark.parametrize("mode", ["lexical", "hybrid"])
+def test_search_modes_find_exact_identifiers(test_tenant, mode):
+    """Full-text and hybrid search rank the chunk with an exact order number first."""
+    _ingest_shipping_faq(test_tenant)
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search",
+        json={"query": "ORD-48213", "top_k": 3, "mode": mode}
+    )
+    assert response.status_code == 200
+    hits = response.json()["data"]["hits"]
+    assert hits
+    assert "ORD-48213" in hits[0]["text"]
+    assert all(0.0 <= hit["score"] <= 1.0 for hit in hits)
+    assert [hit["score"] for hit in hits] == sorted((hit["score"] for hit in hits), reverse=True)
+
+def test_search_mode_from_tenant_features(db, test_tenant):
+    """Tenants can default to a search mode via features["kb_search"]."""
+    _ingest_shipping_faq(test_tenant)
+    test_tenant.features = {"kb_search": {"mode": "lexical"}}
+    db.commit()
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search",
+        json={"query": "parcels warehouses", "top_k": 5}
+    )
+    hits = response.json()["data"]["hits"]
+    # Lexical search only returns chunks matching a query term
+    assert len(hits) == 1
+    assert "ORD-48213" in hits[0]["text"]
+
+def test_search_unknown_mode(test_tenant):
+    """Unknown search modes are a validation error."""
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search",
+        json={"query": "returns", "mode": "fuzzy"}
+    )
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "VALIDATION_ERROR"
+
+def test_search_with_search_effort(db, test_tenant, test_document_with_chunks):
+    """probes / ef_search from the request or tenant defaults apply to the search."""
+    text = "Refunds processed within 5-7 business days."
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search",
+        json={"query": text, "top_k": 1, "probes": 10, "ef_search": 100}
+    )
+    assert response.status_code == 200
+    assert response.json()["data"]["hits"][0]["text"] == text
+    
+    # set_config(..., true) only lasts for the search's transaction
+    with SessionLocal() as session:
+        KBService(session).search(test_tenant.id, text, top_k=1, probes=7, ef_search=64)
+        assert session.execute(text_sql("SHOW ivfflat.probes")).scalar() == "7"
+        assert session.execute(text_sql("SHOW hnsw.ef_search")).scalar() == "64"
+    
+    test_tenant.features = {"kb_search": {"probes": 5, "ef_search": 80}}
+    db.commit()
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search",
+        json={"query": text, "top_k": 1}
+    )
+    assert response.json()["data"]["hits"][0]["text"] == text
+
+def test_hnsw_ef_search_covers_candidates(monkeypatch, test_tenant, test_document_with_chunks):
+    """With HNSW, ef_search is raised to the candidate count even when not configured."""
+    monkeypatch.setattr(settings, "KB_VECTOR_INDEX", "hnsw")
+    monkeypatch.setattr(settings, "KB_HNSW_EF_SEARCH", None)
+    with SessionLocal() as session:
+        KBService(session).search(test_tenant.id, "returns", top_k=100, mode="hybrid")
+        assert int(session.execute(text_sql("SHOW hnsw.ef_search")).scalar()) >= 100
+
+def test_search_invalid_search_effort(db, test_tenant, test_document_with_chunks):
+    """Out-of-range search effort in tenant features is a validation error."""
+    test_tenant.features = {"kb_search": {"ef_search": 0}}
+    db.commit()
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search",
+        json={"query": "returns", "top_k": 1}
+    )
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "VALIDATION_ERROR"
+
+def test_search_batch_contract(test_tenant, test_document_with_chunks):
+    """POST /kb/search:batch returns each query's hits, as single searches would."""
+    queries = [
+        "Refunds processed within 5-7 business days.",
+        "Items must be unused and in original packaging."
+    ]
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.post(
+            f"/api/v1/tenants/{test_tenant.id}/kb/search:batch",
+            json={"queries": queries, "top_k": 2}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ok"] is True
+    assert len([s for s in statements if "kb_chunks" in s]) == 1
+    
+    results = data["data"]["results"]
+    assert [result["query"] for result in results] == queries
+    for query, result in zip(queries, results):
+        assert len(result["hits"]) == 2
+        assert result["hits"][0]["text"] == query
+        single = client.post(
+            f"/api/v1/tenants/{test_tenant.id}/kb/search",
+            json={"query": query, "top_k": 2}
+        ).json()["data"]["hits"]
+        assert [hit["chunk_id"] for hit in result["hits"]] == [hit["chunk_id"] for hit in single]
+
+@pytest.mark.parametrize("mode", ["lexical", "hybrid"])
+def test_search_batch_modes(test_tenant, mode):
+    """Full-text and hybrid batches match each query's own terms."""
+    _ingest_shipping_faq(test_tenant)
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search:batch",
+        json={"queries": ["ORD-48213", "express noon"], "top_k": 3, "mode": mode}
+    )
+    assert response.status_code == 200
+    results = response.json()["data"]["results"]
+    assert "ORD-48213" in results[0]["hits"][0]["text"]
+    assert "Express shipping" in results[1]["hits"][0]["text"]
+
+def test_search_batch_too_many_queries(test_tenant):
+    """Batches are capped at KB_SEARCH_BATCH_MAX_QUERIES queries."""
+    response = client.post(
+        f"/api/v1/tenants/{test_tenant.id}/kb/search:batch",
+        json={"queries": ["returns"] * (settings.KB_SEARCH_BATCH_MAX_QUERIES + 1)}
+    )
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "VALIDATION_ERROR"
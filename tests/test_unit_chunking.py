@@ -1,6 +1,17 @@
 """Unit tests for chunking utility."""
 import pytest
-from app.core.chunking import chunk_text
+import random
+import types
+from concurrent.futures import ProcessPoolExecutor
+from app.core.chunking import (
+    chunk_text, iter_chunks, iter_chunk_spans, iter_token_chunks,
+    iter_document_chunks, iter_document_spans, chunk_documents,
+    get_chunking_pool, shutdown_chunking_pool
+)
+from app.core.config import settings
+from app.core.errors import APIError
+from app.services.kb_service import KBService
+from app.core.tokenization import RegexTokenizer
 
 def test_chunk_empty_text():
     """Test chunking empty text."""
@@ -39,3 +50,172 @@ def test_chunk_preserves_content():
     combined = " ".join(result)
     assert len(combined) >= len(text.replace(" ", ""))
 
+def test_iter_chunks_is_lazy():
+    """Test that iter_chunks returns a generator."""
+    result = iter_chunks("Sentence one. Sentence two.", chunk_size=10, chunk_overlap=2)
+    assert isinstance(result, types.GeneratorType)
+
+def _baseline_chunk_text(text, chunk_size=500, chunk_overlap=50):
+    """chunk_text as it was before the streaming rewrite (frozen copy)."""
+    if not text or len(text) <= chunk_size:
+        return [text] if text else []
+    
+    chunks = []
+    start = 0
+    
+    while start < len(text):
+        end = start + chunk_size
+        
+        if end < len(text):
+            for punct in ['. ', '.\n', '! ', '!\n', '? ', '?\n']:
+                last_punct = text.rfind(punct, start, end)
+                if last_punct > start + chunk_size // 2:
+                    end = last_punct + 1
+                    break
+        
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        
+        start = end - chunk_overlap
+        if start >= len(text):
+            break
+    
+    return chunks
+
+def _baseline_cases():
+    """Seeded texts mixing every sentence ending, blank runs and long words."""
+    rng = random.Random(1234)
+    pieces = [
+        "Refunds take 5-7 days. ", "Why? ", "Great!\n", "Call support.\n", "ok ",
+        "   ", "\n\n", "Wait! ", "Is it shipped?\n", "v1.2 ", "x" * 30 + " "
+    ]
+    for _ in range(300):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 80)))
+        chunk_size = rng.randint(5, 200)
+        # The baseline never advances when overlap reaches half the window
+        yield text, chunk_size, rng.randint(0, max(0, chunk_size // 2 - 1))
+
+def test_iter_chunks_matches_baseline_chunk_text():
+    """Test that iter_chunks and chunk_text reproduce the original algorithm."""
+    text = (
+        "Returns accepted within 7 days. Items must be unused!\n"
+        "Need help? Contact support.\nRefunds take 5-7 days. "
+    ) * 40
+    cases = [(text, 50, 5), (text, 120, 20), (text, 500, 50), *_baseline_cases()]
+    for text, chunk_size, chunk_overlap in cases:
+        expected = _baseline_chunk_text(text, chunk_size, chunk_overlap)
+        assert list(iter_chunks(text, chunk_size, chunk_overlap)) == expected
+        assert chunk_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap) == expected
+
+def test_iter_chunks_breaks_at_sentence_boundary():
+    """Test that chunks end at a sentence boundary when one is available."""
+    text = "First sentence here. Second sentence is here. Third one."
+    result = list(iter_chunks(text, chunk_size=30, chunk_overlap=0))
+    assert result[0] == "First sentence here."
+
+def test_token_chunks_respect_budget():
+    """Test that token chunks never exceed the token budget."""
+    tokenizer = RegexTokenizer()
+    text = "Order 1234 shipped today. Delivery takes 3-5 days! " * 50
+    result = list(iter_token_chunks(text, max_tokens=40, overlap_tokens=5, tokenizer=tokenizer))
+    assert len(result) > 1
+    assert all(tokenizer.count_tokens(chunk) <= 40 for chunk in result)
+
+def test_token_chunks_cover_text():
+    """Test that token chunks start and end on document tokens."""
+    text = "Returns accepted within 7 days. Items must be unused. Refunds take 5-7 days."
+    result = list(iter_token_chunks(text, max_tokens=8, overlap_tokens=2))
+    assert text.startswith(result[0])
+    assert text.endswith(result[-1])
+
+def test_token_chunks_hindi():
+    """Test that Devanagari words are kept whole by the default tokenizer."""
+    text = "मुझे रिफंड चाहिए। आपका ऑर्डर कहाँ है?"
+    assert RegexTokenizer().count_tokens(text) == 9
+    result = list(iter_token_chunks(text, max_tokens=256, overlap_tokens=32))
+    assert result == [text]
+
+def test_token_chunks_invalid_overlap():
+    """Test that an overlap as large as the budget is rejected."""
+    with pytest.raises(ValueError):
+        iter_token_chunks("some text", max_tokens=10, overlap_tokens=10)
+
+def test_document_chunks_modes():
+    """Test chunking mode dispatch."""
+    text = "Sentence one. Sentence two. Sentence three. Sentence four."
+    assert list(iter_document_chunks(text, mode="chars", chunk_size=30, chunk_overlap=5)) == \
+        chunk_text(text, chunk_size=30, chunk_overlap=5)
+    assert len(list(iter_document_chunks(text, mode="tokens", chunk_size=4, chunk_overlap=1))) > 1
+    with pytest.raises(ValueError):
+        iter_document_chunks(text, mode="words")
+
+def test_chunk_spans_match_chunks():
+    """Test that spans slice the document into the same chunks."""
+    text = "  Returns accepted within 7 days.  Items must be unused!\n\n Refunds take 5-7 days.  " * 10
+    spans = list(iter_chunk_spans(text, chunk_size=60, chunk_overlap=10))
+    assert [text[start:end] for start, end in spans] == chunk_text(text, chunk_size=60, chunk_overlap=10)
+
+def test_document_spans_tokens_mode():
+    """Test that token-mode spans are offsets into the original text."""
+    text = "Order #A-1234 shipped. It arrives Friday. Call us with questions."
+    spans = list(iter_document_spans(text, mode="tokens", chunk_size=6, chunk_overlap=1))
+    assert [text[start:end] for start, end in spans] == \
+        list(iter_document_chunks(text, mode="tokens", chunk_size=6, chunk_overlap=1))
+    assert all(0 <= start < end <= len(text) for start, end in spans)
+
+def test_chunk_documents_inline():
+    """Test that small batches are chunked inline, in input order."""
+    texts = ["Short one.", "", "Another document. With two sentences."]
+    result = chunk_documents(texts, chunk_size=20, chunk_overlap=5)
+    assert result == [list(iter_chunk_spans(text, 20, 5)) for text in texts]
+
+def test_chunk_documents_process_pool():
+    """Test that the process pool path preserves input order."""
+    texts = [f"Document {i}. " + "Policy text sentence. " * (i % 7 + 1) for i in range(40)]
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        result = chunk_documents(texts, chunk_size=50, chunk_overlap=5, executor=pool, min_parallel_chars=0)
+    assert result == [list(iter_chunk_spans(text, 50, 5)) for text in texts]
+
+def test_chunk_documents_shared_pool(monkeypatch):
+    """Test that KB_CHUNKING_WORKERS routes batches to one long-lived pool."""
+    monkeypatch.setattr(settings, "KB_CHUNKING_WORKERS", 2)
+    texts = [f"Document {i}. " + "Policy text sentence. " * 5 for i in range(8)]
+    try:
+        first = chunk_documents(texts, chunk_size=50, chunk_overlap=5, min_parallel_chars=0)
+        pool = get_chunking_pool()
+        second = chunk_documents(texts, chunk_size=50, chunk_overlap=5, min_parallel_chars=0)
+        assert get_chunking_pool() is pool
+    finally:
+        shutdown_chunking_pool()
+    assert first == second == [list(iter_chunk_spans(text, 50, 5)) for text in texts]
+    assert get_chunking_pool.cache_info().currsize == 0
+
+def test_chunk_documents_invalid_options():
+    """Test that invalid options fail before any work is scheduled."""
+    with pytest.raises(ValueError):
+        chunk_documents(["text"], mode="words")
+
+def test_document_spans_zero_chunk_size_rejected():
+    """Test that an explicit chunk_size of 0 is an error, not the default."""
+    for mode in ("chars", "tokens"):
+        with pytest.raises(ValueError):
+            list(iter_document_spans("Some text.", mode=mode, chunk_size=0))
+
+@pytest.mark.parametrize("config", [
+    {"chunk_size": 0},
+    {"chunk_size": "256"},
+    {"chunk_size": True},
+    {"chunk_overlap": -1},
+    {"chunk_overlap": 1.5},
+    {"mode": ["tokens"]},
+    {"mode": "words"},
+])
+def test_invalid_tenant_chunking_config(config):
+    """Test that bad tenant chunking settings are a 400 VALIDATION_ERROR."""
+    service = KBService(None, embeddings_provider=object())
+    tenant = types.SimpleNamespace(id="tenant", features={"kb_chunking": config})
+    with pytest.raises(APIError) as excinfo:
+        service._chunking_options(tenant)
+    assert excinfo.value.code == "VALIDATION_ERROR"
+    assert excinfo.value.status_code == 400
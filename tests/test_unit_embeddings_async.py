@@ -0,0 +1,92 @@
+"""Unit tests for the async embeddings interface."""
+import asyncio
+import time
+import numpy as np
+import pytest
+from app.providers.embeddings.cached import CachedEmbeddingsProvider
+from app.providers.embeddings.fake import FakeEmbeddingsProvider
+
+def test_aembed_matches_sync():
+    """Test async embeddings equal the sync float32 path."""
+    provider = FakeEmbeddingsProvider(dimension=16)
+    texts = ["where is my order", "return policy"]
+    
+    matrix = asyncio.run(provider.aembed_texts_array(texts))
+    
+    assert np.array_equal(matrix, provider.embed_texts_array(texts))
+    assert asyncio.run(provider.aembed_query("return policy")) == matrix[1].tolist()
+    assert asyncio.run(provider.aembed_texts([])) == []
+
+def test_aembed_splits_batches():
+    """Test calls are split at max_batch_size and reassembled in order."""
+    provider = FakeEmbeddingsProvider(dimension=16).configure_async(max_batch_size=3)
+    texts = [f"text {i}" for i in range(8)]
+    
+    matrix = asyncio.run(provider.aembed_texts_array(texts))
+    
+    assert list(provider.batch_sizes) == [3, 3, 2]
+    assert np.array_equal(matrix, provider.embed_texts_array(texts))
+
+def test_aembed_concurrency_limit():
+    """Test at most max_concurrency provider calls run at once."""
+    provider = FakeEmbeddingsProvider(dimension=16, latency_seconds=0.02)
+    provider.configure_async(max_concurrency=2, max_batch_size=1)
+    
+    async def run():
+        await asyncio.gather(*[provider.aembed_query(f"q{i}") for i in range(6)])
+    asyncio.run(run())
+    
+    assert provider.calls == 6
+    assert provider.max_in_flight == 2
+
+def test_aembed_does_not_block_event_loop():
+    """Test the event loop keeps running while the provider is slow."""
+    provider = FakeEmbeddingsProvider(dimension=16, latency_seconds=0.1)
+    ticks = []
+    
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+    
+    async def run():
+        await asyncio.gather(provider.aembed_query("slow"), ticker())
+    asyncio.run(run())
+    
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.1
+
+def test_aembed_timeout():
+    """Test slow calls fail with TimeoutError and still hold their slot until done."""
+    provider = FakeEmbeddingsProvider(dimension=16, latency_seconds=0.2)
+    provider.configure_async(max_concurrency=1, timeout_seconds=0.02)
+    
+    async def run():
+        with pytest.raises(TimeoutError):
+            await provider.aembed_query("slow")
+        # The abandoned call still occupies the only slot
+        with pytest.raises(TimeoutError):
+            await provider.aembed_query("next")
+    asyncio.run(run())
+    
+    assert provider.calls == 1
+
+def test_cached_aembed_serves_hits_inline():
+    """Test the cache only sends misses to the wrapped provider."""
+    inner = FakeEmbeddingsProvider(dimension=16)
+    cache = CachedEmbeddingsProvider(inner)
+    
+    first = asyncio.run(cache.aembed_texts_array(["a", "b"]))
+    second = asyncio.run(cache.aembed_texts_array(["b", "c"]))
+    
+    assert list(inner.batch_sizes) == [2, 1]
+    assert np.array_equal(second[0], first[1])
+
+def test_configure_async_validation():
+    """Test invalid async limits are rejected."""
+    provider = FakeEmbeddingsProvider(dimension=16)
+    with pytest.raises(ValueError):
+        provider.configure_async(max_concurrency=0)
+    with pytest.raises(ValueError):
+        provider.configure_async(max_batch_size=0)
+    assert provider.configure_async(timeout_seconds=0).async_timeout_seconds is None
@@ -0,0 +1,106 @@
+"""Unit tests for the micro-batching embeddings wrapper."""
+import asyncio
+import numpy as np
+import pytest
+from app.providers.embeddings.batching import BatchingEmbeddingsProvider
+from app.providers.embeddings.fake import FakeEmbeddingsProvider
+
+def _gather(provider, texts):
+    async def run():
+        return await asyncio.gather(*[provider.aembed_query_array(text) for text in texts])
+    return asyncio.run(run())
+
+def test_concurrent_queries_share_one_batch():
+    """Test queries arriving within the window are embedded together."""
+    inner = FakeEmbeddingsProvider(dimension=16)
+    batcher = BatchingEmbeddingsProvider(inner, max_wait_ms=20, max_batch_size=32)
+    texts = [f"query {i}" for i in range(10)]
+    
+    vectors = _gather(batcher, texts)
+    
+    assert list(inner.batch_sizes) == [10]
+    assert np.array_equal(np.stack(vectors), inner.embed_texts_array(texts))
+    stats = batcher.stats()
+    assert stats["calls"] == 10
+    assert stats["batches"] == 1
+    assert stats["batch_size_histogram"]["16"] == 1
+    assert stats["queue_delay_ms"]["max"] > 0
+
+def test_full_batch_dispatches_without_waiting():
+    """Test reaching max_batch_size flushes before the window ends."""
+    inner = FakeEmbeddingsProvider(dimension=16)
+    batcher = BatchingEmbeddingsProvider(inner, max_wait_ms=10_000, max_batch_size=4)
+    
+    _gather(batcher, [f"q{i}" for i in range(8)])
+    
+    assert list(inner.batch_sizes) == [4, 4]
+    assert batcher.stats()["queue_delay_ms"]["max"] < 1000
+
+def test_duplicate_queries_embedded_once():
+    """Test identical queries in one batch share a single embedding."""
+    inner = FakeEmbeddingsProvider(dimension=16)
+    batcher = BatchingEmbeddingsProvider(inner, max_wait_ms=20)
+    
+    first, second, third = _gather(batcher, ["return policy", "return policy", "order status"])
+    
+    assert list(inner.batch_sizes) == [2]
+    assert np.array_equal(first, second)
+    assert not np.array_equal(first, third)
+
+def test_large_calls_bypass_queue():
+    """Test calls already at max_batch_size go straight to the provider."""
+    inner = FakeEmbeddingsProvider(dimension=16)
+    batcher = BatchingEmbeddingsProvider(inner, max_wait_ms=10_000, max_batch_size=4)
+    
+    matrix = asyncio.run(batcher.aembed_texts_array([f"t{i}" for i in range(5)]))
+    
+    assert matrix.shape == (5, 16)
+    assert list(inner.batch_sizes) == [5]
+
+def test_provider_errors_reach_every_caller():
+    """Test a failed batch fails each waiting call."""
+    class FailingProvider(FakeEmbeddingsProvider):
+        def embed_texts_array(self, texts):
+            raise RuntimeError("provider down")
+    
+    batcher = BatchingEmbeddingsProvider(FailingProvider(dimension=16), max_wait_ms=5)
+    
+    async def run():
+        return await asyncio.gather(
+            batcher.aembed_query_array("a"),
+            batcher.aembed_query_array("b"),
+            return_exceptions=True
+        )
+    results = asyncio.run(run())
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_cancelled_caller_does_not_affect_others():
+    """Test cancelling one queued call leaves the rest of the batch intact."""
+    inner = FakeEmbeddingsProvider(dimension=16)
+    batcher = BatchingEmbeddingsProvider(inner, max_wait_ms=20)
+    
+    async def run():
+        cancelled = asyncio.ensure_future(batcher.aembed_query_array("a"))
+        kept = asyncio.ensure_future(batcher.aembed_query_array("b"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+    vector = asyncio.run(run())
+    
+    assert list(inner.batch_sizes) == [1]
+    assert np.array_equal(vector, inner.embed_query_array("b"))
+
+def test_sync_calls_pass_through():
+    """Test sync methods are not queued."""
+    inner = FakeEmbeddingsProvider(dimension=16)
+    batcher = BatchingEmbeddingsProvider(inner, max_wait_ms=10_000)
+    assert batcher.embed_query("a") == inner.embed_query("a")
+    assert batcher.stats()["batches"] == 0
+
+def test_invalid_configuration():
+    """Test invalid batching limits are rejected."""
+    with pytest.raises(ValueError):
+        BatchingEmbeddingsProvider(FakeEmbeddingsProvider(), max_batch_size=0)
+    with pytest.raises(ValueError):
+        BatchingEmbeddingsProvider(FakeEmbeddingsProvider(), max_wait_ms=-1)
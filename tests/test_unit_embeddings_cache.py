@@ -0,0 +1,139 @@
+"""Unit tests for the embeddings LRU cache."""
+import asyncio
+import numpy as np
+import pytest
+from app.providers.embeddings.cached import CachedEmbeddingsProvider, ENTRY_OVERHEAD_BYTES
+from app.providers.embeddings.deterministic import DeterministicEmbeddingsProvider
+
+class CountingProvider(DeterministicEmbeddingsProvider):
+    """Deterministic provider that records every text it embeds."""
+    
+    def __init__(self, dimension: int = 8):
+        super().__init__(dimension=dimension)
+        self.calls = []
+    
+    def embed_texts_array(self, texts):
+        self.calls.append(list(texts))
+        return super().embed_texts_array(texts)
+
+class FakeClock:
+    """Manually advanced clock."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def _entry_bytes(dimension=8):
+    return dimension * 4 + ENTRY_OVERHEAD_BYTES
+
+def test_cache_hits_and_misses():
+    """Test repeated texts are served from cache."""
+    inner = CountingProvider()
+    cache = CachedEmbeddingsProvider(inner)
+    
+    first = cache.embed_texts_array(["where is my order", "return policy"])
+    second = cache.embed_texts_array(["return policy", "where is my order"])
+    
+    assert inner.calls == [["where is my order", "return policy"]]
+    assert np.array_equal(first, inner.embed_texts_array(["where is my order", "return policy"]))
+    assert np.array_equal(second, first[::-1])
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+    assert stats["entries"] == 2
+
+def test_cache_embeds_only_misses_once_per_batch():
+    """Test duplicates within a batch and known texts skip the provider."""
+    inner = CountingProvider()
+    cache = CachedEmbeddingsProvider(inner)
+    cache.embed_query("a")
+    
+    matrix = cache.embed_texts_array(["a", "b", "b", "c"])
+    
+    assert inner.calls[-1] == ["b", "c"]
+    assert np.array_equal(matrix[1], matrix[2])
+    assert cache.stats()["misses"] == 3
+
+def test_cache_lru_eviction():
+    """Test least recently used entries are evicted over the byte budget."""
+    inner = CountingProvider()
+    cache = CachedEmbeddingsProvider(inner, max_bytes=2 * _entry_bytes())
+    
+    cache.embed_query("a")
+    cache.embed_query("b")
+    cache.embed_query("a")  # refresh "a"; "b" is now least recent
+    cache.embed_query("c")
+    
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+    inner.calls.clear()
+    cache.embed_query("a")
+    cache.embed_query("b")
+    assert inner.calls == [["b"]]
+
+def test_document_embeddings_bypass_cache():
+    """Test ingested chunks neither evict cached queries nor get cached."""
+    inner = CountingProvider()
+    cache = CachedEmbeddingsProvider(inner, max_bytes=2 * _entry_bytes())
+    cache.embed_query("where is my order")
+    chunks = [f"chunk {i}" for i in range(10)]
+    
+    matrix = cache.embed_documents_array(chunks)
+    asyncio.run(cache.aembed_documents_array(chunks))
+    
+    assert np.array_equal(matrix, inner.embed_texts_array(chunks))
+    inner.calls.clear()
+    cache.embed_query("where is my order")
+    assert inner.calls == []
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["evictions"] == 0
+    assert stats["misses"] == 1
+
+def test_cache_ttl_expiry():
+    """Test entries expire after the TTL."""
+    inner = CountingProvider()
+    clock = FakeClock()
+    cache = CachedEmbeddingsProvider(inner, ttl_seconds=10, clock=clock)
+    
+    cache.embed_query("a")
+    clock.now = 9.0
+    cache.embed_query("a")
+    clock.now = 10.0
+    cache.embed_query("a")
+    
+    assert len(inner.calls) == 2
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["expirations"] == 1
+
+def test_cache_key_includes_provider_and_dimension():
+    """Test providers with different dimensions never share entries."""
+    small = CachedEmbeddingsProvider(CountingProvider(dimension=8))
+    large = CachedEmbeddingsProvider(CountingProvider(dimension=16))
+    assert small._key("a") != large._key("a")
+
+def test_cached_vectors_are_read_only_copies():
+    """Test callers cannot corrupt cached vectors through returned arrays."""
+    cache = CachedEmbeddingsProvider(CountingProvider())
+    vector = cache.embed_query_array("a")
+    vector[:] = 0
+    assert np.any(cache.embed_query_array("a") != 0)
+
+def test_cache_metrics_include_provider():
+    """Test metrics combine provider info and cache counters."""
+    cache = CachedEmbeddingsProvider(CountingProvider())
+    metrics = cache.metrics()
+    assert metrics["provider"] == "CountingProvider"
+    assert metrics["dimension"] == 8
+    assert metrics["cache"]["misses"] == 0
+
+def test_cache_rejects_invalid_budget():
+    """Test invalid configuration is rejected."""
+    with pytest.raises(ValueError):
+        CachedEmbeddingsProvider(CountingProvider(), max_bytes=0)
+    with pytest.raises(ValueError):
+        CachedEmbeddingsProvider(CountingProvider(), ttl_seconds=0)
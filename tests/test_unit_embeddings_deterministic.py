@@ -51,3 +51,58 @@ def test_embed_texts():
     assert all(len(emb) == 384 for emb in embeddings)
     assert all(isinstance(emb, list) for emb in embeddings)
 
+
+def _reference_embedding(text, dimension):
+    """Per-text implementation the batched path must reproduce exactly."""
+    import hashlib
+    import numpy as np
+    hash_bytes = hashlib.sha256(text.encode('utf-8')).digest()
+    vector = [(hash_bytes[i % len(hash_bytes)] / 127.5) - 1.0 for i in range(dimension)]
+    vec_array = np.array(vector)
+    return (vec_array / np.linalg.norm(vec_array)).tolist()
+
+def test_embed_texts_bit_identical():
+    """Test that batched embeddings match the per-text computation exactly."""
+    texts = [f"chunk {i}: returns accepted within {i % 30} days" for i in range(500)]
+    texts += ["", "नमस्ते", "a" * 5000]
+    for dimension in (384, 100):
+        provider = DeterministicEmbeddingsProvider(dimension=dimension)
+        expected = [_reference_embedding(text, dimension) for text in texts]
+        assert provider.embed_texts(texts) == expected
+
+def test_embed_texts_empty():
+    """Test embedding an empty batch."""
+    provider = DeterministicEmbeddingsProvider(dimension=384)
+    assert provider.embed_texts([]) == []
+
+def test_embed_texts_array():
+    """Test the float32 array contract."""
+    import numpy as np
+    provider = DeterministicEmbeddingsProvider(dimension=384)
+    texts = ["text one", "text two", "text three"]
+    matrix = provider.embed_texts_array(texts)
+    
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (3, 384)
+    assert matrix.flags.c_contiguous
+    assert np.array_equal(matrix, np.asarray(provider.embed_texts(texts), dtype=np.float32))
+    assert np.array_equal(provider.embed_query_array("text two"), matrix[1])
+
+def test_embed_texts_array_default_adapter():
+    """Test the base-class adapter for list-only providers."""
+    import numpy as np
+    from app.providers.embeddings.base import EmbeddingsProvider
+    
+    class ListProvider(EmbeddingsProvider):
+        dimension = 2
+        
+        def embed_texts(self, texts):
+            return [[1.0, float(len(text))] for text in texts]
+        
+        def embed_query(self, text):
+            return self.embed_texts([text])[0]
+    
+    provider = ListProvider()
+    assert provider.embed_texts_array(["ab"]).tolist() == [[1.0, 2.0]]
+    assert provider.embed_texts_array([]).shape == (0, 2)
+    assert provider.embed_query_array("abc").dtype == np.float32
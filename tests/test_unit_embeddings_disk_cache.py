@@ -0,0 +1,127 @@
+"""Unit tests for the persistent embeddings disk cache."""
+import os
+import numpy as np
+import pytest
+from app.providers.embeddings.deterministic import DeterministicEmbeddingsProvider
+from app.providers.embeddings.disk_cache import (
+    KEY_BYTES, DiskCachedEmbeddingsProvider, DiskEmbeddingStore, text_key
+)
+
+class CountingProvider(DeterministicEmbeddingsProvider):
+    """Deterministic provider that records every text it embeds."""
+    
+    def __init__(self, dimension: int = 8):
+        super().__init__(dimension=dimension)
+        self.calls = []
+    
+    def embed_texts_array(self, texts):
+        self.calls.append(list(texts))
+        return super().embed_texts_array(texts)
+
+def _vectors(n, dimension=4, start=0):
+    return np.arange(start * dimension, (start + n) * dimension, dtype=np.float32).reshape(n, dimension)
+
+def test_disk_cache_survives_restart(tmp_path):
+    """Test a new provider instance reads vectors written by a previous one."""
+    texts = ["where is my order", "return policy", "return policy"]
+    first = CountingProvider()
+    expected = DiskCachedEmbeddingsProvider(first, str(tmp_path)).embed_texts_array(texts)
+    assert first.calls == [["where is my order", "return policy"]]
+    
+    second = CountingProvider()
+    cache = DiskCachedEmbeddingsProvider(second, str(tmp_path))
+    assert np.array_equal(cache.embed_texts_array(texts), expected)
+    assert second.calls == []
+    assert cache.stats()["hits"] == 3
+    assert np.array_equal(expected, first.embed_texts_array(texts))
+
+def test_disk_cache_embeds_only_missing(tmp_path):
+    """Test known texts are read from disk and only new ones embedded."""
+    inner = CountingProvider()
+    cache = DiskCachedEmbeddingsProvider(inner, str(tmp_path))
+    cache.embed_query("a")
+    
+    matrix = cache.embed_texts_array(["a", "b", "c"])
+    
+    assert inner.calls[-1] == ["b", "c"]
+    assert np.array_equal(matrix, inner.embed_texts_array(["a", "b", "c"]))
+    assert cache.stats()["rows"] == 3
+
+def test_store_sees_other_writers(tmp_path):
+    """Test appends by another process are visible after refresh."""
+    writer = DiskEmbeddingStore(str(tmp_path), 4)
+    reader = DiskEmbeddingStore(str(tmp_path), 4)
+    keys = [text_key("a"), text_key("b")]
+    
+    assert writer.append(keys, _vectors(2)) == 2
+    assert reader.get_many(keys)[0] == []
+    reader.refresh()
+    found, vectors = reader.get_many(keys)
+    assert found == [0, 1]
+    assert np.array_equal(vectors, _vectors(2))
+    
+    # The reader does not rewrite keys the writer already stored
+    assert reader.append(keys, _vectors(2)) == 0
+
+def test_store_ignores_torn_write(tmp_path):
+    """Test a partial key at the end of keys.idx is ignored and overwritten."""
+    store = DiskEmbeddingStore(str(tmp_path), 4)
+    store.append([text_key("a")], _vectors(1))
+    with open(store.keys_path, "ab") as f:
+        f.write(b"\x00" * (KEY_BYTES // 2))
+    
+    reopened = DiskEmbeddingStore(str(tmp_path), 4)
+    assert reopened.rows == 1
+    reopened.append([text_key("b")], _vectors(1, start=1))
+    assert os.path.getsize(store.keys_path) == 2 * KEY_BYTES
+    assert np.array_equal(reopened.get_many([text_key("b")])[1], _vectors(1, start=1))
+
+def test_store_compaction(tmp_path):
+    """Test compaction keeps the newest keys and readers reload the new files."""
+    store = DiskEmbeddingStore(str(tmp_path), 4)
+    reader = DiskEmbeddingStore(str(tmp_path), 4)
+    keys = [text_key(str(i)) for i in range(5)]
+    for i, key in enumerate(keys):
+        store.append([key], _vectors(1, start=i))
+    reader.refresh()
+    
+    assert store.compact(max_rows=3) == 3
+    reader.refresh()
+    found, vectors = reader.get_many(keys)
+    assert found == [2, 3, 4]
+    assert np.array_equal(vectors, _vectors(3, start=2))
+
+def test_disk_cache_auto_compacts(tmp_path):
+    """Test the store is trimmed once it outgrows max_rows."""
+    cache = DiskCachedEmbeddingsProvider(CountingProvider(), str(tmp_path), max_rows=4)
+    cache.embed_texts_array([str(i) for i in range(6)])
+    
+    stats = cache.stats()
+    assert stats["compactions"] == 1
+    assert stats["rows"] == 4
+
+def test_store_rejects_dimension_mismatch(tmp_path):
+    """Test opening a store with another dimension fails."""
+    DiskEmbeddingStore(str(tmp_path), 4)
+    with pytest.raises(ValueError):
+        DiskEmbeddingStore(str(tmp_path), 8)
+
+def test_store_ignores_unfinished_compaction(tmp_path):
+    """Test files from a compaction that crashed before switching CURRENT are not used."""
+    store = DiskEmbeddingStore(str(tmp_path), 4)
+    keys = [text_key(str(i)) for i in range(3)]
+    store.append(keys, _vectors(3))
+    # A crash after writing the next generation, before the switch
+    (tmp_path / "keys.1.idx").write_bytes(keys[0])
+    (tmp_path / "vectors.1.f32").write_bytes(b"\x00" * 5)
+    
+    reopened = DiskEmbeddingStore(str(tmp_path), 4)
+    found, vectors = reopened.get_many(keys)
+    assert found == [0, 1, 2]
+    assert np.array_equal(vectors, _vectors(3))
+    
+    # The next compaction overwrites the leftovers and switches over
+    assert reopened.compact() == 3
+    assert (tmp_path / "CURRENT").read_text() == "1"
+    assert not (tmp_path / "keys.idx").exists()
+    assert np.array_equal(DiskEmbeddingStore(str(tmp_path), 4).get_many(keys)[1], _vectors(3))
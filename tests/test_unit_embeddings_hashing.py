@@ -0,0 +1,131 @@
+"""Unit tests for the feature-hashing n-gram embeddings provider."""
+import hashlib
+import numpy as np
+import pytest
+from app.providers.embeddings.deterministic import DeterministicEmbeddingsProvider
+from app.providers.embeddings.hashing import HashingEmbeddingsProvider
+
+# Labeled FAQ retrieval set: each query's label is the index of its answer
+FAQ = [
+    ("How long does shipping take?", "Standard shipping takes 3-5 business days; express shipping arrives in 1-2 business days."),
+    ("What is your return policy?", "You can return unused items within 30 days of delivery for a full refund."),
+    ("How do I track my order?", "Use the tracking link in your shipping confirmation email to track your order status."),
+    ("Can I cancel my order?", "Orders can be cancelled within 1 hour of placing them from the My Orders page."),
+    ("Do you ship internationally?", "We ship to over 40 countries; international delivery takes 7-14 days and customs fees may apply."),
+    ("How do I reset my password?", "Click Forgot Password on the login page and follow the reset link we email you."),
+    ("Which payment methods do you accept?", "We accept credit cards, debit cards, UPI, net banking and cash on delivery."),
+    ("When will I get my refund?", "Refunds are credited to the original payment method within 5-7 business days after we receive the return."),
+    ("How do I change my delivery address?", "You can update the delivery address from the order details page before the order is shipped."),
+    ("My item arrived damaged, what should I do?", "If an item arrives damaged, upload photos from the order page and we will send a free replacement."),
+    ("Do you offer gift wrapping?", "Gift wrapping is available at checkout for a small additional charge."),
+    ("How do I apply a coupon code?", "Enter your coupon code in the promo code box at checkout and click Apply to get the discount."),
+    ("Is cash on delivery available?", "Cash on delivery is available for orders under 10,000 rupees in most pin codes."),
+    ("How can I contact customer support?", "Reach our customer support team by phone, chat or email, 24 hours a day."),
+    ("Can I exchange an item for a different size?", "Size exchanges are free within 15 days; choose Exchange on the order page and pick the new size."),
+    ("Do you have a warranty on electronics?", "All electronics come with a one year manufacturer warranty covering defects."),
+]
+
+QUERIES = [
+    ("how many days for shipping", 0),
+    ("when will my package be delivered", 0),
+    ("can i return an item i bought", 1),
+    ("returns policy for unused products", 1),
+    ("where is my order", 2),
+    ("track order status", 2),
+    ("cancel order", 3),
+    ("i want to cancel what i ordered", 3),
+    ("do you deliver to other countries", 4),
+    ("international shipping customs", 4),
+    ("forgot my password", 5),
+    ("reset login password", 5),
+    ("can i pay with upi", 6),
+    ("payment options accepted", 6),
+    ("refund not received yet", 7),
+    ("how long does a refund take", 7),
+    ("change shipping address", 8),
+    ("update delivery address on my order", 8),
+    ("product arrived broken", 9),
+    ("received a damaged item", 9),
+    ("gift wrap my order", 10),
+    ("promo code not working", 11),
+    ("how to use a coupon", 11),
+    ("cod available", 12),
+    ("pay cash when delivered", 12),
+    ("talk to customer care", 13),
+    ("support phone number", 13),
+    ("exchange for another size", 14),
+    ("wrong size need exchange", 14),
+    ("warranty for electronics", 15),
+    ("is my phone covered by warranty", 15),
+]
+
+def _recall_at_1(provider):
+    documents = provider.embed_texts_array([f"{question} {answer}" for question, answer in FAQ])
+    queries = provider.embed_texts_array([query for query, _ in QUERIES])
+    best = np.argmax(queries @ documents.T, axis=1)
+    labels = np.array([label for _, label in QUERIES])
+    return float(np.mean(best == labels))
+
+def test_beats_sha_provider_on_faq_retrieval():
+    """Test hashed n-grams retrieve the right FAQ far more often than SHA vectors."""
+    hashing = _recall_at_1(HashingEmbeddingsProvider())
+    sha = _recall_at_1(DeterministicEmbeddingsProvider())
+    
+    assert hashing >= 0.75
+    assert hashing >= sha + 0.5
+
+def test_similar_texts_get_similar_vectors():
+    """Test near-identical texts are close and unrelated texts are not."""
+    provider = HashingEmbeddingsProvider()
+    same, near, far = provider.embed_texts_array(
+        ["Where is my order?", "where is MY order", "warranty for electronics"]
+    )
+    assert same @ near > 0.99
+    assert same @ far < 0.3
+
+def test_vectors_are_unit_float32():
+    """Test the float32 array contract and normalization."""
+    provider = HashingEmbeddingsProvider(dimension=384)
+    matrix = provider.embed_texts_array(["return policy", "", "नमस्ते दुनिया", "!!!"])
+    
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (4, 384)
+    assert matrix.flags.c_contiguous
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-6)
+    assert np.array_equal(matrix[1], matrix[3])  # no words: fixed vector
+
+def test_vectors_independent_of_batch():
+    """Test a text's vector does not depend on its batch neighbours."""
+    provider = HashingEmbeddingsProvider()
+    alone = provider.embed_query_array("track my order")
+    batched = provider.embed_texts_array(["a", "track my order", "xyz return policy"])[1]
+    assert np.array_equal(alone, batched)
+
+def test_vectors_unchanged_when_power_tables_grow():
+    """Test a batch longer than the kept power tables embeds as its texts do alone."""
+    provider = HashingEmbeddingsProvider(dimension=64)
+    texts = [f"refund {i} for a damaged order " * 20 for i in range(20)]
+    batched = provider.embed_texts_array(texts)
+    fresh = HashingEmbeddingsProvider(dimension=64)
+    assert len(provider._power_tables[0]) > len(fresh._power_tables[0])
+    assert all(np.array_equal(batched[i], fresh.embed_query_array(text)) for i, text in enumerate(texts))
+
+def test_vectors_stable_across_instances():
+    """Test vectors are reproducible (pinned so hashing changes are deliberate)."""
+    vector = HashingEmbeddingsProvider().embed_query_array("Where is my order?")
+    assert np.array_equal(vector, HashingEmbeddingsProvider().embed_query_array("Where is my order?"))
+    assert hashlib.sha256(vector.tobytes()).hexdigest()[:16] == "d3a2d7408ca83e40"
+    assert not np.array_equal(vector, HashingEmbeddingsProvider(seed=1).embed_query_array("Where is my order?"))
+
+def test_list_interface():
+    """Test list methods mirror the array path."""
+    provider = HashingEmbeddingsProvider(dimension=64)
+    assert provider.embed_texts([]) == []
+    assert provider.embed_query("refund") == provider.embed_query_array("refund").tolist()
+
+def test_invalid_configuration():
+    """Test invalid settings are rejected."""
+    with pytest.raises(ValueError):
+        HashingEmbeddingsProvider(n_buckets=1000)
+    with pytest.raises(ValueError):
+        HashingEmbeddingsProvider(char_ngram_range=(4, 3))
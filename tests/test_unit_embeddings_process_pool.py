@@ -0,0 +1,72 @@
+"""Unit tests for the process-pool embeddings provider."""
+import asyncio
+from functools import partial
+import numpy as np
+import pytest
+from app.providers.embeddings.fake import FakeEmbeddingsProvider
+from app.providers.embeddings.hashing import HashingEmbeddingsProvider
+from app.providers.embeddings.process_pool import ProcessPoolEmbeddingsProvider
+
+@pytest.fixture(scope="module")
+def pool_provider():
+    """Two-worker pool around the hashing provider (workers start once per module)."""
+    provider = ProcessPoolEmbeddingsProvider(
+        partial(HashingEmbeddingsProvider, dimension=64),
+        max_workers=2,
+        task_batch_size=4
+    )
+    yield provider
+    provider.close()
+
+def test_matches_in_process_provider(pool_provider):
+    """Test vectors from workers equal the provider run in-process."""
+    texts = [f"where is my order {i}" for i in range(10)]
+    expected = HashingEmbeddingsProvider(dimension=64).embed_texts_array(texts)
+    
+    matrix = pool_provider.embed_texts_array(texts)
+    
+    assert pool_provider.dimension == 64
+    assert pool_provider.name == HashingEmbeddingsProvider(dimension=64).name
+    assert matrix.dtype == np.float32
+    assert np.array_equal(matrix, expected)
+    assert pool_provider.embed_query(texts[3]) == expected[3].tolist()
+
+def test_async_matches_sync(pool_provider):
+    """Test the async path returns the same rows in order."""
+    texts = [f"text {i}" for i in range(9)]
+    matrix = asyncio.run(pool_provider.aembed_texts_array(texts))
+    assert np.array_equal(matrix, pool_provider.embed_texts_array(texts))
+    assert asyncio.run(pool_provider.aembed_texts_array([])).shape == (0, 64)
+
+def test_event_loop_stays_responsive(pool_provider):
+    """Test a large async embed leaves the event loop free for other work."""
+    texts = [f"chunk {i}: returns accepted within {i % 30} days " * 10 for i in range(200)]
+    
+    async def run():
+        embed = asyncio.ensure_future(pool_provider.aembed_texts_array(texts))
+        # Let the embed start; a call that blocked the loop would run to
+        # completion here, before this coroutine is resumed
+        await asyncio.sleep(0)
+        turns = 0
+        while not embed.done():
+            turns += 1
+            await asyncio.sleep(0)
+        return turns, embed.result()
+    turns, matrix = asyncio.run(run())
+    
+    assert turns > 0
+    assert np.array_equal(matrix, pool_provider.embed_texts_array(texts))
+
+def test_async_timeout_releases_shared_memory():
+    """Test a timed-out call raises TimeoutError and later calls still work."""
+    provider = ProcessPoolEmbeddingsProvider(
+        partial(FakeEmbeddingsProvider, dimension=8, latency_seconds=0.3),
+        max_workers=1
+    ).configure_async(timeout_seconds=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            asyncio.run(provider.aembed_query_array("slow"))
+        assert provider.embed_texts_array(["a"]).shape == (1, 8)
+        assert provider.metrics()["process_pool"]["calls"] == 2
+    finally:
+        provider.close()
@@ -0,0 +1,129 @@
+"""Unit tests for per-tenant ANN search effort tuning."""
+import uuid
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.core.errors import APIError
+from app.providers.embeddings.fake import FakeEmbeddingsProvider
+from app.services import kb_service
+from app.services.kb_service import KBService
+
+TOP_K = 10
+
+class FakeSession:
+    def rollback(self):
+        pass
+    
+    def commit(self):
+        pass
+
+class FakeTenantRepo:
+    def __init__(self, tenant):
+        self.tenant = tenant
+    
+    def get(self, tenant_id):
+        return self.tenant
+
+class FakeSearchRepo:
+    """Exact search finds chunks 0..top_k-1; ANN search finds `probes` of them."""
+    
+    def __init__(self, quantized_columns=True):
+        self.searches = []
+        self.quantized_columns = quantized_columns
+    
+    def get_vector_dimension(self, table, column):
+        if column in kb_service.QUANTIZED_COLUMNS and not self.quantized_columns:
+            return None
+        return 8
+    
+    def search_exact(self, tenant_id, query_embedding, top_k, filters, **options):
+        self.exact_options = options
+        return [SimpleNamespace(chunk_id=i) for i in range(top_k)]
+    
+    def search_similar(self, tenant_id, query_embedding, top_k, probes, **options):
+        self.searches.append(probes)
+        found = min(top_k, probes)
+        return [SimpleNamespace(chunk_id=i) for i in range(found)] + [
+            SimpleNamespace(chunk_id=-i) for i in range(1, top_k - found + 1)
+        ]
+
+@pytest.fixture(autouse=True)
+def clear_query_samples(monkeypatch):
+    monkeypatch.setattr(kb_service, "_quantized_columns_found", False)
+    kb_service._query_samples.clear()
+    yield
+    kb_service._query_samples.clear()
+
+def _service(features=None, queries=30):
+    tenant = SimpleNamespace(id=uuid.uuid4(), features=features or {})
+    service = KBService(FakeSession(), embeddings_provider=FakeEmbeddingsProvider(dimension=8))
+    service.tenant_repo = FakeTenantRepo(tenant)
+    service.kb_repo = FakeSearchRepo()
+    for _ in range(queries):
+        service._record_query(tenant.id, np.zeros(8, dtype=np.float32), TOP_K, None)
+    return service, tenant
+
+def test_tuner_stores_cheapest_setting_meeting_target(monkeypatch):
+    """Candidates are tried cheapest first; the first reaching the target is stored."""
+    monkeypatch.setattr(settings, "KB_VECTOR_INDEX", "ivfflat")
+    service, tenant = _service(features={"kb_search": {"storage": "full"}})
+    tuning = service.tune_ann_search(tenant.id, recall_target=0.95, min_queries=10)
+    
+    assert tuning["setting"] == "probes"
+    assert tuning["value"] == 16
+    assert tuning["recall"] == 1.0
+    assert tuning["queries"] == 30
+    assert sorted(set(service.kb_repo.searches)) == [1, 2, 4, 8, 16]
+    assert tenant.features["kb_search"]["storage"] == "full"
+    assert tenant.features["kb_search"]["ann_tuning"] == tuning
+    assert service._search_options(tenant)["probes"] == 16
+    assert tenant.id in kb_service.sampled_search_tenants()
+
+def test_tuner_stores_nothing_below_target(monkeypatch):
+    """An unreachable target reports the largest candidate's recall but stores nothing."""
+    monkeypatch.setattr(settings, "KB_VECTOR_INDEX", "ivfflat")
+    service, tenant = _service(features={"kb_search": {"probes": 3}})
+    tuning = service.tune_ann_search(tenant.id, recall_target=1.01, min_queries=10)
+    assert tuning["value"] == kb_service.ANN_TUNE_CANDIDATES["ivfflat"][1][-1]
+    assert tuning["recall"] == 1.0
+    assert tenant.features == {"kb_search": {"probes": 3}}
+
+def test_tuner_ground_truth_uses_tenant_storage(monkeypatch):
+    """Exact results come from the tenant's storage mode, not full precision."""
+    monkeypatch.setattr(settings, "KB_VECTOR_INDEX", "ivfflat")
+    monkeypatch.setattr(settings, "KB_QUANTIZED_STORAGE", True)
+    service, tenant = _service(features={"kb_search": {"storage": "bit", "rescore_overfetch": 4}})
+    service.tune_ann_search(tenant.id, min_queries=10)
+    assert service.kb_repo.exact_options["storage"] == "bit"
+    assert service.kb_repo.exact_options["rescore_overfetch"] == 4
+
+def test_quantized_storage_needs_migrated_columns(monkeypatch):
+    """KB_QUANTIZED_STORAGE alone does not enable halfvec / bit search without the columns."""
+    monkeypatch.setattr(settings, "KB_QUANTIZED_STORAGE", True)
+    service, tenant = _service(features={"kb_search": {"storage": "halfvec"}})
+    service.kb_repo.quantized_columns = False
+    with pytest.raises(APIError) as error:
+        service._search_call_options(tenant, None, None, None)
+    assert error.value.code == "VALIDATION_ERROR"
+    
+    service.kb_repo.quantized_columns = True
+    assert service._search_call_options(tenant, None, None, None)["storage"] == "halfvec"
+
+def test_tuner_skips_tenants_without_enough_queries():
+    """Too few sampled queries leave the tenant's settings alone."""
+    service, tenant = _service(queries=5)
+    assert service.tune_ann_search(tenant.id, min_queries=10) is None
+    assert tenant.features == {}
+
+def test_tuner_respects_opt_out():
+    """Tenants with "autotune": false keep their own search effort."""
+    service, tenant = _service(features={"kb_search": {"autotune": False, "probes": 3}})
+    assert service.tune_ann_search(tenant.id, min_queries=10) is None
+    assert tenant.features["kb_search"]["probes"] == 3
+
+def test_query_sample_is_bounded(monkeypatch):
+    """Only the most recent queries per tenant are kept."""
+    monkeypatch.setattr(settings, "KB_ANN_TUNE_SAMPLE_SIZE", 4)
+    service, tenant = _service(queries=10)
+    assert len(kb_service._query_samples[tenant.id]) == 4
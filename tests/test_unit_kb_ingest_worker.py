@@ -0,0 +1,111 @@
+"""Unit tests for background KB ingestion retry handling."""
+import asyncio
+import threading
+from types import SimpleNamespace
+import uuid
+from app.core.errors import APIError
+from app.services import kb_ingest_worker
+from app.services.kb_ingest_worker import KBIngestWorkerPool
+
+class FakeJobs:
+    """Records the queue updates a worker makes."""
+    
+    def __init__(self, db=None):
+        self.calls = []
+    
+    def requeue(self, job_id, attempts, error, delay_seconds):
+        self.calls.append(("requeue", error, delay_seconds))
+        return True
+    
+    def fail(self, job_id, attempts, error):
+        self.calls.append(("fail", error))
+        return True
+
+class FakeSession:
+    def close(self):
+        pass
+
+def _claim(attempts: int) -> SimpleNamespace:
+    return SimpleNamespace(id=uuid.uuid4(), tenant_id=uuid.uuid4(), document_id=uuid.uuid4(), attempts=attempts)
+
+def _pool() -> KBIngestWorkerPool:
+    return KBIngestWorkerPool(workers=0, max_attempts=3, retry_backoff_seconds=5.0, session_factory=FakeSession)
+
+def test_failures_are_retried_with_exponential_backoff():
+    """Attempts before the last are requeued with doubling delays."""
+    pool, jobs = _pool(), FakeJobs()
+    pool._record_failure(jobs, _claim(1), RuntimeError("provider timeout"))
+    pool._record_failure(jobs, _claim(2), RuntimeError("provider timeout"))
+    assert jobs.calls == [
+        ("requeue", "provider timeout", 5.0),
+        ("requeue", "provider timeout", 10.0),
+    ]
+
+def test_last_attempt_fails_the_job():
+    """The job and its document fail once max_attempts is reached."""
+    pool, jobs = _pool(), FakeJobs()
+    pool._record_failure(jobs, _claim(3), RuntimeError("provider timeout"))
+    assert jobs.calls == [("fail", "provider timeout")]
+
+def test_client_errors_are_not_retried():
+    """Errors a retry cannot fix (e.g. the document is gone) fail immediately."""
+    pool, jobs = _pool(), FakeJobs()
+    error = APIError(code="NOT_FOUND", message="Document not found", status_code=404)
+    pool._record_failure(jobs, _claim(1), error)
+    assert jobs.calls == [("fail", "Document not found")]
+
+def test_reclaimed_job_past_max_attempts_fails(monkeypatch):
+    """A job reclaimed from a dead worker after its last attempt is failed, not run."""
+    jobs = FakeJobs()
+    monkeypatch.setattr(kb_ingest_worker, "KBIngestJobRepository", lambda db: jobs)
+    pool = _pool()
+    monkeypatch.setattr(pool, "_claim", lambda: _claim(4))
+    assert asyncio.run(pool.run_once()) is True
+    assert jobs.calls == [("fail", "Gave up after 3 attempts")]
+
+def test_run_once_on_empty_queue(monkeypatch):
+    """run_once reports an empty queue."""
+    pool = _pool()
+    monkeypatch.setattr(pool, "_claim", lambda: None)
+    assert asyncio.run(pool.run_once()) is False
+
+def test_claim_runs_off_the_event_loop(monkeypatch):
+    """Claiming a job (a blocking database call) runs in a worker thread."""
+    pool = _pool()
+    threads = []
+    
+    def claim():
+        threads.append(threading.current_thread())
+        return None
+    
+    monkeypatch.setattr(pool, "_claim", claim)
+    asyncio.run(pool.run_once())
+    assert threads and threads[0] is not threading.main_thread()
+
+def test_outcome_is_recorded_for_the_claimed_attempt(monkeypatch):
+    """Completion names the attempt it was claimed as; a lost claim is only logged."""
+    completed = []
+    
+    class Jobs(FakeJobs):
+        def update_progress(self, job_id, attempts, processed, embedded, total):
+            return True
+        
+        def complete(self, job_id, attempts):
+            completed.append((attempts, threading.current_thread()))
+            return False
+    
+    class Service:
+        def __init__(self, db):
+            pass
+        
+        async def aingest_queued_document(self, tenant_id, document_id, on_progress):
+            on_progress(1, 1, 1)
+            return {"chunks_total": 1, "chunks_embedded": 1}
+    
+    monkeypatch.setattr(kb_ingest_worker, "KBIngestJobRepository", Jobs)
+    monkeypatch.setattr(kb_ingest_worker, "KBService", Service)
+    pool = _pool()
+    monkeypatch.setattr(pool, "_claim", lambda: _claim(2))
+    assert asyncio.run(pool.run_once()) is True
+    assert [attempts for attempts, _ in completed] == [2]
+    assert completed[0][1] is not threading.main_thread()
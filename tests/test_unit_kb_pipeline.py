@@ -0,0 +1,149 @@
+"""Unit tests for pipelined KB chunk ingestion."""
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from app.core.config import EMBEDDING_DIMENSION, settings
+from app.core.chunking import hash_chunk_text, iter_chunk_spans
+from app.providers.embeddings.fake import FakeEmbeddingsProvider
+from app.schemas.kb import KBDocumentCreate
+from app.services.kb_service import INGEST_BATCH_SIZE, ChunkStream, KBService
+
+class FakeSession:
+    def flush(self):
+        pass
+
+class FakeChunkRepo:
+    """Records written chunk rows; no stored embeddings to reuse."""
+    
+    def __init__(self, provider, write_seconds=0.0, fail_after=None):
+        self.provider = provider
+        self.write_seconds = write_seconds
+        self.fail_after = fail_after
+        self.rows = []
+        self.max_pending = 0
+        self.overlapped_writes = 0
+    
+    def get_embeddings_by_hash(self, tenant_id, hashes, embedding_model):
+        return {}
+    
+    def copy_chunks(self, rows):
+        # Batches embedded but not yet written are held in memory
+        pending = self.provider.calls - len(self.rows) // INGEST_BATCH_SIZE
+        self.max_pending = max(self.max_pending, pending)
+        if self.fail_after is not None and len(self.rows) >= self.fail_after:
+            raise RuntimeError("write failed")
+        # A provider call in flight when the write starts or begun during it
+        calls, in_flight = self.provider.calls, self.provider.in_flight
+        time.sleep(self.write_seconds)
+        if in_flight or self.provider.in_flight or self.provider.calls > calls:
+            self.overlapped_writes += 1
+        self.rows.extend(rows)
+
+CONTENT = " ".join(f"Sentence {i} about order {i % 17} and refund {i % 7}." for i in range(3000))
+
+def _stream(progress=None):
+    document = SimpleNamespace(id=uuid.uuid4(), tenant_id=uuid.uuid4())
+    on_batch = None if progress is None else lambda stored, embedded: progress.append(stored)
+    return ChunkStream(document, CONTENT, iter_chunk_spans(CONTENT), None, on_batch)
+
+def _service(**repo_options):
+    provider = FakeEmbeddingsProvider(dimension=EMBEDDING_DIMENSION)
+    service = KBService(FakeSession(), embeddings_provider=provider)
+    service.kb_repo = FakeChunkRepo(provider, **repo_options)
+    return service
+
+def test_pipeline_matches_sequential_store():
+    """The pipeline writes the same rows, in order, as the batch-at-a-time path."""
+    sequential, pipelined = _service(), _service()
+    progress = []
+    assert sequential._store_chunks(_stream()) == asyncio.run(pipelined._astore_chunks(_stream(progress)))
+    
+    expected, rows = sequential.kb_repo.rows, pipelined.kb_repo.rows
+    assert len(rows) > 2 * INGEST_BATCH_SIZE
+    assert [row["chunk_index"] for row in rows] == list(range(len(rows)))
+    assert all(
+        a["start_offset"] == b["start_offset"] and np.array_equal(a["embedding"], b["embedding"])
+        for a, b in zip(expected, rows)
+    )
+    assert progress[-1] == len(rows)
+    assert {row["embedding_model"] for row in rows} == {pipelined.embeddings_provider.model_id}
+
+def test_pipeline_overlaps_embedding_and_writes():
+    """Embedding the next batch runs while the previous one is written."""
+    service = _service(write_seconds=0.02)
+    service.embeddings_provider.latency_seconds = 0.02
+    asyncio.run(service._astore_chunks(_stream()))
+    # Strictly sequential stages never embed during a write
+    assert service.kb_repo.overlapped_writes > 0
+
+def test_pipeline_bounds_batches_in_memory():
+    """A slow writer makes embedding wait instead of buffering the document."""
+    service = _service(write_seconds=0.01)
+    asyncio.run(service._astore_chunks(_stream()))
+    # Queued batches plus one held by each of the embed and write stages
+    assert service.kb_repo.max_pending <= settings.KB_INGEST_PIPELINE_DEPTH + 2
+
+def test_pipeline_propagates_stage_failure():
+    """A failing write stops the pipeline and raises to the caller."""
+    service = _service(fail_after=INGEST_BATCH_SIZE)
+    with pytest.raises(RuntimeError, match="write failed"):
+        asyncio.run(service._astore_chunks(_stream()))
+    assert len(service.kb_repo.rows) == INGEST_BATCH_SIZE
+
+class FakeBulkSession:
+    """Keeps the document rows of committed transactions."""
+    
+    def __init__(self):
+        self.pending = []
+        self.committed = []
+    
+    def commit(self):
+        self.committed.extend(self.pending)
+        self.pending = []
+    
+    def rollback(self):
+        self.pending = []
+
+class FakeBulkRepo:
+    """Fails any transaction holding a chunk with the poisoned text."""
+    
+    def __init__(self, session, poison):
+        self.session = session
+        self.poison = hash_chunk_text(poison)
+    
+    def get_projection(self, tenant_id):
+        return None
+    
+    def get_embeddings_by_hash(self, tenant_id, hashes, embedding_model):
+        return {}
+    
+    def bulk_create_documents(self, rows):
+        self.session.pending.extend(row["title"] for row in rows)
+    
+    def copy_chunks(self, rows):
+        if any(row["content_hash"] == self.poison for row in rows):
+            raise RuntimeError("bad row")
+
+def test_bulk_failed_group_is_retried_per_document():
+    """Only the document at fault fails; the rest of its group is ingested without re-embedding."""
+    session = FakeBulkSession()
+    provider = FakeEmbeddingsProvider(dimension=8)
+    service = KBService(session, embeddings_provider=provider)
+    tenant = SimpleNamespace(id=uuid.uuid4(), features={})
+    service.tenant_repo = SimpleNamespace(get=lambda tenant_id: tenant)
+    service.kb_repo = FakeBulkRepo(session, "Poisoned.")
+    
+    async def items():
+        for line, content in enumerate(["First doc.", "Poisoned.", "Third doc."], start=1):
+            yield line, KBDocumentCreate(source_type="TEXT", title=f"Doc {line}", content=content), None
+    
+    result = asyncio.run(service.aingest_documents_bulk(tenant.id, items()))
+    assert [doc["status"] for doc in result["documents"]] == ["INGESTED", "FAILED", "INGESTED"]
+    assert "bad row" in result["documents"][1]["error"]
+    assert sorted(session.committed) == ["Doc 1", "Doc 3"]
+    # The retried inserts reuse the group's embeddings
+    assert provider.calls == 1
+    assert result["chunks_embedded"] == 3
@@ -0,0 +1,58 @@
+"""Unit tests for incremental NDJSON parsing."""
+import asyncio
+from app.core.ndjson import aiter_ndjson
+
+def _parse(chunks):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [item async for item in aiter_ndjson(stream())]
+    return asyncio.run(collect())
+
+def test_lines_split_across_chunks():
+    """Lines are reassembled however the body is chunked."""
+    body = b'{"a": 1}\n{"b": "x\\u00e9"}\n[1, 2]\n'
+    expected = [(1, {"a": 1}, None), (2, {"b": "xé"}, None), (3, [1, 2], None)]
+    assert _parse([body]) == expected
+    assert _parse([body[i:i + 1] for i in range(len(body))]) == expected
+    assert _parse([body[:5], body[5:17], b"", body[17:]]) == expected
+
+def test_last_line_without_newline():
+    """A final line without a trailing newline is still parsed."""
+    assert _parse([b'{"a": 1}\n{"a"', b': 2}']) == [(1, {"a": 1}, None), (2, {"a": 2}, None)]
+
+def test_blank_lines_skipped_but_counted():
+    """Blank lines (including CRLF endings) are skipped and keep numbering."""
+    assert _parse([b'\n{"a": 1}\r\n  \n{"a": 2}\n\n']) == [(2, {"a": 1}, None), (4, {"a": 2}, None)]
+
+def test_invalid_lines_reported_without_stopping():
+    """Malformed JSON and invalid UTF-8 are reported and parsing continues."""
+    items = _parse([b'{"a": 1}\n{oops\n\xff\xfe\n{"a": 3}\n'])
+    assert items[0] == (1, {"a": 1}, None)
+    assert items[1][0] == 2 and items[1][1] is None and items[1][2].startswith("Invalid JSON")
+    assert items[2][0] == 3 and items[2][1] is None
+    assert items[3] == (4, {"a": 3}, None)
+
+def test_empty_stream():
+    """An empty body yields nothing."""
+    assert _parse([]) == []
+    assert _parse([b"", b"\n"]) == []
+
+def test_long_lines_reported_without_buffering():
+    """Lines over max_line_bytes are reported once and skipped, however chunked."""
+    long_value = b'{"a": "' + b"x" * 100 + b'"}'
+    body = b'{"a": 1}\n' + long_value + b'\n{"a": 2}\n' + long_value
+
+    async def stream(chunks):
+        for chunk in chunks:
+            yield chunk
+
+    async def collect(chunks):
+        return [item async for item in aiter_ndjson(stream(chunks), max_line_bytes=50)]
+
+    for chunks in ([body], [body[i:i + 16] for i in range(0, len(body), 16)]):
+        items = asyncio.run(collect(chunks))
+        assert [(line, value) for line, value, _ in items] == [(1, {"a": 1}), (2, None), (3, {"a": 2}), (4, None)]
+        assert items[1][2] == items[3][2] == "Line exceeds 50 bytes"
@@ -0,0 +1,114 @@
+"""Unit tests for PCA embedding projections."""
+import numpy as np
+import pytest
+from app.core.config import KB_PCA_DIMENSION
+from app.core.projection import PCAProjection
+from app.providers.embeddings.fake import FakeEmbeddingsProvider
+from app.providers.embeddings.hashing import HashingEmbeddingsProvider
+from app.services.kb_service import KBService
+
+def _low_rank_sample(rows: int = 500, source_dimension: int = 64, rank: int = 8, seed: int = 0) -> np.ndarray:
+    """Unit vectors that (up to small noise) live in a rank-dimensional subspace."""
+    rng = np.random.default_rng(seed)
+    basis = np.linalg.qr(rng.normal(size=(source_dimension, rank)))[0].T
+    sample = rng.normal(size=(rows, rank)) @ basis + 0.01 * rng.normal(size=(rows, source_dimension))
+    return (sample / np.linalg.norm(sample, axis=1, keepdims=True)).astype(np.float32)
+
+def test_fit_shapes_and_orthonormal_components():
+    """Components are orthonormal rows over the source dimension."""
+    projection = PCAProjection.fit(_low_rank_sample(), 16)
+    assert projection.source_dimension == 64
+    assert projection.dimension == 16
+    assert projection.mean.dtype == np.float32
+    gram = projection.components @ projection.components.T
+    assert np.allclose(gram, np.eye(16), atol=1e-5)
+
+def test_fit_captures_low_rank_variance():
+    """A projection as wide as the data's rank keeps almost all variance."""
+    projection = PCAProjection.fit(_low_rank_sample(), 8)
+    assert projection.explained_variance > 0.95
+    assert PCAProjection.fit(_low_rank_sample(), 2).explained_variance < projection.explained_variance
+
+def test_fit_is_deterministic():
+    """Refitting the same sample gives identical components (fixed signs)."""
+    sample = _low_rank_sample()
+    first = PCAProjection.fit(sample, 8)
+    second = PCAProjection.fit(sample[::-1].copy(), 8)
+    assert np.allclose(first.components, second.components, atol=1e-5)
+
+def test_transform_returns_unit_float32_rows():
+    """Reduced vectors are C-contiguous float32 unit rows."""
+    sample = _low_rank_sample()
+    projection = PCAProjection.fit(sample, 8)
+    reduced = projection.transform(sample[:10])
+    assert reduced.shape == (10, 8)
+    assert reduced.dtype == np.float32
+    assert reduced.flags["C_CONTIGUOUS"]
+    assert np.allclose(np.linalg.norm(reduced, axis=1), 1.0, atol=1e-5)
+
+def test_transform_keeps_zero_rows_zero():
+    """A vector equal to the mean projects to the origin without NaNs."""
+    projection = PCAProjection.fit(_low_rank_sample(), 8)
+    reduced = projection.transform(projection.mean[None, :])
+    assert np.all(reduced == 0.0)
+
+def test_transform_rejects_wrong_dimension():
+    """Embeddings from another dimension are rejected."""
+    projection = PCAProjection.fit(_low_rank_sample(), 8)
+    with pytest.raises(ValueError):
+        projection.transform(np.zeros((2, 32), dtype=np.float32))
+
+def test_fit_needs_more_samples_than_components():
+    """Fitting k components needs more than k embeddings."""
+    with pytest.raises(ValueError):
+        PCAProjection.fit(_low_rank_sample(rows=8), 8)
+    with pytest.raises(ValueError):
+        PCAProjection.fit(_low_rank_sample(), 65)
+
+def test_bytes_round_trip():
+    """Stored bytes rebuild an identical projection."""
+    projection = PCAProjection.fit(_low_rank_sample(), 8)
+    mean, components = projection.to_bytes()
+    assert len(components) == 8 * 64 * 4
+    restored = PCAProjection.from_bytes(mean, components, 8, projection.explained_variance)
+    assert np.array_equal(restored.mean, projection.mean)
+    assert np.array_equal(restored.components, projection.components)
+    assert restored.explained_variance == pytest.approx(projection.explained_variance)
+
+def test_reduced_neighbours_match_full_neighbours():
+    """Nearest neighbours in the reduced space mostly agree with full-dimension ones."""
+    provider = HashingEmbeddingsProvider(dimension=384)
+    texts = [f"order {i} shipped to city {i % 37} with item {i % 11} and note {i % 5}" for i in range(600)]
+    embeddings = provider.embed_texts_array(texts)
+    projection = PCAProjection.fit(embeddings, 128)
+    reduced = projection.transform(embeddings)
+
+    queries = embeddings[:50]
+    full_top = np.argsort(-(queries @ embeddings.T), axis=1)[:, 1:11]
+    reduced_top = np.argsort(-(reduced[:50] @ reduced.T), axis=1)[:, 1:41]
+    recall = np.mean([len(set(f) & set(r)) / 10 for f, r in zip(full_top, reduced_top)])
+    # Top 10 by full cosine found among the top 40 reduced candidates
+    assert recall > 0.9
+
+class FakeDimensionRepo:
+    def __init__(self, dimensions):
+        self.dimensions = dimensions
+    
+    def get_vector_dimension(self, table, column):
+        return self.dimensions.get((table, column))
+
+def _dimension_service(dimensions):
+    service = KBService(None, embeddings_provider=FakeEmbeddingsProvider(dimension=8))
+    service.kb_repo = FakeDimensionRepo(dimensions)
+    return service
+
+def test_dimension_check_passes_on_matching_schema():
+    """Matching columns (and columns not created yet) pass the startup check."""
+    dimensions = {("kb_chunks", "embedding"): 8, ("kb_chunks", "embedding_reduced"): KB_PCA_DIMENSION}
+    _dimension_service(dimensions).check_embedding_dimension()
+
+def test_dimension_check_rejects_mismatched_provider():
+    """A provider whose dimension differs from the column fails the startup check."""
+    service = _dimension_service({("kb_chunks", "embedding"): 384, ("embeddings", "embedding"): 8})
+    with pytest.raises(RuntimeError, match="kb_chunks.embedding is vector\\(384\\)"):
+        service.check_embedding_dimension()